@@ -0,0 +1,75 @@
+"""Benchmark: `GET /adaptive-overview` latency as the collection grows.
+
+Builds throwaway SQLite databases of reviewed cards spread over domains, then
+times the endpoint through the Flask test client. A flat curve means the overview no longer scales with the
+number of ORM cards it materialises.
+
+Usage: python benchmarks/bench_adaptive_overview.py [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "overview.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from main import app  # noqa: E402
+from src.models.user import Card, Subject, User, db  # noqa: E402
+
+SIZES = (1_000, 10_000, 50_000)
+DOMAINS = ("language", "computing", "data", "security")
+
+
+def seed(size: int, seed_value: int = 7) -> str:
+    rng = np.random.default_rng(seed_value)
+    user = User(username=f"bench{size}", email=f"bench{size}@example.com", password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    subjects = [Subject(user_id=user.id, name=domain, domain=domain) for domain in DOMAINS]
+    db.session.add_all(subjects)
+    db.session.flush()
+    now = datetime.utcnow()
+    rows = []
+    for index in range(size):
+        subject = subjects[index % len(subjects)]
+        last_review = now - timedelta(days=float(rng.uniform(0, 60)))
+        rows.append({
+            "user_id": user.id,
+            "subject_id": subject.id,
+            "learning_domain": subject.domain,
+            "concept_name": f"concept {index}",
+            "front_content": "Question",
+            "fsrs_stability": float(rng.uniform(0.5, 90)),
+            "fsrs_last_review": last_review,
+            "last_reviewed": last_review,
+            "next_review": now + timedelta(days=float(rng.uniform(-5, 30))),
+        })
+    db.session.execute(db.insert(Card), rows)
+    db.session.commit()
+    return create_access_token(identity=str(user.id))
+
+
+def main(repeats: int = 20) -> None:
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+    for size in SIZES:
+        with app.app_context():
+            headers = {"Authorization": f"Bearer {seed(size)}"}
+        url = "/api/spaced-repetition/adaptive-overview"
+        client.get(url, headers=headers)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            client.get(url, headers=headers)
+        print(f"{size:>7} cards: {(time.perf_counter() - started) / repeats * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(value) for value in sys.argv[1:2]])
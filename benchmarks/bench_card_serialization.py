@@ -0,0 +1,75 @@
+"""Benchmark: payload size and latency of a 100-card response per view.
+
+Builds a throwaway SQLite database of cards attached to subjects, then times `GET /get-due-cards?limit=100` and
+`GET /cards?limit=100` through the Flask test client for each view.
+
+Usage: python benchmarks/bench_card_serialization.py [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "serialization.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from main import app  # noqa: E402
+from src.models.user import Card, Subject, User, db  # noqa: E402
+
+CARDS = 100
+VIEWS = {"full": "", "compact": "view=compact", "fields": "fields=front_content,back_content"}
+
+
+def seed() -> str:
+    user = User(username="bench", email="bench@example.com", password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    subjects = [Subject(user_id=user.id, name=f"path {index}", domain="language") for index in range(CARDS)]
+    db.session.add_all(subjects)
+    db.session.flush()
+    due = datetime.utcnow() - timedelta(days=1)
+    db.session.execute(db.insert(Card), [
+        {
+            "user_id": user.id,
+            "subject_id": subject.id,
+            "learning_domain": subject.domain,
+            "concept_name": f"concept {index}",
+            "front_content": f"Explain the difference between sentence pattern {index} and its variants.",
+            "back_content": f"Pattern {index} is used when the action is finished; the variant stresses duration.",
+            "tags": "grammar,toeic",
+            "next_review": due,
+        }
+        for index, subject in enumerate(subjects)
+    ])
+    db.session.commit()
+    return create_access_token(identity=str(user.id))
+
+
+def measure(client, url: str, headers: dict, repeats: int) -> tuple[int, float]:
+    client.get(url, headers=headers)  # Construit la file du jour hors mesure.
+    started = time.perf_counter()
+    for _ in range(repeats):
+        response = client.get(url, headers=headers)
+    elapsed = (time.perf_counter() - started) / repeats
+    return len(response.data), elapsed * 1000
+
+
+def main(repeats: int = 50) -> None:
+    with app.app_context():
+        db.create_all()
+        headers = {"Authorization": f"Bearer {seed()}"}
+    client = app.test_client()
+    for endpoint in ("get-due-cards", "cards"):
+        for view, query in VIEWS.items():
+            url = f"/api/spaced-repetition/{endpoint}?limit={CARDS}&{query}"
+            size, latency = measure(client, url, headers, repeats)
+            print(f"{endpoint:>14} {view:>8}: {size / 1024:6.1f} KiB, {latency:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(value) for value in sys.argv[1:2]])
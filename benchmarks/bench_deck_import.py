@@ -0,0 +1,67 @@
+"""Benchmark: bulk-import a large CSV deck, then the same deck with its history.
+
+Builds a throwaway SQLite database, then reports the import time of a deck
+alone and of a deck carrying a review history (inserted, then replayed).
+
+Usage: python benchmarks/bench_deck_import.py [cards] [reviews_per_card]
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "import.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import app  # noqa: E402
+from src.models.user import User, db  # noqa: E402
+from src.services.deck_import import import_deck  # noqa: E402
+
+DOMAINS = ("language", "computing", "general")
+
+
+def build_files(cards: int, reviews_per_card: int, prefix: str) -> tuple[str, str]:
+    rng = random.Random(7)
+    deck = ["id,front,back,tags,domain"]
+    revlog = ["card_id,review_time,review_rating,review_duration"]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for index in range(cards):
+        deck.append(f"{prefix}{index},{prefix} question {index},answer {index},bench,{rng.choice(DOMAINS)}")
+        moment = start
+        for _ in range(reviews_per_card):
+            moment += timedelta(days=rng.randint(1, 20))
+            revlog.append(
+                f"{prefix}{index},{int(moment.timestamp() * 1000)},{rng.choice((1, 3, 3, 3, 4))},{rng.randint(1000, 9000)}"
+            )
+    return "\n".join(deck) + "\n", "\n".join(revlog) + "\n"
+
+
+def main(cards: int = 50_000, reviews_per_card: int = 5) -> None:
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password_hash="-")
+        db.session.add(user)
+        db.session.commit()
+
+        deck, _ = build_files(cards, 0, "plain")
+        started = time.perf_counter()
+        summary = import_deck(user.id, io.StringIO(deck, newline=""))
+        print(f"deck only: {summary['cards_imported']} cards in {time.perf_counter() - started:.1f} s")
+
+        deck, revlog = build_files(cards, reviews_per_card, "history")
+        started = time.perf_counter()
+        summary = import_deck(user.id, io.StringIO(deck, newline=""), revlog_lines=io.StringIO(revlog, newline=""))
+        print(
+            f"deck + history: {summary['cards_imported']} cards, {summary['reviews_imported']} reviews, "
+            f"{summary['cards_replayed']} cards replayed in {time.perf_counter() - started:.1f} s"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(value) for value in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,45 @@
+"""Micro-benchmark: per-review latency with and without the scheduler registry.
+
+Usage: python benchmarks/bench_fsrs_review.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fsrs import Card as FsrsCard  # noqa: E402
+from fsrs import Rating, Scheduler  # noqa: E402
+
+from src.services.fsrs_scheduler import get_scheduler, review_with_fsrs, scheduler_cache_info  # noqa: E402
+
+
+def _seed_state() -> str:
+    card, _ = Scheduler(enable_fuzzing=False).review_card(FsrsCard(card_id=1), Rating.Good)
+    return card.to_json()
+
+
+def main(iterations: int = 20000) -> None:
+    state = _seed_state()
+    card = FsrsCard.from_json(state)
+
+    fresh = timeit.timeit(
+        lambda: Scheduler(desired_retention=0.9, enable_fuzzing=False).review_card(card, Rating.Good),
+        number=iterations,
+    )
+    pooled = timeit.timeit(
+        lambda: get_scheduler(0.9).review_card(card, Rating.Good),
+        number=iterations,
+    )
+    end_to_end = timeit.timeit(lambda: review_with_fsrs(state, Rating.Good, 0.9), number=iterations)
+
+    print(f"iterations: {iterations}")
+    print(f"scheduler per review : {fresh / iterations * 1e6:8.2f} µs/review")
+    print(f"pooled scheduler     : {pooled / iterations * 1e6:8.2f} µs/review")
+    print(f"review_with_fsrs     : {end_to_end / iterations * 1e6:8.2f} µs/review")
+    print(f"registry             : {scheduler_cache_info()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
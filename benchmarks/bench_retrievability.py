@@ -0,0 +1,60 @@
+"""Micro-benchmark: collection retrievability, card by card vs one NumPy pass.
+
+Usage: python benchmarks/bench_retrievability.py [cards]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fsrs import Card as FsrsCard  # noqa: E402
+from fsrs import Scheduler, State  # noqa: E402
+
+from src.services.retrievability import compute_retrievability, memory_arrays_from_states  # noqa: E402
+
+
+def main(size: int = 100_000) -> None:
+    now = datetime.now(timezone.utc)
+    rng = np.random.default_rng(7)
+    stabilities = rng.gamma(2.0, 10.0, size) + 0.1
+    ages = rng.uniform(0, 90, size)
+    states = [
+        FsrsCard(
+            card_id=index + 1,
+            state=State.Review,
+            stability=float(stability),
+            difficulty=5.0,
+            due=now,
+            last_review=now - timedelta(days=float(age)),
+        ).to_json()
+        for index, (stability, age) in enumerate(zip(stabilities, ages))
+    ]
+    scheduler = Scheduler(enable_fuzzing=False)
+
+    started = time.perf_counter()
+    scalar = [scheduler.get_card_retrievability(FsrsCard.from_json(state), now) for state in states]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stability, last_review = memory_arrays_from_states(states)
+    parse_seconds = time.perf_counter() - started
+
+    naive_now = now.replace(tzinfo=None)
+    started = time.perf_counter()
+    vectorized = compute_retrievability(stability, last_review, naive_now)
+    compute_seconds = time.perf_counter() - started
+
+    assert np.allclose(vectorized, scalar)
+    print(f"cards: {size}")
+    print(f"from_json + get_card_retrievability : {scalar_seconds * 1000:9.1f} ms")
+    print(f"column extraction from JSON         : {parse_seconds * 1000:9.1f} ms")
+    print(f"NumPy pass on columns               : {compute_seconds * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
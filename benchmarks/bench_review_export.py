@@ -0,0 +1,89 @@
+"""Benchmark: stream a learner's review history as NDJSON and optimizer CSV.
+
+Builds a throwaway SQLite database, then reports the time to the first chunk,
+export throughput and the peak Python memory, which must stay flat as the
+number of logs grows.
+
+Usage: python benchmarks/bench_review_export.py [logs]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "export.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import app  # noqa: E402
+from src.models.user import Card, ReviewLog, User, db  # noqa: E402
+from src.services.review_export import export_review_history  # noqa: E402
+
+RATINGS = ("again", "hard", "good", "good", "good", "easy")
+CARDS = 5_000
+
+
+def seed(logs: int) -> int:
+    user = User(username="bench", email="bench@example.com", password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    db.session.execute(db.insert(Card), [
+        {"user_id": user.id, "concept_name": f"concept {index}", "learning_domain": "language"}
+        for index in range(CARDS)
+    ])
+    card_ids = db.session.execute(db.select(Card.id)).scalars().all()
+    rng = random.Random(11)
+    moment = datetime(2020, 1, 1)
+    for start in range(0, logs, 50_000):
+        rows = []
+        for _ in range(min(50_000, logs - start)):
+            moment += timedelta(seconds=rng.randint(30, 600))
+            rows.append({
+                "user_id": user.id,
+                "card_id": rng.choice(card_ids),
+                "rating": rng.choice(RATINGS),
+                "response_time": rng.uniform(1, 20),
+                "reviewed_at": moment,
+                "review_log": '{"rating": 3}',
+                "next_state": '{"stability": 4.2, "difficulty": 5.1}',
+            })
+        db.session.execute(db.insert(ReviewLog), rows)
+    db.session.commit()
+    return user.id
+
+
+def export(user_id: int, export_format: str) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    first_chunk = None
+    size = 0
+    for chunk in export_review_history(user_id, export_format, include_states=export_format == "ndjson"):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        size += len(chunk)
+    return first_chunk, time.perf_counter() - started, size
+
+
+def main(logs: int = 200_000) -> None:
+    with app.app_context():
+        db.create_all()
+        user_id = seed(logs)
+        for export_format in ("ndjson", "csv"):
+            first_chunk, elapsed, size = export(user_id, export_format)
+            # Second passage, mesuré à part : tracemalloc ralentit fortement Python.
+            tracemalloc.start()
+            export(user_id, export_format)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{export_format}: first chunk {first_chunk * 1000:.1f} ms, total {elapsed:.1f} s "
+                f"({logs / elapsed:.0f} logs/s, {size / 1e6:.0f} MB), peak traced memory {peak / 1e6:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    args = [int(value) for value in sys.argv[1:2]]
+    main(*args)
@@ -0,0 +1,68 @@
+"""Benchmark: replay card states from a large review-log trail.
+
+Builds a throwaway SQLite database, then reports replay throughput and the
+peak Python memory, which must stay flat as the number of logs grows.
+
+Usage: python benchmarks/bench_review_replay.py [cards] [reviews_per_card]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "replay.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import app  # noqa: E402
+from src.models.user import Card, ReviewLog, User, db  # noqa: E402
+from src.services.review_replay import replay_card_states  # noqa: E402
+
+RATINGS = ("again", "hard", "good", "good", "good", "easy")
+
+
+def seed(cards: int, reviews_per_card: int) -> None:
+    user = User(username="bench", email="bench@example.com", password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    db.session.execute(db.insert(Card), [
+        {"user_id": user.id, "concept_name": f"concept {index}"} for index in range(cards)
+    ])
+    card_ids = db.session.execute(db.select(Card.id)).scalars().all()
+    rng = random.Random(11)
+    start = datetime(2025, 1, 1)
+    for card_id in card_ids:
+        moment = start
+        rows = []
+        for _ in range(reviews_per_card):
+            moment += timedelta(days=rng.randint(1, 20), minutes=rng.randint(0, 600))
+            rows.append({"user_id": user.id, "card_id": card_id, "rating": rng.choice(RATINGS), "reviewed_at": moment})
+        db.session.execute(db.insert(ReviewLog), rows)
+    db.session.commit()
+
+
+def main(cards: int = 10_000, reviews_per_card: int = 20) -> None:
+    with app.app_context():
+        db.create_all()
+        seed(cards, reviews_per_card)
+        started = time.perf_counter()
+        summary = replay_card_states()
+        elapsed = time.perf_counter() - started
+        # Second passage, mesuré à part : tracemalloc ralentit fortement Python.
+        tracemalloc.start()
+        replay_card_states(restart=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"logs: {summary['processed_rows']}, cards: {summary['processed_items']}")
+    print(f"replay: {elapsed:.1f} s, {summary['processed_rows'] / elapsed:.0f} logs/s")
+    print(f"peak traced memory: {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    args = [int(value) for value in sys.argv[1:3]]
+    main(*args)
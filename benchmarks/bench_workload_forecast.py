@@ -0,0 +1,43 @@
+"""Micro-benchmark: Monte Carlo workload forecast for a large collection.
+
+Usage: python benchmarks/bench_workload_forecast.py [cards] [simulations] [days]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.workload_forecast import DEFAULT_REVIEW_SECONDS, simulate_workload  # noqa: E402
+
+
+def main(cards: int = 20_000, simulations: int = 100, days: int = 60) -> None:
+    rng = np.random.default_rng(3)
+    stability = rng.gamma(2.0, 15.0, cards)
+    stability[rng.random(cards) < 0.1] = np.nan  # cartes jamais révisées
+    last_review_day = -rng.integers(0, 60, cards)
+    due_day = last_review_day + np.rint(np.nan_to_num(stability, nan=0.0)).astype(np.int64)
+
+    started = time.perf_counter()
+    reviews, minutes = simulate_workload(
+        stability=stability,
+        difficulty=rng.uniform(2, 9, cards),
+        due_day=due_day,
+        last_review_day=last_review_day,
+        desired_retention=np.full(cards, 0.9),
+        review_seconds=np.full(cards, DEFAULT_REVIEW_SECONDS),
+        days=days,
+        simulations=simulations,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"cards: {cards}, simulations: {simulations}, days: {days}")
+    print(f"simulation: {elapsed * 1000:.0f} ms")
+    print(f"expected reviews on day 0 / day {days - 1}: {reviews[:, 0].mean():.0f} / {reviews[:, -1].mean():.0f}")
+
+
+if __name__ == "__main__":
+    args = [int(value) for value in sys.argv[1:4]]
+    main(*args)
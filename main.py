@@ -32,6 +32,7 @@ from src.routes.mastery import mastery_bp  # noqa: E402
 from src.routes.analysis import analysis_bp  # noqa: E402
 from src.routes.spaced_repetition import spaced_repetition_bp  # noqa: E402
 from src.routes.diagnostic import diagnostic_bp  # noqa: E402
+from src.commands import fsrs_cli  # noqa: E402
 
 # Load environment variables from .env file
 load_dotenv()
@@ -93,12 +94,18 @@ app.register_blueprint(analysis_bp, url_prefix="/api/analysis")
 app.register_blueprint(spaced_repetition_bp, url_prefix="/api/spaced-repetition")
 app.register_blueprint(diagnostic_bp, url_prefix="/api/diagnostic")
 
+# Tâches hors ligne (optimisation FSRS, maintenance) : jamais dans une requête.
+app.cli.add_command(fsrs_cli)
+
 # Database configuration:
 # - DATABASE_URL is preferred for PostgreSQL production deployments.
 # - SQLite is kept as a local development fallback.
 # - Vercel without DATABASE_URL uses ephemeral /tmp SQLite only as a temporary fallback.
 app.config["SQLALCHEMY_DATABASE_URI"] = get_database_uri()
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Âge (jours) au-delà duquel `flask fsrs archive-review-logs` déplace les états
+# d’audit FSRS du journal des revues vers l’archive compressée.
+app.config["REVIEW_LOG_HOT_DAYS"] = int(os.environ.get("REVIEW_LOG_HOT_DAYS", "90"))
 
 # Database initialization.
 # Flask-Migrate/Alembic is the recommended schema-management path.
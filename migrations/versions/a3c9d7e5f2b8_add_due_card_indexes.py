@@ -0,0 +1,28 @@
+"""Add composite indexes serving due-card queries per learner and domain.
+
+Revision ID: a3c9d7e5f2b8
+Revises: f5a1c8e3b7d2
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "a3c9d7e5f2b8"
+down_revision = "f5a1c8e3b7d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_card_user_id_next_review", "card", ["user_id", "next_review"])
+    op.create_index(
+        "ix_card_user_id_learning_domain_next_review",
+        "card",
+        ["user_id", "learning_domain", "next_review"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_card_user_id_learning_domain_next_review", table_name="card")
+    op.drop_index("ix_card_user_id_next_review", table_name="card")
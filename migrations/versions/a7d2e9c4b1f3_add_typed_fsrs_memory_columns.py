@@ -0,0 +1,118 @@
+"""Add typed FSRS memory-state columns to cards.
+
+Revision ID: a7d2e9c4b1f3
+Revises: c5e8f1a2b4d6
+Create Date: 2026-10-18
+"""
+
+import json
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a7d2e9c4b1f3"
+down_revision = "c5e8f1a2b4d6"
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 1000
+
+card_table = sa.table(
+    "card",
+    sa.column("id", sa.Integer),
+    sa.column("scheduler_state", sa.Text),
+    sa.column("fsrs_state", sa.Integer),
+    sa.column("fsrs_step", sa.Integer),
+    sa.column("fsrs_stability", sa.Float),
+    sa.column("fsrs_difficulty", sa.Float),
+    sa.column("fsrs_last_review", sa.DateTime),
+)
+
+
+def _naive_utc(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _memory_columns(scheduler_state):
+    try:
+        payload = json.loads(scheduler_state)
+        return {
+            "fsrs_state": int(payload["state"]),
+            "fsrs_step": payload.get("step"),
+            "fsrs_stability": float(payload["stability"]) if payload.get("stability") else None,
+            "fsrs_difficulty": float(payload["difficulty"]) if payload.get("difficulty") else None,
+            "fsrs_last_review": _naive_utc(payload.get("last_review")),
+        }
+    except (TypeError, ValueError, KeyError):
+        # Un état illisible est traité comme une carte nouvelle, comme au runtime.
+        return None
+
+
+def _backfill_memory_columns():
+    """Copy JSON states into the typed columns, one keyset chunk at a time."""
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(card_table.c.id, card_table.c.scheduler_state)
+            .where(
+                card_table.c.id > last_id,
+                card_table.c.scheduler_state.is_not(None),
+                card_table.c.scheduler_state != "",
+            )
+            .order_by(card_table.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for card_id, scheduler_state in rows:
+            columns = _memory_columns(scheduler_state)
+            if columns:
+                updates.append({"card_id": card_id, **columns})
+        if updates:
+            connection.execute(
+                card_table.update()
+                .where(card_table.c.id == sa.bindparam("card_id"))
+                .values(
+                    fsrs_state=sa.bindparam("fsrs_state"),
+                    fsrs_step=sa.bindparam("fsrs_step"),
+                    fsrs_stability=sa.bindparam("fsrs_stability"),
+                    fsrs_difficulty=sa.bindparam("fsrs_difficulty"),
+                    fsrs_last_review=sa.bindparam("fsrs_last_review"),
+                ),
+                updates,
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.add_column("card", sa.Column("fsrs_state", sa.Integer(), nullable=True))
+    op.add_column("card", sa.Column("fsrs_step", sa.Integer(), nullable=True))
+    op.add_column("card", sa.Column("fsrs_stability", sa.Float(), nullable=True))
+    op.add_column("card", sa.Column("fsrs_difficulty", sa.Float(), nullable=True))
+    op.add_column("card", sa.Column("fsrs_last_review", sa.DateTime(), nullable=True))
+    _backfill_memory_columns()
+    op.create_index("ix_card_user_id_fsrs_stability", "card", ["user_id", "fsrs_stability"])
+    op.create_index("ix_card_user_id_fsrs_difficulty", "card", ["user_id", "fsrs_difficulty"])
+    op.create_index("ix_card_user_id_fsrs_state", "card", ["user_id", "fsrs_state"])
+    op.create_index("ix_card_fsrs_last_review", "card", ["fsrs_last_review"])
+
+
+def downgrade():
+    op.drop_index("ix_card_fsrs_last_review", table_name="card")
+    op.drop_index("ix_card_user_id_fsrs_state", table_name="card")
+    op.drop_index("ix_card_user_id_fsrs_difficulty", table_name="card")
+    op.drop_index("ix_card_user_id_fsrs_stability", table_name="card")
+    op.drop_column("card", "fsrs_last_review")
+    op.drop_column("card", "fsrs_difficulty")
+    op.drop_column("card", "fsrs_stability")
+    op.drop_column("card", "fsrs_step")
+    op.drop_column("card", "fsrs_state")
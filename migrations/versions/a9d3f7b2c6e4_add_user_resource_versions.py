@@ -0,0 +1,26 @@
+"""Add per-user version counters backing conditional GET ETags.
+
+Revision ID: a9d3f7b2c6e4
+Revises: f2c6a9d4e7b1
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a9d3f7b2c6e4"
+down_revision = "f2c6a9d4e7b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("user", sa.Column("settings_version", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("user", sa.Column("subjects_version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("subjects_version")
+        batch_op.drop_column("settings_version")
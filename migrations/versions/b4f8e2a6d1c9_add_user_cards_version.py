@@ -0,0 +1,24 @@
+"""Add a per-user card schedule version validating process caches.
+
+Revision ID: b4f8e2a6d1c9
+Revises: e7b2d4a9c3f1
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b4f8e2a6d1c9"
+down_revision = "e7b2d4a9c3f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("user", sa.Column("cards_version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("cards_version")
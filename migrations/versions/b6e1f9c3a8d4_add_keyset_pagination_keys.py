@@ -0,0 +1,26 @@
+"""Add the due keys of the review queue and the card browsing index.
+
+Revision ID: b6e1f9c3a8d4
+Revises: d4f8b2a6c1e9
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b6e1f9c3a8d4"
+down_revision = "d4f8b2a6c1e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Les files existantes, sans clés, sont reconstruites à la requête suivante.
+    op.add_column("daily_review_queue", sa.Column("due_keys", sa.LargeBinary(), nullable=True))
+    op.create_index("ix_card_user_id_created_at_id", "card", ["user_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_card_user_id_created_at_id", table_name="card")
+    op.drop_column("daily_review_queue", "due_keys")
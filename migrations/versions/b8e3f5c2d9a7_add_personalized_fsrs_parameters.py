@@ -0,0 +1,31 @@
+"""Add consented, offline-fitted FSRS parameters to adaptive profiles.
+
+Revision ID: b8e3f5c2d9a7
+Revises: a7d2e9c4b1f3
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b8e3f5c2d9a7"
+down_revision = "a7d2e9c4b1f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("adaptive_learning_profile", sa.Column(
+        "personalized_parameters_enabled", sa.Boolean(), nullable=False, server_default=sa.false(),
+    ))
+    op.add_column("adaptive_learning_profile", sa.Column("fsrs_parameters", sa.Text(), nullable=True))
+    op.add_column("adaptive_learning_profile", sa.Column("parameters_fitted_at", sa.DateTime(), nullable=True))
+    op.add_column("adaptive_learning_profile", sa.Column("parameters_review_count", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("adaptive_learning_profile", "parameters_review_count")
+    op.drop_column("adaptive_learning_profile", "parameters_fitted_at")
+    op.drop_column("adaptive_learning_profile", "fsrs_parameters")
+    op.drop_column("adaptive_learning_profile", "personalized_parameters_enabled")
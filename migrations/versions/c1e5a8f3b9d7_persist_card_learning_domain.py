@@ -0,0 +1,64 @@
+"""Persist the resolved learning domain on every card.
+
+Revision ID: c1e5a8f3b9d7
+Revises: a9d3f7b2c6e4
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c1e5a8f3b9d7"
+down_revision = "a9d3f7b2c6e4"
+branch_labels = None
+depends_on = None
+
+# Domaines connus à la date de la migration (`DOMAIN_OPTIONS`).
+DOMAINS = ("language", "computing", "productivity", "data", "infrastructure", "security", "general")
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    connection = op.get_bind()
+    card = sa.table(
+        "card",
+        sa.column("id", sa.Integer),
+        sa.column("subject_id", sa.Integer),
+        sa.column("learning_domain", sa.String),
+    )
+    subject = sa.table("subject", sa.column("id", sa.Integer), sa.column("domain", sa.String))
+    subject_domain = (
+        sa.select(subject.c.domain)
+        .where(subject.c.id == card.c.subject_id, subject.c.domain.in_(DOMAINS))
+        .scalar_subquery()
+    )
+    unresolved = sa.or_(card.c.learning_domain.is_(None), card.c.learning_domain.not_in(DOMAINS))
+
+    # Fenêtres d’identifiants : chaque UPDATE reste court, même sur une grande table.
+    last_id = 0
+    max_id = connection.execute(sa.select(sa.func.max(card.c.id))).scalar() or 0
+    while last_id < max_id:
+        connection.execute(
+            card.update()
+            .where(card.c.id > last_id, card.c.id <= last_id + BATCH_SIZE, unresolved)
+            .values(learning_domain=sa.func.coalesce(subject_domain, "general"))
+        )
+        last_id += BATCH_SIZE
+    with op.batch_alter_table("card") as batch_op:
+        batch_op.alter_column(
+            "learning_domain",
+            existing_type=sa.String(length=50),
+            nullable=False,
+            server_default="general",
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("card") as batch_op:
+        batch_op.alter_column(
+            "learning_domain",
+            existing_type=sa.String(length=50),
+            nullable=True,
+            server_default=None,
+        )
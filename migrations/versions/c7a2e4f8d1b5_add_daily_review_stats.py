@@ -0,0 +1,36 @@
+"""Add the per-day review rollup read by analytics.
+
+Revision ID: c7a2e4f8d1b5
+Revises: b6e1f9c3a8d4
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c7a2e4f8d1b5"
+down_revision = "b6e1f9c3a8d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "daily_review_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("domain", sa.String(length=50), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("again_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("hard_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("good_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("easy_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("response_time_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("new_card_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("user_id", "domain", "day", name="uq_daily_review_stats_user_domain_day"),
+    )
+
+
+def downgrade():
+    op.drop_table("daily_review_stats")
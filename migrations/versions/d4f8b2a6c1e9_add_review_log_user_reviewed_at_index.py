@@ -0,0 +1,22 @@
+"""Add the (user_id, reviewed_at) index behind per-learner review analytics.
+
+Revision ID: d4f8b2a6c1e9
+Revises: a3c9d7e5f2b8
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "d4f8b2a6c1e9"
+down_revision = "a3c9d7e5f2b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_review_log_user_id_reviewed_at", "review_log", ["user_id", "reviewed_at"])
+
+
+def downgrade():
+    op.drop_index("ix_review_log_user_id_reviewed_at", table_name="review_log")
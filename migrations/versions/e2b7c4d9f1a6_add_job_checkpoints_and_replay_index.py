@@ -0,0 +1,35 @@
+"""Add resumable job checkpoints and the review-log replay index.
+
+Revision ID: e2b7c4d9f1a6
+Revises: b8e3f5c2d9a7
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e2b7c4d9f1a6"
+down_revision = "b8e3f5c2d9a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job_checkpoint",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("signature", sa.String(length=200), nullable=False, server_default=""),
+        sa.Column("cursor", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed_items", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_review_log_card_id_reviewed_at", "review_log", ["card_id", "reviewed_at"])
+
+
+def downgrade():
+    op.drop_index("ix_review_log_card_id_reviewed_at", table_name="review_log")
+    op.drop_table("job_checkpoint")
@@ -0,0 +1,62 @@
+"""Record whether a card's learning domain is inherited from its subject.
+
+Revision ID: e7b2d4a9c3f1
+Revises: c1e5a8f3b9d7
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e7b2d4a9c3f1"
+down_revision = "c1e5a8f3b9d7"
+branch_labels = None
+depends_on = None
+
+# Domaines connus à la date de la migration (`DOMAIN_OPTIONS`).
+DOMAINS = ("language", "computing", "productivity", "data", "infrastructure", "security", "general")
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    with op.batch_alter_table("card") as batch_op:
+        batch_op.add_column(sa.Column("domain_inherited", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    connection = op.get_bind()
+    card = sa.table(
+        "card",
+        sa.column("id", sa.Integer),
+        sa.column("subject_id", sa.Integer),
+        sa.column("learning_domain", sa.String),
+        sa.column("domain_inherited", sa.Boolean),
+    )
+    subject = sa.table("subject", sa.column("id", sa.Integer), sa.column("domain", sa.String))
+    subject_domain = sa.func.coalesce(
+        sa.select(subject.c.domain)
+        .where(subject.c.id == card.c.subject_id, subject.c.domain.in_(DOMAINS))
+        .scalar_subquery(),
+        "general",
+    )
+
+    # L’origine des domaines déjà résolus est perdue : une carte rattachée à un
+    # parcours dont elle porte le domaine est considérée comme héritière.
+    last_id = 0
+    max_id = connection.execute(sa.select(sa.func.max(card.c.id))).scalar() or 0
+    while last_id < max_id:
+        connection.execute(
+            card.update()
+            .where(
+                card.c.id > last_id,
+                card.c.id <= last_id + BATCH_SIZE,
+                card.c.subject_id.is_not(None),
+                card.c.learning_domain == subject_domain,
+            )
+            .values(domain_inherited=True)
+        )
+        last_id += BATCH_SIZE
+
+
+def downgrade():
+    with op.batch_alter_table("card") as batch_op:
+        batch_op.drop_column("domain_inherited")
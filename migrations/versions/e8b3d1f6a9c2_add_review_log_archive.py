@@ -0,0 +1,29 @@
+"""Add the compressed cold archive of review-log audit states.
+
+Revision ID: e8b3d1f6a9c2
+Revises: c7a2e4f8d1b5
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e8b3d1f6a9c2"
+down_revision = "c7a2e4f8d1b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "review_log_archive",
+        sa.Column("review_log_id", sa.Integer(), sa.ForeignKey("review_log.id"), primary_key=True),
+        sa.Column("states_blob", sa.LargeBinary(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    # Les états archivés doivent d’abord être restaurés (`flask fsrs archive-review-logs --restore`).
+    op.drop_table("review_log_archive")
@@ -0,0 +1,42 @@
+"""Chain review logs per card so that each FSRS state is stored once.
+
+Revision ID: f2c6a9d4e7b1
+Revises: e8b3d1f6a9c2
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f2c6a9d4e7b1"
+down_revision = "e8b3d1f6a9c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mode batch : SQLite ne sait pas ajouter une contrainte par ALTER TABLE.
+    with op.batch_alter_table("review_log") as batch_op:
+        batch_op.add_column(sa.Column("previous_log_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_review_log_previous_log_id", "review_log", ["previous_log_id"], ["id"])
+
+
+def downgrade():
+    # Un maillon archivé n’a plus de `next_state` dans la table chaude : la
+    # recopie ci-dessous écrirait NULL. Les archives doivent être restaurées avant.
+    archived = op.get_bind().execute(sa.text("SELECT count(*) FROM review_log_archive")).scalar()
+    if archived:
+        raise RuntimeError(
+            f"{archived} review logs have archived states; run `flask fsrs archive-review-logs --restore` "
+            "before downgrading, so that chained previous states can be rebuilt."
+        )
+    # Les états dédupliqués sont recopiés avant de supprimer la référence.
+    op.execute(
+        "UPDATE review_log SET previous_state = "
+        "(SELECT previous.next_state FROM review_log AS previous WHERE previous.id = review_log.previous_log_id) "
+        "WHERE previous_state IS NULL AND previous_log_id IS NOT NULL"
+    )
+    with op.batch_alter_table("review_log") as batch_op:
+        batch_op.drop_constraint("fk_review_log_previous_log_id", type_="foreignkey")
+        batch_op.drop_column("previous_log_id")
@@ -0,0 +1,36 @@
+"""Add the materialized daily review queue.
+
+Revision ID: f5a1c8e3b7d2
+Revises: e2b7c4d9f1a6
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f5a1c8e3b7d2"
+down_revision = "e2b7c4d9f1a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "daily_review_queue",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("domain", sa.String(length=50), nullable=False, server_default=""),
+        sa.Column("queue_date", sa.Date(), nullable=False),
+        sa.Column("card_ids", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("built_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("user_id", "domain", name="uq_daily_review_queue_user_domain"),
+    )
+    op.create_index("ix_daily_review_queue_user_id", "daily_review_queue", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_daily_review_queue_user_id", table_name="daily_review_queue")
+    op.drop_table("daily_review_queue")
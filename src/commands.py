@@ -0,0 +1,152 @@
+"""Commandes d’exploitation hors ligne (`flask --app main fsrs ...`)."""
+
+import contextlib
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from src.services.adaptive_learning import ADAPTIVE_DOMAINS
+from src.services.deck_import import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, DeckImportError, guess_import_format, import_deck
+from src.services.parameter_optimizer import (
+    MIN_NEW_REVIEWS_FOR_REFIT,
+    MIN_REVIEWS_FOR_OPTIMIZATION,
+    OptimizerUnavailable,
+    default_worker_count,
+    optimize_profiles,
+)
+from src.services.review_archive import DEFAULT_ARCHIVE_BATCH_SIZE, archive_review_logs, restore_review_logs
+from src.services.review_export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_review_history
+from src.services.review_replay import DEFAULT_REPLAY_BATCH_SIZE, replay_card_states
+from src.services.review_stats import DEFAULT_BACKFILL_BATCH_SIZE, backfill_review_stats
+from src.services.sm2_migration import DEFAULT_MIGRATION_BATCH_SIZE, migrate_sm2_cards
+
+fsrs_cli = AppGroup("fsrs", help="Offline FSRS maintenance jobs.")
+
+
+@fsrs_cli.command("optimize-parameters")
+@click.option("--workers", type=click.IntRange(min=1), default=None,
+              help=f"Worker processes (default: {default_worker_count()}).")
+@click.option("--min-reviews", type=click.IntRange(min=1), default=MIN_REVIEWS_FOR_OPTIMIZATION, show_default=True)
+@click.option("--min-new-reviews", type=click.IntRange(min=0), default=MIN_NEW_REVIEWS_FOR_REFIT, show_default=True,
+              help="New reviews required before an already fitted profile is refitted.")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Maximum profiles fitted in this run.")
+def optimize_parameters_command(workers, min_reviews, min_new_reviews, limit):
+    """Fit personal FSRS weights for consenting learners (resumable)."""
+    try:
+        summary = optimize_profiles(workers, min_reviews, min_new_reviews, limit)
+    except OptimizerUnavailable as exc:
+        raise click.ClickException(str(exc)) from exc
+    click.echo(
+        f"{summary['fitted']} fitted, {summary['skipped']} skipped, {summary['failed']} failed "
+        f"out of {summary['eligible']} eligible profiles in {summary['duration_seconds']} s"
+    )
+
+
+@fsrs_cli.command("replay-states")
+@click.option("--batch-size", type=click.IntRange(min=1), default=DEFAULT_REPLAY_BATCH_SIZE, show_default=True,
+              help="Cards rewritten per transaction.")
+@click.option("--user-id", type=int, default=None, help="Replay one learner only.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first card.")
+def replay_states_command(batch_size, user_id, restart):
+    """Rebuild card states from the review-log trail (resumable)."""
+    summary = replay_card_states(batch_size=batch_size, restart=restart, user_id=user_id)
+    click.echo(
+        f"{summary['cards_this_run']} cards replayed from {summary['logs_this_run']} logs "
+        f"in {summary['duration_seconds']} s (total: {summary['processed_items']} cards, "
+        f"checkpoint at card {summary['cursor']})"
+    )
+
+
+@fsrs_cli.command("migrate-sm2")
+@click.option("--batch-size", type=click.IntRange(min=1), default=DEFAULT_MIGRATION_BATCH_SIZE, show_default=True,
+              help="Cards converted per transaction.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and rescan from the first card.")
+def migrate_sm2_command(batch_size, restart):
+    """Convert legacy SM-2 cards to FSRS (resumable, safe on a live database)."""
+    summary = migrate_sm2_cards(batch_size=batch_size, restart=restart)
+    click.echo(
+        f"{summary['converted']} cards converted, {summary['skipped']} already converted by a review, "
+        f"in {summary['duration_seconds']} s ({summary['cards_per_second']} cards/s)"
+    )
+
+
+@fsrs_cli.command("backfill-review-stats")
+@click.option("--batch-size", type=click.IntRange(min=1), default=DEFAULT_BACKFILL_BATCH_SIZE, show_default=True,
+              help="Learners rebuilt per transaction.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and rebuild every learner.")
+def backfill_review_stats_command(batch_size, restart):
+    """Rebuild the daily review rollups from the review log (resumable)."""
+    summary = backfill_review_stats(batch_size=batch_size, restart=restart)
+    click.echo(
+        f"{summary['rows_this_run']} daily rows rebuilt for {summary['users_this_run']} learners "
+        f"in {summary['duration_seconds']} s (checkpoint at user {summary['cursor']})"
+    )
+
+
+@fsrs_cli.command("archive-review-logs")
+@click.option("--older-than-days", type=click.IntRange(min=0), default=None,
+              help="Archive logs older than this (default: REVIEW_LOG_HOT_DAYS).")
+@click.option("--batch-size", type=click.IntRange(min=1), default=DEFAULT_ARCHIVE_BATCH_SIZE, show_default=True,
+              help="Logs archived per transaction.")
+@click.option("--restore", is_flag=True, help="Move every archived state back into review_log.")
+def archive_review_logs_command(older_than_days, batch_size, restore):
+    """Compress old review-log audit states into the cold archive (resumable)."""
+    if restore:
+        click.echo(f"{restore_review_logs(batch_size)} review logs restored")
+        return
+    if older_than_days is None:
+        older_than_days = current_app.config["REVIEW_LOG_HOT_DAYS"]
+    summary = archive_review_logs(older_than_days, batch_size)
+    click.echo(
+        f"{summary['archived']} review logs older than {summary['cutoff']} archived "
+        f"({summary['raw_bytes']} bytes of states stored in {summary['compressed_bytes']}) "
+        f"in {summary['duration_seconds']} s"
+    )
+
+
+@fsrs_cli.command("export-reviews")
+@click.option("--user-id", type=int, required=True, help="Learner whose review history is exported.")
+@click.option("--format", "export_format", type=click.Choice(EXPORT_FORMATS), default="ndjson", show_default=True,
+              help="NDJSON records, or CSV in the FSRS optimizer revlog format.")
+@click.option("--domain", type=click.Choice(ADAPTIVE_DOMAINS), default=None, help="Export one domain only.")
+@click.option("--include-states", is_flag=True, help="Add the FSRS audit states to NDJSON records.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=EXPORT_CHUNK_SIZE, show_default=True,
+              help="Review logs read per batch.")
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Destination file (default: stdout).")
+def export_reviews_command(user_id, export_format, domain, include_states, batch_size, output):
+    """Stream a learner’s full review history (constant memory)."""
+    for chunk in export_review_history(user_id, export_format, domain, include_states, batch_size):
+        output.write(chunk)
+
+
+@fsrs_cli.command("import-deck")
+@click.argument("deck_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user-id", type=int, required=True, help="Learner who receives the cards.")
+@click.option("--format", "import_format", type=click.Choice(IMPORT_FORMATS), default=None,
+              help="Deck format (default: from the file extension, .txt being an Anki export).")
+@click.option("--revlog", "revlog_path", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Review history in the FSRS optimizer revlog CSV format, replayed after the import.")
+@click.option("--subject-id", type=int, default=None, help="Attach the cards to this subject.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=IMPORT_CHUNK_SIZE, show_default=True,
+              help="Rows validated and inserted per batch.")
+def import_deck_command(deck_path, user_id, import_format, revlog_path, subject_id, batch_size):
+    """Bulk-import a CSV, TSV or Anki text deck in one transaction."""
+    with contextlib.ExitStack() as files:
+        deck = files.enter_context(open(deck_path, encoding="utf-8-sig", newline=""))
+        revlog = files.enter_context(open(revlog_path, encoding="utf-8-sig", newline="")) if revlog_path else None
+        try:
+            summary = import_deck(
+                user_id, deck, import_format or guess_import_format(deck_path), revlog, subject_id, batch_size,
+                progress=lambda stage, count: click.echo(f"{stage}: {count}", err=True),
+            )
+        except DeckImportError as exc:
+            raise click.ClickException(str(exc)) from exc
+    for error in summary["errors"]:
+        click.echo(f"{error['file']} line {error['line']}: {error['message']}", err=True)
+    click.echo(
+        f"{summary['cards_imported']} cards imported ({summary['duplicates_skipped']} duplicates, "
+        f"{summary['invalid_rows']} invalid rows), {summary['reviews_imported']} reviews imported "
+        f"({summary['reviews_skipped']} skipped), {summary['cards_replayed']} cards replayed "
+        f"in {summary['duration_seconds']} s"
+    )
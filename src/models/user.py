@@ -7,6 +7,9 @@ Database Models for Euloge Learning Platform
 @version: 2.1.0
 """
 
+import json
+import zlib
+
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
@@ -22,6 +25,11 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # Compromis explicite entre rétention visée et volume quotidien de révisions.
     desired_retention = db.Column(db.Float, default=0.90)
+    # Compteurs de version des ressources peu changeantes, exposés en ETag.
+    settings_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    subjects_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Échéancier des cartes (création, revue, import) : valide les caches de processus.
+    cards_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     cards = db.relationship("Card", backref="owner", lazy=True)
@@ -48,6 +56,12 @@ class AdaptiveLearningProfile(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     domain = db.Column(db.String(50), nullable=False)
     desired_retention = db.Column(db.Float, nullable=False, default=0.90)
+    # Poids FSRS personnels : ajustés hors ligne, et seulement avec l’accord
+    # explicite de l’apprenant. Le retrait du consentement efface les poids.
+    personalized_parameters_enabled = db.Column(db.Boolean, nullable=False, default=False)
+    fsrs_parameters = db.Column(db.Text, nullable=True)  # JSON list of FSRS weights
+    parameters_fitted_at = db.Column(db.DateTime, nullable=True)
+    parameters_review_count = db.Column(db.Integer, nullable=True)  # Reviews used by the last fit
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -58,6 +72,10 @@ class AdaptiveLearningProfile(db.Model):
             "id": self.id,
             "domain": self.domain,
             "desired_retention": self.desired_retention,
+            "personalized_parameters_enabled": bool(self.personalized_parameters_enabled),
+            "personalized_parameters_active": bool(self.personalized_parameters_enabled and self.fsrs_parameters),
+            "parameters_fitted_at": self.parameters_fitted_at.isoformat() if self.parameters_fitted_at else None,
+            "parameters_review_count": self.parameters_review_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -142,10 +160,23 @@ class Concept(db.Model):
 
 class Card(db.Model):
     """A spaced repetition flashcard."""
+
+    __table_args__ = (
+        db.Index("ix_card_user_id_fsrs_stability", "user_id", "fsrs_stability"),
+        db.Index("ix_card_user_id_fsrs_difficulty", "user_id", "fsrs_difficulty"),
+        db.Index("ix_card_user_id_fsrs_state", "user_id", "fsrs_state"),
+        db.Index("ix_card_user_id_next_review", "user_id", "next_review"),
+        db.Index("ix_card_user_id_learning_domain_next_review", "user_id", "learning_domain", "next_review"),
+        db.Index("ix_card_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=True)
-    learning_domain = db.Column(db.String(50), nullable=True)
+    # Domaine résolu à l’écriture (demandé, sinon celui du parcours, sinon général).
+    learning_domain = db.Column(db.String(50), nullable=False, default="general", server_default="general")
+    # Vrai si le domaine vient du parcours (ou du défaut) : il suit alors le parcours.
+    domain_inherited = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     concept_name = db.Column(db.String(200), nullable=False)
     front_content = db.Column(db.Text, default="")  # Question / front side
     back_content = db.Column(db.Text, default="")   # Answer / back side
@@ -166,6 +197,13 @@ class Card(db.Model):
     scheduler_type = db.Column(db.String(30), default="sm2")
     scheduler_state = db.Column(db.Text, default="")
     scheduler_version = db.Column(db.String(30), default="legacy")
+    # Mémoire FSRS typée : source de vérité pour le planificateur et pour les
+    # filtres SQL. `scheduler_state` reste écrit pour l’audit des revues.
+    fsrs_state = db.Column(db.Integer, nullable=True)  # 1 learning, 2 review, 3 relearning
+    fsrs_step = db.Column(db.Integer, nullable=True)
+    fsrs_stability = db.Column(db.Float, nullable=True)  # days
+    fsrs_difficulty = db.Column(db.Float, nullable=True)  # 1.0 - 10.0
+    fsrs_last_review = db.Column(db.DateTime, nullable=True, index=True)
 
     # Scheduling
     last_reviewed = db.Column(db.DateTime, nullable=True)
@@ -196,37 +234,54 @@ class Card(db.Model):
     def is_due(self):
         return self.next_review is not None and self.next_review <= datetime.utcnow()
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "concept_name": self.concept_name,
-            "learning_domain": self.learning_domain or (self.subject.domain if self.subject else "general"),
-            "front_content": self.front_content,
-            "back_content": self.back_content,
-            "difficulty": self.difficulty,
-            "priority": self.priority,
-            "tags": self.tags.split(",") if self.tags else [],
-            "interval": self.interval,
-            "interval_minutes": self.interval_minutes,
-            "easiness_factor": self.easiness_factor,
-            "review_count": self.review_count,
-            "success_rate": round(self.success_rate, 3),
-            "average_response_time": round(self.average_response_time, 1),
-            "scheduler_type": self.scheduler_type,
-            "scheduler_version": self.scheduler_version,
-            "last_reviewed": self.last_reviewed.isoformat() if self.last_reviewed else None,
-            "next_review": self.next_review.isoformat() if self.next_review else None,
-            "days_overdue": self.days_overdue,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    # Vue compacte d’une session de révision : ce qu’il faut pour afficher et noter.
+    COMPACT_FIELDS = ("id", "front_content", "back_content", "learning_domain")
+
+    def to_dict(self, fields=None):
+        """Serialize the card; `fields` restricts the output to keys of `CARD_SERIALIZERS`."""
+        names = CARD_SERIALIZERS if fields is None else fields
+        return {name: CARD_SERIALIZERS[name](self) for name in names}
 
     def __repr__(self):
         return f"<Card {self.concept_name}>"
 
 
+# Un sérialiseur par champ : seuls les champs demandés sont calculés, si bien
+# qu’une vue sans `days_overdue` ne lit pas l’horloge.
+CARD_SERIALIZERS = {
+    "id": lambda card: card.id,
+    "concept_name": lambda card: card.concept_name,
+    "learning_domain": lambda card: card.learning_domain,
+    "front_content": lambda card: card.front_content,
+    "back_content": lambda card: card.back_content,
+    "difficulty": lambda card: card.difficulty,
+    "priority": lambda card: card.priority,
+    "tags": lambda card: card.tags.split(",") if card.tags else [],
+    "interval": lambda card: card.interval,
+    "interval_minutes": lambda card: card.interval_minutes,
+    "easiness_factor": lambda card: card.easiness_factor,
+    "review_count": lambda card: card.review_count,
+    "success_rate": lambda card: round(card.success_rate, 3),
+    "average_response_time": lambda card: round(card.average_response_time, 1),
+    "scheduler_type": lambda card: card.scheduler_type,
+    "scheduler_version": lambda card: card.scheduler_version,
+    "last_reviewed": lambda card: card.last_reviewed.isoformat() if card.last_reviewed else None,
+    "next_review": lambda card: card.next_review.isoformat() if card.next_review else None,
+    "days_overdue": lambda card: card.days_overdue,
+    "created_at": lambda card: card.created_at.isoformat() if card.created_at else None,
+}
+
+
 class ReviewLog(db.Model):
     """Immutable audit trail for one spaced-repetition review."""
 
+    __table_args__ = (
+        # Ordre de rejeu des états FSRS : (carte, date de revue).
+        db.Index("ix_review_log_card_id_reviewed_at", "card_id", "reviewed_at"),
+        # Fenêtres d’analyse d’un apprenant.
+        db.Index("ix_review_log_user_id_reviewed_at", "user_id", "reviewed_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     card_id = db.Column(db.Integer, db.ForeignKey("card.id"), nullable=False, index=True)
@@ -238,13 +293,39 @@ class ReviewLog(db.Model):
     scheduled_days = db.Column(db.Integer, default=0)
     scheduled_minutes = db.Column(db.Integer, nullable=True)
     scheduler_version = db.Column(db.String(30), default="fsrs-6")
-    previous_state = db.Column(db.Text, default="")
+    # États d’audit FSRS (JSON). Ils sont déplacés, compressés, vers
+    # `ReviewLogArchive` au-delà de REVIEW_LOG_HOT_DAYS et valent alors NULL ;
+    # `previous_state` vaut aussi NULL lorsqu’il est identique au `next_state`
+    # de `previous_log_id` (chaîne par carte, chaque état stocké une fois).
+    # Lire `audit_states` plutôt que ces colonnes.
+    previous_log_id = db.Column(
+        db.Integer, db.ForeignKey("review_log.id", name="fk_review_log_previous_log_id"), nullable=True,
+    )
+    previous_state = db.Column(db.Text, nullable=True)
     review_log = db.Column(db.Text, default="")
     next_state = db.Column(db.Text, default="")
     reviewed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    archive = db.relationship("ReviewLogArchive", uselist=False, lazy="select", cascade="all, delete-orphan")
+    previous_log = db.relationship("ReviewLog", remote_side=[id], uselist=False, lazy="select")
 
-    def to_dict(self):
-        return {
+    @property
+    def audit_states(self):
+        """Full FSRS audit record, read from the archive and the card chain as needed."""
+        if self.next_state is None and self.archive is not None:
+            states = self.archive.states()
+        else:
+            states = {
+                "previous_state": self.previous_state,
+                "review_log": self.review_log,
+                "next_state": self.next_state,
+            }
+        if states["previous_state"] is None and self.previous_log is not None:
+            # `next_state` est toujours conservé : la résolution s’arrête au maillon précédent.
+            states["previous_state"] = self.previous_log.audit_states["next_state"]
+        return states
+
+    def to_dict(self, include_states=False):
+        data = {
             "id": self.id,
             "card_id": self.card_id,
             "rating": self.rating,
@@ -255,6 +336,28 @@ class ReviewLog(db.Model):
             "scheduler_version": self.scheduler_version,
             "reviewed_at": self.reviewed_at.isoformat() if self.reviewed_at else None,
         }
+        if include_states:
+            data.update(self.audit_states)
+        return data
+
+
+class ReviewLogArchive(db.Model):
+    """Cold, zlib-compressed audit states of an old review log."""
+
+    review_log_id = db.Column(db.Integer, db.ForeignKey("review_log.id"), primary_key=True)
+    states_blob = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def compress(states):
+        return zlib.compress(json.dumps(states, separators=(",", ":")).encode())
+
+    @staticmethod
+    def decompress(blob):
+        return json.loads(zlib.decompress(blob))
+
+    def states(self):
+        return self.decompress(self.states_blob)
 
 
 class DiagnosticAttempt(db.Model):
@@ -395,3 +498,77 @@ class StudySession(db.Model):
 
     def __repr__(self):
         return f"<StudySession {self.session_type} @ {self.started_at}>"
+
+
+class DailyReviewQueue(db.Model):
+    """Materialized review order of one learner for one day and domain scope."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    domain = db.Column(db.String(50), nullable=False, default="")  # "" = every domain
+    queue_date = db.Column(db.Date, nullable=False)
+    # Identifiants de cartes dans l’ordre de révision, en entiers 32 bits
+    # petit-boutistes : une page se lit sans décoder toute la file.
+    card_ids = db.Column(db.LargeBinary, nullable=False, default=b"")
+    # Échéances alignées sur `card_ids` (microsecondes UTC, entiers 64 bits) :
+    # clés de la pagination par curseur.
+    due_keys = db.Column(db.LargeBinary, nullable=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint("user_id", "domain", name="uq_daily_review_queue_user_domain"),)
+
+
+class DailyReviewStats(db.Model):
+    """Per-learner, per-domain, per-day rollup of the review log.
+
+    Maintained in the transaction that writes the reviews, so analytics read
+    one row per day instead of one row per review.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    domain = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    again_count = db.Column(db.Integer, nullable=False, default=0)
+    hard_count = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    easy_count = db.Column(db.Integer, nullable=False, default=0)
+    response_time_sum = db.Column(db.Float, nullable=False, default=0.0)  # seconds
+    new_card_count = db.Column(db.Integer, nullable=False, default=0)  # first reviews of a card
+
+    __table_args__ = (db.UniqueConstraint("user_id", "domain", "day", name="uq_daily_review_stats_user_domain_day"),)
+
+    @property
+    def review_count(self):
+        return self.again_count + self.hard_count + self.good_count + self.easy_count
+
+
+class JobCheckpoint(db.Model):
+    """Resumable progress of a long-running offline job.
+
+    `signature` identifies the configuration the progress belongs to (FSRS
+    version, weights...): a different signature restarts the job from zero.
+    """
+
+    name = db.Column(db.String(100), primary_key=True)
+    signature = db.Column(db.String(200), nullable=False, default="")
+    cursor = db.Column(db.Integer, nullable=False, default=0)  # Last processed key
+    processed_items = db.Column(db.Integer, nullable=False, default=0)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "signature": self.signature,
+            "cursor": self.cursor,
+            "processed_items": self.processed_items,
+            "processed_rows": self.processed_rows,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+        }
@@ -15,6 +15,7 @@ from src.utils.document_extraction import extract_text_from_document
 from src.utils.nlp import extract_concepts, analyze_sentiment
 from src.models.user import db, Subject, Concept, Card, StudySession
 from src.services.learning_pipeline import build_learning_pipeline
+from src.services.review_queue import invalidate_review_queue
 
 
 analysis_bp = Blueprint("analysis", __name__)
@@ -414,7 +415,8 @@ def generate_adaptive_plan():
         # Planning hebdomadaire basé sur le chronotype
         plan["weekly_schedule"] = generate_weekly_schedule(chronotype, daily_study_hours)
 
-        # Validation de la transaction DB
+        # Validation de la transaction DB (les nouvelles cartes périment la file du jour)
+        invalidate_review_queue(user_id)
         db.session.commit()
 
         return jsonify(
@@ -607,6 +609,7 @@ def update_progress():
                 card.total_response_time += (time_spent * 60)
                 card.last_reviewed = datetime.utcnow()
                 card.next_review = datetime.utcnow() + timedelta(days=new_interval)
+                invalidate_review_queue(user_id)
 
             db.session.commit()
 
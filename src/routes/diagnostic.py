@@ -39,6 +39,7 @@ from src.models.user import (
     Subject,
     db,
 )
+from src.services.review_queue import invalidate_review_queue
 
 
 diagnostic_bp = Blueprint("diagnostic", __name__)
@@ -745,6 +746,8 @@ def create_diagnostic_remediation(attempt_id):
             db.session.flush()
             created_cards.append(card)
 
+        if created_cards:
+            invalidate_review_queue(attempt.user_id)
         db.session.commit()
         return jsonify({
             "status": "success",
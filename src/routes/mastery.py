@@ -4,13 +4,35 @@ from datetime import date, datetime, timezone
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.orm import selectinload
 
 from src.content.toeic_foundations import get_starter_pack
 from src.models.user import Card, Concept, Subject, db
 from src.services.domain_catalog import DOMAIN_OPTIONS, find_template, public_catalog
+from src.services.resource_versions import SUBJECTS, conditional_on, content_etag, not_modified, with_etag
+from src.services.review_queue import invalidate_review_queue
 
 mastery_bp = Blueprint("mastery", __name__)
 
+# The editorial catalog only changes on deploy, so its ETag is computed once.
+CATALOG_PAYLOAD = {
+    "status": "success",
+    "domains": [{"id": key, "label": label} for key, label in DOMAIN_OPTIONS.items()],
+    "templates": public_catalog(),
+    "disclaimer": "Les modèles sont des structures de départ. Ils ne constituent ni un diagnostic ni une certification.",
+}
+CATALOG_ETAG = content_etag(CATALOG_PAYLOAD)
+
+
+def _load_subjects(user_id):
+    # Concepts serialized by `Subject.to_dict` are loaded in one grouped query.
+    return (
+        Subject.query.options(selectinload(Subject.concepts))
+        .filter_by(user_id=user_id)
+        .order_by(Subject.created_at.desc())
+        .all()
+    )
+
 
 def _parse_target_date(value):
     if not value:
@@ -118,6 +140,7 @@ def _create_path(user_id: int, data: dict) -> tuple[Subject, dict | None]:
                 tags=",".join(card_data.get("tags", [])),
                 next_review=now,
             ))
+        invalidate_review_queue(user_id)
 
     db.session.commit()
     return subject, starter_pack
@@ -125,11 +148,12 @@ def _create_path(user_id: int, data: dict) -> tuple[Subject, dict | None]:
 
 @mastery_bp.route("/subjects", methods=["GET"])
 @jwt_required()
+@conditional_on(SUBJECTS)
 def get_subjects():
     """Return only the learner’s existing paths; never invent a default path."""
     try:
         user_id = int(get_jwt_identity())
-        subjects = Subject.query.filter_by(user_id=user_id).order_by(Subject.created_at.desc()).all()
+        subjects = _load_subjects(user_id)
         return jsonify([subject.to_dict() for subject in subjects])
     except Exception:
         return jsonify({"status": "error", "message": "Unable to retrieve learning paths."}), 500
@@ -137,11 +161,12 @@ def get_subjects():
 
 @mastery_bp.route("/get-subjects", methods=["GET"])
 @jwt_required()
+@conditional_on(SUBJECTS)
 def get_subjects_enhanced():
     """Frontend-compatible wrapper around the explicit-path list."""
     try:
         user_id = int(get_jwt_identity())
-        subjects = Subject.query.filter_by(user_id=user_id).order_by(Subject.created_at.desc()).all()
+        subjects = _load_subjects(user_id)
         return jsonify({"status": "success", "subjects": [subject.to_dict() for subject in subjects]})
     except Exception:
         return jsonify({"status": "error", "message": "Unable to retrieve learning paths."}), 500
@@ -151,12 +176,7 @@ def get_subjects_enhanced():
 @jwt_required()
 def get_learning_path_catalog():
     """Expose the editorial template catalogue without creating any data."""
-    return jsonify({
-        "status": "success",
-        "domains": [{"id": key, "label": label} for key, label in DOMAIN_OPTIONS.items()],
-        "templates": public_catalog(),
-        "disclaimer": "Les modèles sont des structures de départ. Ils ne constituent ni un diagnostic ni une certification.",
-    })
+    return not_modified(CATALOG_ETAG) or with_etag(jsonify(CATALOG_PAYLOAD), CATALOG_ETAG)
 
 
 @mastery_bp.route("/create-path", methods=["POST"])
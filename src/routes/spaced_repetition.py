@@ -5,33 +5,61 @@ une migration progressive des cartes existantes. Les réponses sont journalisée
 pour rendre les décisions explicables et permettre une optimisation future.
 """
 
+import io
 from datetime import datetime, timedelta, timezone
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import func, tuple_
 
-from src.models.user import AdaptiveLearningProfile, Card, ReviewLog, StudySession, Subject, User, db
+from src.models.user import CARD_SERIALIZERS, AdaptiveLearningProfile, Card, StudySession, Subject, User, db
 from src.services.fsrs_scheduler import (
     DEFAULT_RETENTION,
     MAX_RETENTION,
     MIN_RETENTION,
     FSRS_VERSION,
     describe_rating,
+    fsrs_card_for,
     normalize_desired_retention,
     normalize_rating,
+    preview_ratings,
     review_with_fsrs,
 )
 from src.services.pipeline_flashcard_import import import_pipeline_flashcards
 from src.services.adaptive_learning import (
     ADAPTIVE_DOMAINS,
     build_adaptive_overview,
+    domain_parameters,
     get_effective_retention,
+    get_personalized_parameters,
     resolve_card_domain,
 )
+from src.services.deck_import import DeckImportError, guess_import_format, import_deck
 from src.services.domain_catalog import DOMAIN_OPTIONS
+from src.services.pagination import InvalidCursor, decode_cursor, encode_cursor, parse_cursor_datetime
+from src.services.resource_versions import SETTINGS, conditional_on
+from src.services.retrievability import (
+    cards_retrievability,
+    load_user_retrievability,
+    mean_retrievability,
+    rounded_or_none,
+)
+from src.services.review_audit import chained_review_logs
+from src.services.review_calendar import review_calendar
+from src.services.review_export import EXPORT_FORMATS, EXPORT_MIMETYPES, export_review_history
+from src.services.review_queue import ALL_DOMAINS, get_review_queue, invalidate_review_queue, queue_page, record_reviews
+from src.services.review_stats import RATING_NAMES, load_review_totals, record_review_stats
+from src.services.user_settings import UserSettings, invalidate_user_settings, load_user_settings
+from src.services.workload_forecast import forecast_workload
 
 spaced_repetition_bp = Blueprint("spaced_repetition", __name__)
 
+# Enough for a long offline session while keeping one transaction short.
+MAX_BATCH_REVIEWS = 500
+DUE_CURSOR = "due"
+CARD_VIEWS = {"full": None, "compact": Card.COMPACT_FIELDS}
+BROWSE_CURSOR = "browse"
+
 
 def _utcnow_naive() -> datetime:
     """Return a UTC timestamp compatible with the project’s current schema."""
@@ -45,6 +73,26 @@ def _safe_limit(raw_limit, default=20, maximum=100):
         return default
 
 
+def _card_fields() -> tuple[str, ...] | None:
+    """Resolve `fields=a,b` or `view=compact|full` into serialized card fields (None = full)."""
+    requested = [name.strip() for name in request.args.get("fields", "").split(",") if name.strip()]
+    if requested:
+        unknown = sorted(set(requested) - set(CARD_SERIALIZERS))
+        if unknown:
+            raise ValueError(f"Unknown card fields: {', '.join(unknown)}")
+        # The id is always returned: the client needs it to rate the card.
+        return tuple(dict.fromkeys(["id", *requested]))
+    view = request.args.get("view", "full").strip().lower()
+    if view not in CARD_VIEWS:
+        raise ValueError(f"view must be one of: {', '.join(CARD_VIEWS)}")
+    return CARD_VIEWS[view]
+
+
+def _keyset_after(token, kind: str) -> list | None:
+    """Decode an optional `cursor` argument; raises InvalidCursor when malformed."""
+    return decode_cursor(token, kind) if token else None
+
+
 def _safe_response_time(value) -> float:
     try:
         return max(0.0, min(3600.0, float(value or 0)))
@@ -52,6 +100,19 @@ def _safe_response_time(value) -> float:
         return 0.0
 
 
+def _parse_reviewed_at(value, now: datetime) -> datetime:
+    """Parse an ISO 8601 review timestamp into naive UTC, never in the future."""
+    if value in (None, ""):
+        return now
+    try:
+        reviewed_at = datetime.fromisoformat(str(value))
+    except ValueError as exc:
+        raise ValueError("reviewed_at must be an ISO 8601 datetime") from exc
+    if reviewed_at.tzinfo is not None:
+        reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(reviewed_at, now)
+
+
 @spaced_repetition_bp.route("/create-card", methods=["POST"])
 @jwt_required()
 def create_spaced_repetition_card():
@@ -74,11 +135,11 @@ def create_spaced_repetition_card():
         requested_domain = str(data.get("learning_domain", data.get("domain", ""))).strip()
         if requested_domain and requested_domain not in ADAPTIVE_DOMAINS:
             return jsonify({"status": "error", "message": "Unknown learning domain"}), 400
-        learning_domain = requested_domain or (subject.domain if subject else "general")
         card = Card(
             user_id=user_id,
             subject_id=subject_id,
-            learning_domain=learning_domain,
+            # Without a requested domain, the card inherits its subject's.
+            learning_domain=requested_domain or None,
             concept_name=concept_name,
             front_content=str(data.get("content", data.get("front_content", ""))).strip(),
             back_content=str(data.get("back_content", "")).strip(),
@@ -88,6 +149,7 @@ def create_spaced_repetition_card():
             next_review=_utcnow_naive(),
         )
         db.session.add(card)
+        invalidate_review_queue(user_id)
         db.session.commit()
 
         return jsonify({
@@ -100,11 +162,53 @@ def create_spaced_repetition_card():
         return jsonify({"status": "error", "message": "Impossible de créer la carte."}), 500
 
 
+def _apply_review(card: Card, rating_name: str, rating, retention_target: float,
+                  response_time: float, reviewed_at: datetime | None = None,
+                  parameters: tuple[float, ...] | None = None) -> tuple[dict, dict]:
+    """Apply one FSRS review to a card and return the result with its log row."""
+    result = review_with_fsrs(
+        fsrs_card_for(card), rating, retention_target, reviewed_at=reviewed_at, parameters=parameters,
+    )
+
+    # FSRS becomes the source of truth. Legacy aggregates are maintained so
+    # existing endpoints and historical cards remain usable during migration.
+    card.scheduler_type = "fsrs"
+    card.scheduler_state = result["card_state"]
+    card.scheduler_version = FSRS_VERSION
+    for column, value in result["memory_columns"].items():
+        setattr(card, column, value)
+    card.interval = result["scheduled_days"]
+    card.interval_minutes = result["scheduled_minutes"]
+    card.review_count += 1
+    if rating_name != "again":
+        card.success_count += 1
+    card.total_response_time += response_time
+    card.last_reviewed = result["reviewed_at"]
+    card.next_review = result["due_at"]
+
+    log_row = {
+        "user_id": card.user_id,
+        "card_id": card.id,
+        "rating": rating_name,
+        "response_time": response_time,
+        "retrievability_before": result["retrievability_before"],
+        "scheduled_days": result["scheduled_days"],
+        "scheduled_minutes": result["scheduled_minutes"],
+        "scheduler_version": FSRS_VERSION,
+        "previous_state": result["previous_state"],
+        "review_log": result["review_log"],
+        "next_state": result["card_state"],
+        "reviewed_at": result["reviewed_at"],
+    }
+    return result, log_row
+
+
 @spaced_repetition_bp.route("/review-card", methods=["POST"])
 @jwt_required()
 def review_card():
     """Record one recall attempt and schedule its next retrieval with FSRS."""
     try:
+        fields = _card_fields()
         data = request.get_json(silent=True) or {}
         user_id = int(get_jwt_identity())
         card_id = data.get("card_id")
@@ -116,48 +220,26 @@ def review_card():
         if not card:
             return jsonify({"status": "error", "message": "Card not found"}), 404
 
-        user = db.session.get(User, user_id)
-        if not user:
+        settings = load_user_settings(user_id)
+        if not settings:
             return jsonify({"status": "error", "message": "User not found"}), 404
         learning_domain = resolve_card_domain(card)
-        retention_target, retention_source = get_effective_retention(user, learning_domain)
-        result = review_with_fsrs(card.scheduler_state, rating, retention_target)
+        retention_target, retention_source = get_effective_retention(settings, learning_domain, settings.profiles)
         response_time = _safe_response_time(data.get("response_time"))
-
-        # FSRS becomes the source of truth. Legacy aggregates are maintained so
-        # existing endpoints and historical cards remain usable during migration.
-        card.scheduler_type = "fsrs"
-        card.scheduler_state = result["card_state"]
-        card.scheduler_version = FSRS_VERSION
-        card.interval = result["scheduled_days"]
-        card.interval_minutes = result["scheduled_minutes"]
-        card.review_count += 1
-        if rating_name != "again":
-            card.success_count += 1
-        card.total_response_time += response_time
-        card.last_reviewed = result["reviewed_at"]
-        card.next_review = result["due_at"]
-
-        db.session.add(ReviewLog(
-            user_id=user_id,
-            card_id=card.id,
-            rating=rating_name,
-            response_time=response_time,
-            retrievability_before=result["retrievability_before"],
-            scheduled_days=result["scheduled_days"],
-            scheduled_minutes=result["scheduled_minutes"],
-            scheduler_version=FSRS_VERSION,
-            previous_state=result["previous_state"],
-            review_log=result["review_log"],
-            next_state=result["card_state"],
-            reviewed_at=result["reviewed_at"],
-        ))
+        is_first_review = not card.review_count
+        result, log_row = _apply_review(
+            card, rating_name, rating, retention_target, response_time,
+            parameters=get_personalized_parameters(settings, learning_domain, settings.profiles),
+        )
+        db.session.add_all(chained_review_logs([log_row]))
+        record_review_stats(user_id, [(learning_domain, log_row, is_first_review)])
+        record_reviews(user_id, {card.id: (learning_domain, card.next_review)}, _utcnow_naive())
         db.session.commit()
 
         feedback = describe_rating(rating_name, result["scheduled_minutes"])
         return jsonify({
             "status": "success",
-            "updated_card": card.to_dict(),
+            "updated_card": card.to_dict(fields),
             "feedback": feedback,
             "rating": rating_name,
             "next_review_in_days": result["scheduled_days_exact"],
@@ -166,6 +248,7 @@ def review_card():
             "retention_target": result["retention_target"],
             "learning_domain": learning_domain,
             "retention_source": retention_source,
+            "personalized_parameters": result["personalized_parameters"],
             "memory_state": result["memory_state"],
             "retrievability_before": result["retrievability_before"],
             # Legacy alias preserved for clients that previously expected it.
@@ -178,48 +261,243 @@ def review_card():
         return jsonify({"status": "error", "message": "Impossible d’enregistrer cette révision."}), 500
 
 
+@spaced_repetition_bp.route("/review-cards", methods=["POST"])
+@jwt_required()
+def review_cards():
+    """Apply an ordered batch of reviews (offline sync) in one transaction.
+
+    Reviews are applied in the submitted order, so the same card may appear
+    several times. Reviews older than the card’s last recorded review, or for
+    unknown cards, are skipped and reported instead of rewriting history.
+    """
+    try:
+        try:
+            fields = _card_fields()
+        except ValueError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+        data = request.get_json(silent=True) or {}
+        user_id = int(get_jwt_identity())
+        items = data.get("reviews")
+        if not isinstance(items, list) or not items:
+            return jsonify({"status": "error", "message": "reviews must be a non-empty list"}), 400
+        if len(items) > MAX_BATCH_REVIEWS:
+            return jsonify({
+                "status": "error",
+                "message": f"A batch accepts at most {MAX_BATCH_REVIEWS} reviews",
+            }), 400
+
+        now = _utcnow_naive()
+        reviews = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or item.get("card_id") is None:
+                return jsonify({"status": "error", "message": f"reviews[{index}].card_id is required"}), 400
+            try:
+                card_id = int(item["card_id"])
+                rating_name, rating = normalize_rating(item)
+                reviewed_at = _parse_reviewed_at(item.get("reviewed_at"), now)
+            except (TypeError, ValueError) as exc:
+                return jsonify({"status": "error", "message": f"reviews[{index}]: {exc}"}), 400
+            reviews.append((card_id, rating_name, rating, _safe_response_time(item.get("response_time")), reviewed_at))
+
+        settings = load_user_settings(user_id)
+        if not settings:
+            return jsonify({"status": "error", "message": "User not found"}), 404
+        card_ids = {review[0] for review in reviews}
+        cards = {
+            card.id: card
+            for card in Card.query.filter(
+                Card.user_id == user_id,
+                Card.id.in_(card_ids),
+            )
+        }
+
+        results = []
+        log_rows = []
+        stats_rows = []
+        reviewed = {}
+        for card_id, rating_name, rating, response_time, reviewed_at in reviews:
+            card = cards.get(card_id)
+            if not card:
+                results.append({"card_id": card_id, "status": "skipped", "reason": "card_not_found"})
+                continue
+            if card.last_reviewed and reviewed_at < card.last_reviewed:
+                results.append({"card_id": card_id, "status": "skipped", "reason": "older_than_last_review"})
+                continue
+            learning_domain = resolve_card_domain(card)
+            retention_target, _ = get_effective_retention(settings, learning_domain, settings.profiles)
+            is_first_review = not card.review_count
+            result, log_row = _apply_review(
+                card, rating_name, rating, retention_target, response_time, reviewed_at,
+                parameters=get_personalized_parameters(settings, learning_domain, settings.profiles),
+            )
+            log_rows.append(log_row)
+            stats_rows.append((learning_domain, log_row, is_first_review))
+            reviewed[card_id] = (learning_domain, card.next_review)
+            results.append({
+                "card_id": card_id,
+                "status": "applied",
+                "rating": rating_name,
+                "next_review_at": result["due_at"].isoformat(),
+                "next_review_in_minutes": result["scheduled_minutes"],
+            })
+
+        if log_rows:
+            db.session.add_all(chained_review_logs(log_rows))
+        record_review_stats(user_id, stats_rows)
+        record_reviews(user_id, reviewed, now)
+        db.session.commit()
+
+        applied_ids = {item["card_id"] for item in results if item["status"] == "applied"}
+        return jsonify({
+            "status": "success",
+            "applied_count": len(log_rows),
+            "skipped_count": len(results) - len(log_rows),
+            "results": results,
+            "updated_cards": [cards[card_id].to_dict(fields) for card_id in sorted(applied_ids)],
+        })
+    except Exception:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": "Impossible d’enregistrer ces révisions."}), 500
+
+
+def _rating_previews(settings: UserSettings, cards: list[Card], now: datetime) -> dict[int, dict]:
+    """Preview the four rating outcomes of each card from the learner’s settings snapshot."""
+    previews = {}
+    for card in cards:
+        domain = resolve_card_domain(card)
+        retention, _ = get_effective_retention(settings, domain, settings.profiles)
+        preview = preview_ratings(
+            fsrs_card_for(card), retention, now=now,
+            parameters=get_personalized_parameters(settings, domain, settings.profiles),
+        )
+        previews[card.id] = {
+            rating_name: {**outcome, "due_at": outcome["due_at"].isoformat()}
+            for rating_name, outcome in preview.items()
+        }
+    return previews
+
+
+@spaced_repetition_bp.route("/cards/<int:card_id>/rating-preview", methods=["GET"])
+@jwt_required()
+def get_rating_preview(card_id):
+    """Show the next interval of each rating before the learner answers."""
+    try:
+        user_id = int(get_jwt_identity())
+        card = Card.query.filter_by(id=card_id, user_id=user_id).first()
+        if not card:
+            return jsonify({"status": "error", "message": "Card not found"}), 404
+        settings = load_user_settings(user_id)
+        if not settings:
+            return jsonify({"status": "error", "message": "User not found"}), 404
+        return jsonify({
+            "status": "success",
+            "card_id": card.id,
+            "preview": _rating_previews(settings, [card], _utcnow_naive())[card.id],
+        })
+    except Exception:
+        return jsonify({"status": "error", "message": "Impossible de prévisualiser les échéances."}), 500
+
+
 @spaced_repetition_bp.route("/get-due-cards", methods=["GET"])
 @jwt_required()
 def get_due_cards():
-    """Return due cards ordered by their actual next review timestamp."""
+    """Return due cards from today’s materialized queue, in due order.
+
+    The queue is built on the first call of the day (or with `refresh=true`
+    at the start of a session); later pages follow the returned `next_cursor`.
+    """
     try:
         user_id = int(get_jwt_identity())
+        fields = _card_fields()
         limit = _safe_limit(request.args.get("limit"), default=20)
+        after = _keyset_after(request.args.get("cursor"), DUE_CURSOR)
+        if after is not None and (len(after) != 2 or not all(isinstance(value, int) for value in after)):
+            raise InvalidCursor("Invalid pagination cursor")
         requested_domain = str(request.args.get("domain", "")).strip()
         if requested_domain and requested_domain not in ADAPTIVE_DOMAINS:
             return jsonify({"status": "error", "message": "Unknown learning domain"}), 400
-        due_cards = Card.query.filter(
-            Card.user_id == user_id,
-            Card.next_review <= _utcnow_naive(),
-        ).order_by(Card.next_review.asc()).all()
-        if requested_domain:
-            due_cards = [card for card in due_cards if resolve_card_domain(card) == requested_domain]
-        due_cards = due_cards[:limit]
-        cards_data = [card.to_dict() for card in due_cards]
+        now = _utcnow_naive()
+        refresh = request.args.get("refresh", "").lower() in {"1", "true"}
+        queue = get_review_queue(user_id, requested_domain or ALL_DOMAINS, now, refresh)
+        queue_size = queue.size
+        due_cards, next_key = queue_page(queue, tuple(after) if after else None, limit, now)
+        settings = load_user_settings(user_id)
+        weights = domain_parameters(settings, {card.learning_domain for card in due_cards})
+        cards_data = [
+            {**card.to_dict(fields), "retrievability": rounded_or_none(retrievability)}
+            for card, retrievability in zip(due_cards, cards_retrievability(due_cards, now, weights))
+        ]
+        if request.args.get("preview", "").lower() in {"1", "true"} and due_cards:
+            previews = _rating_previews(settings, due_cards, now)
+            for card_data in cards_data:
+                card_data["rating_preview"] = previews[card_data["id"]]
         average_seconds = (
             sum(card.average_response_time for card in due_cards if card.review_count > 0)
             / max(1, sum(1 for card in due_cards if card.review_count > 0))
         )
         estimated_minutes = max(1, round((average_seconds or 90) * len(due_cards) / 60)) if due_cards else 0
+        # Persists a queue built by this request; a no-op otherwise.
+        db.session.commit()
 
         return jsonify({
             "status": "success",
             "due_cards": cards_data,
             "total_due": len(cards_data),
+            "queue_size": queue_size,
+            "next_cursor": encode_cursor(DUE_CURSOR, *next_key) if next_key else None,
             "estimated_time_minutes": estimated_minutes,
             "domain": requested_domain or None,
             "scheduling_method": "FSRS pour les cartes déjà migrées ; état initial pour les nouvelles cartes.",
         })
+    except ValueError as exc:  # Invalid cursor or field selection.
+        return jsonify({"status": "error", "message": str(exc)}), 400
     except Exception:
+        db.session.rollback()
         return jsonify({"status": "error", "message": "Impossible de récupérer les cartes dues."}), 500
 
 
+@spaced_repetition_bp.route("/cards", methods=["GET"])
+@jwt_required()
+def browse_cards():
+    """Walk the learner’s collection by creation order, one keyset page at a time."""
+    try:
+        user_id = int(get_jwt_identity())
+        fields = _card_fields()
+        limit = _safe_limit(request.args.get("limit"), default=50)
+        requested_domain = str(request.args.get("domain", "")).strip()
+        if requested_domain and requested_domain not in ADAPTIVE_DOMAINS:
+            return jsonify({"status": "error", "message": "Unknown learning domain"}), 400
+        after = _keyset_after(request.args.get("cursor"), BROWSE_CURSOR)
+        query = Card.query.filter(Card.user_id == user_id)
+        if requested_domain:
+            query = query.filter(Card.learning_domain == requested_domain)
+        if after is not None:
+            if len(after) != 2 or not isinstance(after[1], int):
+                raise InvalidCursor("Invalid pagination cursor")
+            created_at = parse_cursor_datetime(after[0])
+            # Row-value comparison: SQLite and PostgreSQL both serve it from the index.
+            query = query.filter(tuple_(Card.created_at, Card.id) > tuple_(created_at, after[1]))
+        cards = query.order_by(Card.created_at, Card.id).limit(limit + 1).all()
+        page, has_more = cards[:limit], len(cards) > limit
+        return jsonify({
+            "status": "success",
+            "cards": [card.to_dict(fields) for card in page],
+            "next_cursor": encode_cursor(BROWSE_CURSOR, page[-1].created_at, page[-1].id) if has_more else None,
+            "domain": requested_domain or None,
+        })
+    except ValueError as exc:  # Invalid cursor or field selection.
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    except Exception:
+        return jsonify({"status": "error", "message": "Impossible de parcourir les cartes."}), 500
+
+
 @spaced_repetition_bp.route("/settings", methods=["GET"])
 @jwt_required()
+@conditional_on(SETTINGS)
 def get_spaced_repetition_settings():
     """Expose the learner’s explicit retention target and its trade-off."""
-    user = db.session.get(User, int(get_jwt_identity()))
-    retention = normalize_desired_retention(user.desired_retention if user else DEFAULT_RETENTION)
+    settings = load_user_settings(int(get_jwt_identity()))
+    retention = normalize_desired_retention(settings.desired_retention if settings else DEFAULT_RETENTION)
     return jsonify({
         "status": "success",
         "desired_retention": retention,
@@ -228,6 +506,14 @@ def get_spaced_repetition_settings():
     })
 
 
+def _invalidate_settings_caches(user_id: int) -> None:
+    """Drop caches built from the learner's previous settings, once they are committed."""
+    # After the commit, a concurrent request can no longer cache the old row again.
+    invalidate_user_settings(user_id)
+    invalidate_review_queue(user_id)
+    db.session.commit()
+
+
 @spaced_repetition_bp.route("/settings", methods=["PUT"])
 @jwt_required()
 def update_spaced_repetition_settings():
@@ -249,6 +535,7 @@ def update_spaced_repetition_settings():
             return jsonify({"status": "error", "message": "User not found"}), 404
         user.desired_retention = requested_retention
         db.session.commit()
+        _invalidate_settings_caches(user.id)
         return jsonify({"status": "success", "desired_retention": user.desired_retention})
     except Exception:
         db.session.rollback()
@@ -257,26 +544,31 @@ def update_spaced_repetition_settings():
 
 @spaced_repetition_bp.route("/adaptive-profiles", methods=["GET"])
 @jwt_required()
+@conditional_on(SETTINGS)
 def get_adaptive_profiles():
     """Return global and per-domain retention preferences with their source."""
-    user = db.session.get(User, int(get_jwt_identity()))
-    if not user:
+    settings = load_user_settings(int(get_jwt_identity()))
+    if not settings:
         return jsonify({"status": "error", "message": "User not found"}), 404
-    explicit_profiles = {profile.domain: profile for profile in user.adaptive_profiles}
+    explicit_profiles = settings.profiles
     profiles = []
     for domain in ADAPTIVE_DOMAINS:
-        retention, source = get_effective_retention(user, domain)
+        retention, source = get_effective_retention(settings, domain, explicit_profiles)
         profile = explicit_profiles.get(domain)
         profiles.append({
             "domain": domain,
             "label": DOMAIN_OPTIONS[domain],
             "desired_retention": retention,
             "retention_source": source,
+            "personalized_parameters_enabled": bool(profile and profile.personalized_parameters_enabled),
+            "personalized_parameters_active": bool(
+                profile and profile.personalized_parameters_enabled and profile.fsrs_parameters
+            ),
             "updated_at": profile.updated_at.isoformat() if profile and profile.updated_at else None,
         })
     return jsonify({
         "status": "success",
-        "global_desired_retention": normalize_desired_retention(user.desired_retention),
+        "global_desired_retention": normalize_desired_retention(settings.desired_retention),
         "bounds": {"min": MIN_RETENTION, "max": MAX_RETENTION},
         "profiles": profiles,
         "explanation": "Une rétention plus élevée augmente généralement le nombre de révisions ; le réglage est appliqué uniquement aux futures revues du domaine.",
@@ -286,7 +578,11 @@ def get_adaptive_profiles():
 @spaced_repetition_bp.route("/adaptive-profiles/<domain>", methods=["PUT"])
 @jwt_required()
 def update_adaptive_profile(domain):
-    """Persist a learner-approved FSRS retention target for one known domain."""
+    """Persist a learner-approved FSRS retention target for one known domain.
+
+    `personalized_parameters` records the learner's consent to offline-fitted
+    FSRS weights; withdrawing it discards any weights already fitted.
+    """
     if domain not in ADAPTIVE_DOMAINS:
         return jsonify({"status": "error", "message": "Unknown learning domain"}), 400
     data = request.get_json(silent=True) or {}
@@ -299,6 +595,9 @@ def update_adaptive_profile(domain):
             "status": "error",
             "message": f"desired_retention must be between {MIN_RETENTION} and {MAX_RETENTION}",
         }), 400
+    consent = data.get("personalized_parameters")
+    if consent is not None and not isinstance(consent, bool):
+        return jsonify({"status": "error", "message": "personalized_parameters must be a boolean"}), 400
 
     try:
         user_id = int(get_jwt_identity())
@@ -312,7 +611,14 @@ def update_adaptive_profile(domain):
                 desired_retention=desired_retention,
             )
             db.session.add(profile)
+        if consent is not None:
+            profile.personalized_parameters_enabled = consent
+            if not consent:
+                profile.fsrs_parameters = None
+                profile.parameters_fitted_at = None
+                profile.parameters_review_count = None
         db.session.commit()
+        _invalidate_settings_caches(user_id)
         return jsonify({
             "status": "success",
             "profile": {
@@ -330,12 +636,15 @@ def update_adaptive_profile(domain):
 @jwt_required()
 def get_adaptive_overview():
     """Expose per-domain workload and recall data without score prediction."""
-    user = db.session.get(User, int(get_jwt_identity()))
-    if not user:
+    settings = load_user_settings(int(get_jwt_identity()))
+    if not settings:
         return jsonify({"status": "error", "message": "User not found"}), 404
+    now = _utcnow_naive()
     return jsonify({
         "status": "success",
-        "domains": build_adaptive_overview(user, _utcnow_naive()),
+        "domains": build_adaptive_overview(
+            settings, now, load_review_totals(settings.id, (now - timedelta(days=30)).date()),
+        ),
         "explanation": "Les indicateurs décrivent vos cartes et revues enregistrées. Ils ne constituent ni un diagnostic ni une prédiction de réussite.",
     })
 
@@ -347,37 +656,21 @@ def get_review_schedule():
     try:
         user_id = int(get_jwt_identity())
         days_ahead = _safe_limit(request.args.get("days_ahead"), default=7, maximum=60)
+        calendar = review_calendar(user_id, _utcnow_naive().date(), days_ahead)
         schedule = {}
-        base_date = _utcnow_naive().date()
-
-        for day_offset in range(days_ahead):
-            current_date = base_date + timedelta(days=day_offset)
-            day_start = datetime.combine(current_date, datetime.min.time())
-            day_end = datetime.combine(current_date, datetime.max.time())
-            day_cards = (
-                Card.query.filter(
-                    Card.user_id == user_id,
-                    Card.next_review >= day_start,
-                    Card.next_review <= day_end,
-                ).all()
-            )
-            cards_count = len(day_cards)
-            date_str = current_date.isoformat()
-            estimated_minutes = max(1, round(cards_count * 1.5)) if cards_count else 0
+        for date_str, day in calendar.items():
+            cards_count = day["cards_due"]
             schedule[date_str] = {
                 "date": date_str,
                 "cards_due": cards_count,
-                "estimated_time_minutes": estimated_minutes,
-                "difficulty_distribution": {
-                    "easy": sum(card.difficulty == "easy" for card in day_cards),
-                    "medium": sum(card.difficulty == "medium" for card in day_cards),
-                    "hard": sum(card.difficulty == "hard" for card in day_cards),
-                },
+                "estimated_time_minutes": max(1, round(cards_count * 1.5)) if cards_count else 0,
+                "difficulty_distribution": dict(day["difficulty_distribution"]),
                 "workload": "light" if cards_count < 10 else "moderate" if cards_count < 20 else "heavy",
             }
 
         total_minutes = sum(day["estimated_time_minutes"] for day in schedule.values())
         peak_day = max(schedule, key=lambda date: schedule[date]["cards_due"]) if schedule else None
+        _, collection_retrievability = load_user_retrievability(user_id, _utcnow_naive())
         return jsonify({
             "status": "success",
             "schedule": schedule,
@@ -386,12 +679,39 @@ def get_review_schedule():
                 "total_time_hours": round(total_minutes / 60, 1),
                 "peak_day": peak_day,
                 "light_days": sum(day["workload"] == "light" for day in schedule.values()),
+                "average_retrievability": mean_retrievability(collection_retrievability),
             },
         })
     except Exception:
         return jsonify({"status": "error", "message": "Impossible de générer le calendrier."}), 500
 
 
+@spaced_repetition_bp.route("/forecast", methods=["GET"])
+@jwt_required()
+def get_workload_forecast():
+    """Simulate future FSRS reviews to forecast the daily workload."""
+    try:
+        settings = load_user_settings(int(get_jwt_identity()))
+        if not settings:
+            return jsonify({"status": "error", "message": "User not found"}), 404
+        days_ahead = _safe_limit(request.args.get("days_ahead"), default=30, maximum=60)
+        simulations = _safe_limit(request.args.get("simulations"), default=100, maximum=500)
+        try:
+            seed = int(request.args.get("seed", 0))
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "seed must be an integer"}), 400
+        forecast = forecast_workload(settings, _utcnow_naive(), days_ahead, simulations, seed)
+        explanation = "Projection probabiliste : chaque revue est simulée selon la récupérabilité FSRS de la carte. Les bandes p10-p90 encadrent 80 % des scénarios simulés ; aucune nouvelle carte n’est supposée."
+        if forecast["simulations_reduced"]:
+            explanation += (
+                f" Collection volumineuse : {forecast['simulations']} simulations au lieu de "
+                f"{forecast['requested_simulations']}, les bandes sont donc moins précises."
+            )
+        return jsonify({"status": "success", "forecast": forecast, "explanation": explanation})
+    except Exception:
+        return jsonify({"status": "error", "message": "Impossible de prévoir la charge de révision."}), 500
+
+
 @spaced_repetition_bp.route("/performance-analytics", methods=["GET"])
 @jwt_required()
 def get_performance_analytics():
@@ -400,36 +720,39 @@ def get_performance_analytics():
         user_id = int(get_jwt_identity())
         period_days = _safe_limit(request.args.get("period_days"), default=30, maximum=365)
         cutoff = _utcnow_naive() - timedelta(days=period_days)
-        all_cards = Card.query.filter_by(user_id=user_id).all()
-        review_logs = (
-            ReviewLog.query.filter(
-                ReviewLog.user_id == user_id,
-                ReviewLog.reviewed_at >= cutoff,
-            ).order_by(ReviewLog.reviewed_at.desc()).all()
-        )
+        totals = load_review_totals(user_id, cutoff.date())
+        ratings = {
+            rating_name: sum(domain_totals[f"{rating_name}_count"] for domain_totals in totals.values())
+            for rating_name in RATING_NAMES
+        }
+        total_reviews = sum(ratings.values())
+        total_response_time = sum(domain_totals["response_time_sum"] for domain_totals in totals.values())
+        successful_reviews = ratings["hard"] + ratings["good"] + ratings["easy"]
+        success_rate = round(successful_reviews / total_reviews, 3) if total_reviews else 0.0
+        avg_response_time = round(total_response_time / total_reviews, 1) if total_reviews else 0.0
+
+        total_cards = db.session.scalar(db.select(func.count()).select_from(Card).where(Card.user_id == user_id))
+        success_count = func.coalesce(Card.success_count, 0)
+        fragile_cards = [
+            card.to_dict() for card in Card.query.filter(
+                Card.user_id == user_id,
+                Card.review_count >= 2,
+                success_count < 0.60 * Card.review_count,
+            ).order_by((success_count * 1.0 / Card.review_count).asc(), Card.id).limit(5)
+        ]
         sessions = (
             StudySession.query.filter(
                 StudySession.user_id == user_id,
                 StudySession.started_at >= cutoff,
-            ).order_by(StudySession.started_at.desc()).all()
+            ).order_by(StudySession.started_at.desc()).limit(10).all()
         )
-        ratings = {name: sum(log.rating == name for log in review_logs) for name in ("again", "hard", "good", "easy")}
-        successful_reviews = ratings["hard"] + ratings["good"] + ratings["easy"]
-        success_rate = round(successful_reviews / len(review_logs), 3) if review_logs else 0.0
-        avg_response_time = round(
-            sum(log.response_time for log in review_logs) / len(review_logs), 1
-        ) if review_logs else 0.0
-        fragile_cards = [
-            card.to_dict() for card in all_cards
-            if card.review_count >= 2 and card.success_rate < 0.60
-        ][:5]
 
         insights = []
-        if not review_logs:
+        if not total_reviews:
             insights.append("Aucune revue enregistrée sur la période : effectuez une session pour obtenir des données personnelles.")
         elif ratings["again"]:
             insights.append("Les cartes notées « À revoir » sont prioritaires : reliez-les à un exemple avant la prochaine tentative.")
-        if review_logs and success_rate >= 0.8:
+        if total_reviews and success_rate >= 0.8:
             insights.append("Vos rappels récents sont solides. Conservez un rythme régulier plutôt que de masser les révisions.")
         if fragile_cards:
             insights.append("Certaines cartes restent fragiles ; réduisez leur périmètre ou ajoutez un exemple concret.")
@@ -438,13 +761,13 @@ def get_performance_analytics():
             "status": "success",
             "analytics": {
                 "period_days": period_days,
-                "total_cards": len(all_cards),
-                "total_reviews": len(review_logs),
+                "total_cards": total_cards,
+                "total_reviews": total_reviews,
                 "average_success_rate": success_rate,
                 "average_response_time": avg_response_time,
                 "ratings": ratings,
                 "fragile_cards": fragile_cards,
-                "recent_sessions": [session.to_dict() for session in sessions[:10]],
+                "recent_sessions": [session.to_dict() for session in sessions],
             },
             "insights": insights,
         })
@@ -452,6 +775,31 @@ def get_performance_analytics():
         return jsonify({"status": "error", "message": "Impossible de calculer les analyses."}), 500
 
 
+@spaced_repetition_bp.route("/review-history/export", methods=["GET"])
+@jwt_required()
+def export_review_history_stream():
+    """Stream the learner’s full review history as NDJSON or FSRS optimizer CSV."""
+    user_id = int(get_jwt_identity())
+    export_format = str(request.args.get("format", "ndjson")).strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    requested_domain = str(request.args.get("domain", "")).strip()
+    if requested_domain and requested_domain not in ADAPTIVE_DOMAINS:
+        return jsonify({"status": "error", "message": "Unknown learning domain"}), 400
+    include_states = request.args.get("include_states", "").lower() in {"1", "true"}
+    chunks = export_review_history(user_id, export_format, requested_domain or None, include_states)
+    # Bytes leave with the first chunk; a later error cuts the stream short.
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="review-history.{export_format}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @spaced_repetition_bp.route("/import-pipeline-flashcards", methods=["POST"])
 @jwt_required()
 def import_pipeline_cards():
@@ -464,3 +812,31 @@ def import_pipeline_cards():
         return jsonify(result), 200
     except Exception:
         return jsonify({"status": "error", "message": "Impossible d’importer les cartes du pipeline."}), 500
+
+
+@spaced_repetition_bp.route("/import-deck", methods=["POST"])
+@jwt_required()
+def import_deck_file():
+    """Bulk-import a CSV, TSV or Anki text deck, with its optional FSRS revlog."""
+    deck = request.files.get("deck")
+    if deck is None or not deck.filename:
+        return jsonify({"status": "error", "message": "A deck file is required"}), 400
+    revlog = request.files.get("revlog")
+    subject_id = request.form.get("subject_id", "").strip()
+    if subject_id and not subject_id.isdigit():
+        return jsonify({"status": "error", "message": "subject_id must be an integer"}), 400
+    try:
+        result = import_deck(
+            int(get_jwt_identity()),
+            io.TextIOWrapper(deck.stream, encoding="utf-8-sig", newline=""),
+            request.form.get("format") or guess_import_format(deck.filename),
+            io.TextIOWrapper(revlog.stream, encoding="utf-8-sig", newline="") if revlog else None,
+            int(subject_id) if subject_id else None,
+        )
+        return jsonify(result)
+    except UnicodeDecodeError:
+        return jsonify({"status": "error", "message": "Files must be UTF-8 encoded"}), 400
+    except DeckImportError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    except Exception:
+        return jsonify({"status": "error", "message": "Impossible d’importer le paquet."}), 500
@@ -2,34 +2,100 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
-from datetime import datetime, timedelta
+import json
+from collections.abc import Iterable
+from datetime import datetime
 
-from src.models.user import AdaptiveLearningProfile, Card, ReviewLog
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.orm import Session
+
+from src.models.user import Card, Subject, db
 from src.services.domain_catalog import DOMAIN_OPTIONS
-from src.services.fsrs_scheduler import DEFAULT_RETENTION, normalize_desired_retention
+from src.services.fsrs_scheduler import DEFAULT_PARAMETERS, DEFAULT_RETENTION, normalize_desired_retention
+from src.services.retrievability import retrievability_expression
+from src.services.review_queue import invalidate_review_queue
 
 
 ADAPTIVE_DOMAINS = tuple(DOMAIN_OPTIONS.keys())
+EMPTY_DOMAIN_SUMMARY = {"cards_total": 0, "cards_due": 0, "average_retrievability": None}
 
 
-def resolve_card_domain(card: Card) -> str:
-    """Return the persisted card domain, then its subject domain, then general."""
-    if card.learning_domain in ADAPTIVE_DOMAINS:
-        return card.learning_domain
-    if card.subject and card.subject.domain in ADAPTIVE_DOMAINS:
-        return card.subject.domain
+def resolve_domain(learning_domain: str | None, subject_domain: str | None) -> str:
+    """Resolve a card domain from the requested one, then its subject’s, then general."""
+    if learning_domain in ADAPTIVE_DOMAINS:
+        return learning_domain
+    if subject_domain in ADAPTIVE_DOMAINS:
+        return subject_domain
     return "general"
 
 
-def get_effective_retention(user, domain: str) -> tuple[float, str]:
-    """Return the explicit domain preference or the learner's global fallback."""
-    profile = AdaptiveLearningProfile.query.filter_by(user_id=user.id, domain=domain).first()
+def resolve_card_domain(card: Card) -> str:
+    """Return the card’s persisted domain (resolved when the card was written)."""
+    return card.learning_domain if card.learning_domain in ADAPTIVE_DOMAINS else "general"
+
+
+@event.listens_for(Session, "before_flush")
+def _persist_card_domains(session, flush_context, instances) -> None:
+    """Write the resolved domain on new cards and follow subject domain changes.
+
+    Every creation path then stores `learning_domain`, and domain filters are
+    a single indexed column predicate instead of a join on `subject`. Only
+    cards created without an explicit domain follow their subject afterwards.
+    """
+    for instance in session.new:
+        if isinstance(instance, Card) and instance.learning_domain not in ADAPTIVE_DOMAINS:
+            subject = instance.subject
+            if subject is None and instance.subject_id is not None:
+                subject = session.get(Subject, instance.subject_id)
+            instance.learning_domain = resolve_domain(instance.learning_domain, subject.domain if subject else None)
+            instance.domain_inherited = True
+    for instance in session.dirty:
+        if not isinstance(instance, Subject):
+            continue
+        history = inspect(instance).attrs.domain.history
+        if not history.added:
+            continue
+        # Only cards that inherited the subject's domain follow it. The old
+        # domain is not needed (and is missing when the subject was expired).
+        moved = session.execute(
+            db.update(Card)
+            .where(Card.subject_id == instance.id, Card.domain_inherited.is_(True))
+            .values(learning_domain=resolve_domain(None, history.added[0]))
+        )
+        if moved.rowcount:
+            invalidate_review_queue(instance.user_id)
+
+
+def get_effective_retention(user, domain: str, profiles: dict) -> tuple[float, str]:
+    """Return the explicit domain preference or the learner's global fallback.
+
+    `user` is a `User` or its `UserSettings` snapshot and `profiles` maps
+    domains to profiles, as in `UserSettings.profiles`: no query is issued.
+    """
+    profile = profiles.get(domain)
     if profile:
         return normalize_desired_retention(profile.desired_retention), "domain_profile"
     return normalize_desired_retention(user.desired_retention or DEFAULT_RETENTION), "global_profile"
 
 
+def get_personalized_parameters(user, domain: str, profiles: dict) -> tuple[float, ...] | None:
+    """Return offline-fitted FSRS weights, only while the learner consents."""
+    profile = profiles.get(domain)
+    if not profile or not profile.personalized_parameters_enabled or not profile.fsrs_parameters:
+        return None
+    try:
+        weights = tuple(float(weight) for weight in json.loads(profile.fsrs_parameters))
+    except (TypeError, ValueError):
+        weights = ()
+    # Unreadable weights must never block a review.
+    return weights if len(weights) == len(DEFAULT_PARAMETERS) else None
+
+
+def domain_parameters(settings, domains: Iterable[str]) -> dict[str, tuple[float, ...] | None]:
+    """Map each domain to the personal FSRS weights its cards are scheduled with."""
+    return {domain: get_personalized_parameters(settings, domain, settings.profiles) for domain in domains}
+
+
 def recommendation_for_domain(cards_total: int, cards_due: int, review_count: int, recall_rate: float | None) -> dict:
     """Offer only data-based next actions; never predict achievement or ability."""
     if cards_total == 0:
@@ -53,53 +119,79 @@ def recommendation_for_domain(cards_total: int, cards_due: int, review_count: in
     }
 
 
-def build_adaptive_overview(user, now: datetime) -> list[dict]:
-    """Build descriptive domain metrics from persisted cards and review logs."""
-    cards = Card.query.filter_by(user_id=user.id).all()
-    cards_by_domain: dict[str, list[Card]] = defaultdict(list)
-    card_domains: dict[int, str] = {}
-    for card in cards:
-        domain = resolve_card_domain(card)
-        cards_by_domain[domain].append(card)
-        card_domains[card.id] = domain
+def _domain_card_summaries(settings, now: datetime) -> dict[str, dict]:
+    """Count cards, due cards and mean retrievability per domain, in one query.
 
-    recent_logs = ReviewLog.query.filter(
-        ReviewLog.user_id == user.id,
-        ReviewLog.reviewed_at >= now - timedelta(days=30),
+    Each domain's mean uses the forgetting curve of the weights that schedule it.
+    """
+    dialect_name = db.session.get_bind().dialect.name
+    retrievability = retrievability_expression(now, dialect_name)
+    personalized = [
+        (Card.learning_domain == domain, retrievability_expression(now, dialect_name, weights))
+        for domain, weights in sorted(domain_parameters(settings, settings.profiles).items())
+        if weights is not None
+    ]
+    if personalized:
+        retrievability = case(*personalized, else_=retrievability)
+    rows = db.session.execute(
+        db.select(
+            Card.learning_domain,
+            func.count(),
+            func.sum(case((Card.next_review <= now, 1), else_=0)),
+            func.avg(retrievability),
+        )
+        .where(Card.user_id == settings.id)
+        .group_by(Card.learning_domain)
     ).all()
-    logs_by_domain: dict[str, list[ReviewLog]] = defaultdict(list)
-    for log in recent_logs:
-        logs_by_domain[card_domains.get(log.card_id, "general")].append(log)
+    return {
+        row_domain: {
+            "cards_total": total,
+            "cards_due": due or 0,
+            "average_retrievability": None if mean is None else round(float(mean), 3),
+        }
+        for row_domain, total, due, mean in rows
+    }
+
+
+def build_adaptive_overview(settings, now: datetime, recent_review_totals: dict[str, dict]) -> list[dict]:
+    """Build descriptive domain metrics from grouped card queries and review rollups.
+
+    `settings` is the learner’s `UserSettings` snapshot; `recent_review_totals`
+    holds the last 30 days of `daily_review_stats` per domain, as returned by
+    `load_review_totals`. The cost is a fixed number of queries whatever the
+    size of the collection.
+    """
+    summaries = _domain_card_summaries(settings, now)
+    profiles = settings.profiles
 
-    profile_domains = {profile.domain for profile in user.adaptive_profiles}
     # Les deux parcours initiaux doivent être configurables même avant la
     # première carte : le module sert aussi de point d’entrée pour TOEIC et informatique.
-    represented_domains = set(cards_by_domain) | profile_domains | {"language", "computing"}
+    represented_domains = (
+        set(summaries) | set(profiles) | set(recent_review_totals) | {"language", "computing"}
+    ) & set(ADAPTIVE_DOMAINS)
     overview = []
     for domain in sorted(represented_domains):
-        domain_cards = cards_by_domain[domain]
-        domain_logs = logs_by_domain[domain]
-        reviewed_count = len(domain_logs)
-        successful_count = sum(log.rating != "again" for log in domain_logs)
+        summary = summaries.get(domain, EMPTY_DOMAIN_SUMMARY)
+        domain_totals = recent_review_totals.get(domain)
+        reviewed_count = domain_totals["review_count"] if domain_totals else 0
+        successful_count = reviewed_count - domain_totals["again_count"] if domain_totals else 0
         recall_rate = round(successful_count / reviewed_count, 3) if reviewed_count else None
         average_response_seconds = (
-            round(sum(log.response_time for log in domain_logs) / reviewed_count, 1)
+            round(domain_totals["response_time_sum"] / reviewed_count, 1)
             if reviewed_count else None
         )
-        due_count = sum(card.is_due for card in domain_cards)
-        retention, retention_source = get_effective_retention(user, domain)
+        retention, retention_source = get_effective_retention(settings, domain, profiles)
         overview.append({
             "domain": domain,
             "label": DOMAIN_OPTIONS[domain],
-            "cards_total": len(domain_cards),
-            "cards_due": due_count,
+            **summary,
             "reviews_last_30_days": reviewed_count,
             "recall_rate": recall_rate,
             "average_response_seconds": average_response_seconds,
             "desired_retention": retention,
             "retention_source": retention_source,
             "recommendation": recommendation_for_domain(
-                len(domain_cards), due_count, reviewed_count, recall_rate,
+                summary["cards_total"], summary["cards_due"], reviewed_count, recall_rate,
             ),
         })
     return overview
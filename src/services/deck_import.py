@@ -0,0 +1,420 @@
+"""Import massif de paquets de cartes (CSV, TSV, export texte Anki).
+
+Le paquet est lu ligne à ligne et validé par lots de `IMPORT_CHUNK_SIZE`
+lignes : chaque lot est dédoublonné (dans le fichier, puis contre la
+collection en une requête) et inséré d’un bloc — COPY sous PostgreSQL,
+INSERT exécuté en lot ailleurs. Ces insertions contournent l’ORM : le domaine
+de chaque carte est donc résolu ici et non par `_persist_card_domains`.
+
+Un historique au format `revlog` des optimiseurs FSRS (celui de l’export
+CSV) peut accompagner le paquet. Il est rattaché aux cartes par leur
+identifiant d’origine (colonne `id` du CSV, `guid` d’Anki), inséré de même,
+puis rejoué pour reconstruire l’état FSRS des cartes concernées. L’import
+est atomique : tout est écrit dans une transaction commise à la fin.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import html
+import io
+import re
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import chain
+
+from src.models.user import Card, ReviewLog, Subject, db
+from src.services.adaptive_learning import ADAPTIVE_DOMAINS, resolve_domain
+from src.services.fsrs_scheduler import RATING_BY_NAME
+from src.services.review_queue import invalidate_review_queue
+from src.services.review_replay import replay_cards
+from src.services.review_stats import record_review_stats
+
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = ("csv", "tsv", "anki")
+IMPORT_SCHEDULER_VERSION = "import"
+MAX_REPORTED_ERRORS = 50
+DIFFICULTIES = ("easy", "medium", "hard")
+# En-têtes acceptés pour chaque champ d’une carte (CSV et TSV).
+COLUMN_ALIASES = {
+    "id": ("id", "card_id", "guid"),
+    "front": ("front", "question", "front_content"),
+    "back": ("back", "answer", "back_content"),
+    "concept": ("concept", "concept_name"),
+    "tags": ("tags",),
+    "domain": ("domain", "learning_domain"),
+    "difficulty": ("difficulty",),
+}
+ANKI_SEPARATORS = {"tab": "\t", "comma": ",", "semicolon": ";", "space": " ", "pipe": "|", "colon": ":"}
+# Colonnes spéciales de l’export « Notes en texte brut » d’Anki ; None : ignorée.
+ANKI_SPECIAL_COLUMNS = {"guid column": "id", "tags column": "tags", "notetype column": None, "deck column": None}
+REVLOG_COLUMNS = ("card_id", "review_time", "review_rating")
+
+_RATING_NAMES = {int(rating): name for name, rating in RATING_BY_NAME.items()}
+_HTML_BREAK = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_TAG_SEPARATOR = re.compile(r"[,\s]+")
+
+ProgressCallback = Callable[[str, int], None]
+
+
+class DeckImportError(ValueError):
+    """The deck cannot be imported at all (unknown format, missing columns, subject)."""
+
+
+def guess_import_format(filename: str | None) -> str:
+    """Infer the deck format from a file name (Anki exports notes as `.txt`)."""
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    return {"tsv": "tsv", "txt": "anki"}.get(suffix, "csv")
+
+
+def _column_defaults(table) -> dict:
+    # Valeurs par défaut Python des colonnes, que COPY n’applique pas.
+    return {
+        column.name: column.default.arg
+        for column in table.columns
+        if column.default is not None and column.default.is_scalar
+    }
+
+
+def _plain_text(value: str) -> str:
+    return html.unescape(_HTML_TAG.sub("", _HTML_BREAK.sub("\n", value))).strip()
+
+
+def _tags(value: str | None) -> str:
+    return ",".join(tag for tag in _TAG_SEPARATOR.split(value or "") if tag)
+
+
+def _delimited_records(lines: Iterable[str], delimiter: str) -> Iterator[tuple[int, dict]]:
+    reader = csv.reader(lines, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[key] = names.index(alias)
+                break
+    missing = [key for key in ("front", "back") if key not in columns]
+    if missing:
+        raise DeckImportError(f"Missing column(s): {', '.join(missing)}")
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield reader.line_num, {key: row[index] if index < len(row) else "" for key, index in columns.items()}
+
+
+def _anki_records(lines: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    lines = iter(lines)
+    options = {}
+    first_line = None
+    for line in lines:
+        if not line.startswith("#"):
+            first_line = line
+            break
+        key, _, value = line[1:].partition(":")
+        options[key.strip().lower()] = value.strip()
+    if first_line is None:
+        return
+    separator = options.get("separator", "tab")
+    separator = ANKI_SEPARATORS.get(separator.lower(), separator[:1] or "\t")
+    html_fields = options.get("html", "false").lower() == "true"
+    special = {}
+    for option, key in ANKI_SPECIAL_COLUMNS.items():
+        if options.get(option, "").isdigit():
+            special[int(options[option]) - 1] = key
+
+    header_lines = len(options)
+    reader = csv.reader(chain([first_line], lines), delimiter=separator)
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        fields = [cell for index, cell in enumerate(row) if index not in special]
+        record = {"front": fields[0] if fields else "", "back": fields[1] if len(fields) > 1 else ""}
+        if html_fields:
+            record = {key: _plain_text(value) for key, value in record.items()}
+        for index, key in special.items():
+            if key and index < len(row):
+                record[key] = row[index]
+        yield header_lines + reader.line_num, record
+
+
+def _deck_records(lines: Iterable[str], import_format: str) -> Iterator[tuple[int, dict]]:
+    if import_format == "anki":
+        return _anki_records(lines)
+    return _delimited_records(lines, "\t" if import_format == "tsv" else ",")
+
+
+def _card_row(record: dict, subject_domain: str | None) -> dict:
+    front = (record.get("front") or "").strip()
+    back = (record.get("back") or "").strip()
+    if not front or not back:
+        raise ValueError("front and back are required")
+    domain = (record.get("domain") or "").strip()
+    if domain and domain not in ADAPTIVE_DOMAINS:
+        raise ValueError(f"unknown learning domain: {domain}")
+    difficulty = (record.get("difficulty") or "medium").strip().lower()
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"unknown difficulty: {difficulty}")
+    concept_name = (record.get("concept") or "").strip() or front.splitlines()[0]
+    return {
+        "learning_domain": resolve_domain(domain, subject_domain),
+        "domain_inherited": not domain,
+        "concept_name": concept_name[:200],
+        "front_content": front,
+        "back_content": back,
+        "difficulty": difficulty,
+        "tags": _tags(record.get("tags")),
+    }
+
+
+def _copy_text(value) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_buffer(rows: list[dict], columns: list[str]) -> io.StringIO:
+    """Format `rows` as the text stream of `COPY ... FROM STDIN`."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_text(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_rows(table, rows: list[dict]) -> None:
+    connection = db.session.connection()
+    columns = list(rows[0])
+    buffer = _copy_buffer(rows, columns)
+    preparer = connection.dialect.identifier_preparer
+    statement = (
+        f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(column) for column in columns)}) FROM STDIN"
+    )
+    with connection.connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert(statement, buffer)
+
+
+def _executemany_rows(table, rows: list[dict]) -> None:
+    db.session.execute(db.insert(table), rows)
+
+
+_BULK_INSERTERS = {"postgresql": _copy_rows}
+
+
+def _bulk_insert(table, rows: list[dict]) -> None:
+    """Insert `rows` (same keys) in one round trip, bypassing the ORM."""
+    _BULK_INSERTERS.get(db.session.get_bind().dialect.name, _executemany_rows)(table, rows)
+
+
+@dataclass
+class _Report:
+    """Counters and the first row errors of one import."""
+
+    counts: defaultdict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: list[dict] = field(default_factory=list)
+
+    def reject(self, source: str, line: int, message: str) -> None:
+        self.counts[f"invalid_{source}"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"file": source, "line": line, "message": message})
+
+
+def _import_cards(
+    user_id: int,
+    lines: Iterable[str],
+    import_format: str,
+    subject: Subject | None,
+    chunk_size: int,
+    link_sources: bool,
+    report: _Report,
+    progress: ProgressCallback,
+) -> dict[str, tuple[int, str]]:
+    """Insert the deck’s cards; return the new (card id, domain) by source id if `link_sources`."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    defaults = {
+        **_column_defaults(Card.__table__),
+        "user_id": user_id,
+        "subject_id": subject.id if subject else None,
+        "next_review": now,
+        "created_at": now,
+    }
+    seen: set[bytes] = set()
+    sourced: dict[str, tuple[int, str]] = {}
+    pending: list[tuple[str, dict]] = []
+
+    def flush() -> None:
+        fronts = {row["front_content"] for _, row in pending}
+        existing = {
+            tuple(row) for row in db.session.execute(
+                db.select(Card.front_content, Card.back_content)
+                .where(Card.user_id == user_id, Card.front_content.in_(fronts))
+            )
+        }
+        fresh = [(source_id, row) for source_id, row in pending if (row["front_content"], row["back_content"]) not in existing]
+        report.counts["duplicates"] += len(pending) - len(fresh)
+        if fresh:
+            _bulk_insert(Card.__table__, [row for _, row in fresh])
+        # Ni COPY ni un INSERT en lot ne renvoient les identifiants dans l’ordre :
+        # (recto, verso) étant unique dans la collection après dédoublonnage, les
+        # cartes créées sont relues par leur contenu pour rattacher l’historique.
+        linked = {
+            (row["front_content"], row["back_content"]): (source_id, row["learning_domain"])
+            for source_id, row in fresh
+            if source_id and link_sources
+        }
+        if linked:
+            for card_id, front, back in db.session.execute(
+                db.select(Card.id, Card.front_content, Card.back_content)
+                .where(Card.user_id == user_id, Card.front_content.in_({front for front, _ in linked}))
+            ):
+                source_id, domain = linked.get((front, back), (None, None))
+                if source_id:
+                    sourced[source_id] = (card_id, domain)
+        report.counts["cards"] += len(fresh)
+        pending.clear()
+        progress("cards", report.counts["cards"])
+
+    for line, record in _deck_records(lines, import_format):
+        try:
+            row = _card_row(record, subject.domain if subject else None)
+        except ValueError as exc:
+            report.reject("deck", line, str(exc))
+            continue
+        key = hashlib.blake2b(f"{row['front_content']}\x1f{row['back_content']}".encode(), digest_size=16).digest()
+        if key in seen:
+            report.counts["duplicates"] += 1
+            continue
+        seen.add(key)
+        pending.append(((record.get("id") or "").strip(), {**defaults, **row}))
+        if len(pending) >= chunk_size:
+            flush()
+    if pending:
+        flush()
+    return sourced
+
+
+def _import_reviews(
+    user_id: int,
+    lines: Iterable[str],
+    sourced: dict[str, tuple[int, str]],
+    chunk_size: int,
+    report: _Report,
+    progress: ProgressCallback,
+) -> dict[int, dict]:
+    """Insert the revlog rows of imported cards; return review counters by card id."""
+    reader = csv.DictReader(lines)
+    missing = [column for column in REVLOG_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise DeckImportError(f"Missing revlog column(s): {', '.join(missing)}")
+    defaults = {**_column_defaults(ReviewLog.__table__), "user_id": user_id, "scheduler_version": IMPORT_SCHEDULER_VERSION}
+    counters: dict[int, dict] = {}
+    log_rows: list[dict] = []
+    reviews: list[tuple[str, dict, bool]] = []
+
+    def flush() -> None:
+        _bulk_insert(ReviewLog.__table__, log_rows)
+        record_review_stats(user_id, reviews)
+        report.counts["reviews"] += len(log_rows)
+        log_rows.clear()
+        reviews.clear()
+        progress("reviews", report.counts["reviews"])
+
+    for row in reader:
+        target = sourced.get((row["card_id"] or "").strip())
+        if target is None:
+            report.counts["unmatched_reviews"] += 1
+            continue
+        try:
+            rating = _RATING_NAMES[int(row["review_rating"])]
+            reviewed_at = datetime.fromtimestamp(int(float(row["review_time"])) / 1000, timezone.utc).replace(tzinfo=None)
+            duration = (row.get("review_duration") or "").strip()
+            response_time = float(duration) / 1000 if duration else 0.0
+        except (KeyError, TypeError, ValueError, OverflowError, OSError):
+            report.reject("revlog", reader.line_num, "review_time and review_rating (1-4) must be numbers")
+            continue
+        card_id, domain = target
+        log_row = {**defaults, "card_id": card_id, "rating": rating, "response_time": response_time, "reviewed_at": reviewed_at}
+        card_counters = counters.get(card_id)
+        if card_counters is None:
+            card_counters = counters[card_id] = {"id": card_id, "review_count": 0, "success_count": 0, "total_response_time": 0.0}
+        # L’historique est supposé chronologique : la première ligne d’une carte est sa première revue.
+        reviews.append((domain, log_row, card_counters["review_count"] == 0))
+        card_counters["review_count"] += 1
+        card_counters["success_count"] += int(rating != "again")
+        card_counters["total_response_time"] += response_time
+        log_rows.append(log_row)
+        if len(log_rows) >= chunk_size:
+            flush()
+    if log_rows:
+        flush()
+    return counters
+
+
+def import_deck(
+    user_id: int,
+    deck_lines: Iterable[str],
+    import_format: str = "csv",
+    revlog_lines: Iterable[str] | None = None,
+    subject_id: int | None = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: ProgressCallback | None = None,
+) -> dict:
+    """Import a deck (and optionally its review history) in one transaction.
+
+    `deck_lines` and `revlog_lines` are text streams opened with
+    `newline=""`. Invalid and duplicate rows are skipped and reported;
+    `DeckImportError` aborts the whole import. `progress(stage, count)` is
+    called after every inserted chunk.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise DeckImportError(f"Unknown import format: {import_format}")
+    started = time.perf_counter()
+    progress = progress or (lambda stage, count: None)
+    report = _Report()
+    try:
+        subject = None
+        if subject_id is not None:
+            subject = Subject.query.filter_by(id=subject_id, user_id=user_id).first()
+            if subject is None:
+                raise DeckImportError("Subject not found")
+
+        sourced = _import_cards(
+            user_id, deck_lines, import_format, subject, chunk_size, revlog_lines is not None, report, progress,
+        )
+        cards_replayed = 0
+        if revlog_lines is not None:
+            counters = _import_reviews(user_id, revlog_lines, sourced, chunk_size, report, progress)
+            if counters:
+                db.session.execute(db.update(Card), list(counters.values()))
+                cards_replayed, _ = replay_cards(counters)
+                progress("replay", cards_replayed)
+        if report.counts["cards"]:
+            invalidate_review_queue(user_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        "status": "success",
+        "cards_imported": report.counts["cards"],
+        "duplicates_skipped": report.counts["duplicates"],
+        "invalid_rows": report.counts["invalid_deck"],
+        "reviews_imported": report.counts["reviews"],
+        "reviews_skipped": report.counts["unmatched_reviews"] + report.counts["invalid_revlog"],
+        "cards_replayed": cards_replayed,
+        "errors": report.errors,
+        "duration_seconds": round(time.perf_counter() - started, 2),
+    }
@@ -8,17 +8,25 @@ personnalisée des poids sans historique suffisant et consentement explicite.
 from __future__ import annotations
 
 import math
-from datetime import datetime, timezone
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any
 
 from fsrs import Card as FsrsCard
-from fsrs import Rating, Scheduler
+from fsrs import Rating, Scheduler, State
+from fsrs.scheduler import DEFAULT_PARAMETERS, MAX_DIFFICULTY, MIN_DIFFICULTY, STABILITY_MIN
 
 
 FSRS_VERSION = "fsrs-6.3.2"
 DEFAULT_RETENTION = 0.90
 MIN_RETENTION = 0.80
 MAX_RETENTION = 0.97
+# One entry per (retention, weights, fuzzing) combination actually in use:
+# retentions are bounded and rounded, so the registry stays small.
+SCHEDULER_CACHE_SIZE = 128
+# Four-rating previews of recently displayed cards.
+PREVIEW_CACHE_SIZE = 4096
 
 RATING_BY_NAME = {
     "again": Rating.Again,
@@ -64,6 +72,52 @@ def normalize_rating(data: dict[str, Any]) -> tuple[str, Rating]:
     return "easy", Rating.Easy
 
 
+@lru_cache(maxsize=SCHEDULER_CACHE_SIZE)
+def _cached_scheduler(
+    desired_retention: float,
+    parameters: tuple[float, ...],
+    enable_fuzzing: bool,
+    fsrs_version: str,
+) -> Scheduler:
+    # `fsrs_version` only takes part in the key: a library upgrade must never
+    # reuse a scheduler built under another version within the same process.
+    return Scheduler(
+        parameters=parameters,
+        desired_retention=desired_retention,
+        enable_fuzzing=enable_fuzzing,
+    )
+
+
+def get_scheduler(
+    desired_retention: Any,
+    parameters: Sequence[float] | None = None,
+    enable_fuzzing: bool = False,
+) -> Scheduler:
+    """Return a shared, thread-safe scheduler for one configuration.
+
+    Schedulers are read-only once built, so a single instance can serve every
+    review with the same retention, weights and fuzzing flag.
+    """
+    retention = round(normalize_desired_retention(desired_retention), 4)
+    weights = tuple(float(weight) for weight in parameters) if parameters else DEFAULT_PARAMETERS
+    return _cached_scheduler(retention, weights, bool(enable_fuzzing), FSRS_VERSION)
+
+
+def scheduler_cache_info() -> dict[str, int]:
+    """Expose registry counters for monitoring and benchmarks."""
+    info = _cached_scheduler.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def clear_scheduler_cache() -> None:
+    _cached_scheduler.cache_clear()
+
+
 def _to_utc(value: datetime) -> datetime:
     if value.tzinfo is None:
         return value.replace(tzinfo=timezone.utc)
@@ -74,7 +128,116 @@ def _to_naive_utc(value: datetime) -> datetime:
     return _to_utc(value).replace(tzinfo=None)
 
 
-def _load_fsrs_card(scheduler_state: str | None) -> FsrsCard:
+def card_from_memory_state(
+    card_id: int,
+    state: int | None = None,
+    step: int | None = None,
+    stability: float | None = None,
+    difficulty: float | None = None,
+    due: datetime | None = None,
+    last_review: datetime | None = None,
+) -> FsrsCard:
+    """Rebuild an FSRS card from typed columns; no state means a new card."""
+    if state is None:
+        return FsrsCard(card_id=card_id, due=_to_utc(due) if due else None)
+    return FsrsCard(
+        card_id=card_id,
+        state=State(state),
+        step=step,
+        stability=stability,
+        difficulty=difficulty,
+        due=_to_utc(due) if due else None,
+        last_review=_to_utc(last_review) if last_review else None,
+    )
+
+
+def memory_state_from_sm2(
+    interval_days: float,
+    easiness_factor: float,
+    parameters: Sequence[float] | None = None,
+    sm2_retention: float = DEFAULT_RETENTION,
+) -> tuple[float, float]:
+    """Seed FSRS (stability, difficulty) from an SM-2 interval and ease factor.
+
+    Same conversion as the reference FSRS implementation: the SM-2 interval
+    is read as the delay that reached `sm2_retention`, and the difficulty is
+    the one for which FSRS would grow that stability by the SM-2 ease factor.
+    """
+    weights = DEFAULT_PARAMETERS if parameters is None else parameters
+    decay = -weights[20]
+    factor = 0.9 ** (1 / decay) - 1
+    stability = max(float(interval_days), STABILITY_MIN) * factor / (sm2_retention ** (1 / decay) - 1)
+    growth = (
+        math.exp(weights[8]) * stability ** -weights[9] * math.expm1((1 - sm2_retention) * weights[10])
+    )
+    difficulty = 11 - (float(easiness_factor) - 1) / growth
+    return stability, min(MAX_DIFFICULTY, max(MIN_DIFFICULTY, difficulty))
+
+
+def card_from_sm2(
+    card_id: int,
+    interval: int | None,
+    easiness_factor: float | None,
+    review_count: int | None,
+    last_reviewed: datetime | None,
+    next_review: datetime | None,
+) -> FsrsCard:
+    """Convert a legacy SM-2 card; a card never reviewed starts as new."""
+    if not review_count:
+        return card_from_memory_state(card_id, due=next_review)
+    interval = max(1, interval or 1)
+    stability, difficulty = memory_state_from_sm2(interval, easiness_factor or 2.5)
+    if last_reviewed is None and next_review is not None:
+        last_reviewed = next_review - timedelta(days=interval)
+    return card_from_memory_state(
+        card_id,
+        state=State.Review.value,
+        stability=stability,
+        difficulty=difficulty,
+        due=next_review or last_reviewed,
+        last_review=last_reviewed,
+    )
+
+
+def fsrs_card_for(card: Any) -> FsrsCard | str | None:
+    """Return the scheduling input of a persisted card.
+
+    Typed memory columns are preferred; the JSON state is only read for cards
+    that have not been backfilled yet, and legacy SM-2 cards are seeded from
+    their SM-2 history. Passing the database id also avoids the millisecond
+    pause Py-FSRS takes to generate an id for a brand-new card.
+    """
+    if card.scheduler_type == "sm2" and card.fsrs_state is None and not card.scheduler_state:
+        return card_from_sm2(
+            card.id, card.interval, card.easiness_factor, card.review_count, card.last_reviewed, card.next_review,
+        )
+    if card.fsrs_state is not None or not card.scheduler_state:
+        return card_from_memory_state(
+            card.id,
+            state=card.fsrs_state,
+            step=card.fsrs_step,
+            stability=card.fsrs_stability,
+            difficulty=card.fsrs_difficulty,
+            due=card.next_review,
+            last_review=card.fsrs_last_review,
+        )
+    return card.scheduler_state
+
+
+def memory_state_columns(fsrs_card: FsrsCard) -> dict[str, Any]:
+    """Map an FSRS card onto the typed memory columns of `Card`."""
+    return {
+        "fsrs_state": int(fsrs_card.state.value),
+        "fsrs_step": fsrs_card.step,
+        "fsrs_stability": fsrs_card.stability,
+        "fsrs_difficulty": fsrs_card.difficulty,
+        "fsrs_last_review": _to_naive_utc(fsrs_card.last_review) if fsrs_card.last_review else None,
+    }
+
+
+def _load_fsrs_card(scheduler_state: FsrsCard | str | None) -> FsrsCard:
+    if isinstance(scheduler_state, FsrsCard):
+        return scheduler_state
     if scheduler_state:
         try:
             return FsrsCard.from_json(scheduler_state)
@@ -86,25 +249,39 @@ def _load_fsrs_card(scheduler_state: str | None) -> FsrsCard:
 
 
 def review_with_fsrs(
-    scheduler_state: str | None,
+    scheduler_state: FsrsCard | str | None,
     rating: Rating,
     desired_retention: Any,
+    reviewed_at: datetime | None = None,
+    parameters: Sequence[float] | None = None,
 ) -> dict[str, Any]:
-    """Schedule a review and expose auditable values for persistence/UI."""
+    """Schedule a review and expose auditable values for persistence/UI.
+
+    `scheduler_state` is either an FSRS card rebuilt from typed columns or a
+    legacy JSON state. `reviewed_at` lets offline clients replay a review at
+    the moment it really happened; naive datetimes are interpreted as UTC.
+    `parameters` are the learner's consented, offline-fitted weights; the
+    default FSRS weights are used when they are absent.
+    """
     retention = normalize_desired_retention(desired_retention)
     # Fuzzing is disabled so that feedback, tests and audit trails remain
     # deterministic. It may be introduced later as an explicit product choice.
-    scheduler = Scheduler(desired_retention=retention, enable_fuzzing=False)
+    scheduler = get_scheduler(retention, parameters, enable_fuzzing=False)
     current_card = _load_fsrs_card(scheduler_state)
     previous_state = current_card.to_json()
+    review_datetime = _to_utc(reviewed_at) if reviewed_at else datetime.now(timezone.utc)
 
     try:
-        retrievability_before = round(scheduler.get_card_retrievability(current_card), 4)
+        retrievability_before = round(
+            scheduler.get_card_retrievability(current_card, current_datetime=review_datetime), 4,
+        )
     except (ValueError, ZeroDivisionError):
         retrievability_before = None
 
-    updated_card, review_log = scheduler.review_card(current_card, rating)
-    retrievability_after = round(scheduler.get_card_retrievability(updated_card), 4)
+    updated_card, review_log = scheduler.review_card(current_card, rating, review_datetime=review_datetime)
+    retrievability_after = round(
+        scheduler.get_card_retrievability(updated_card, current_datetime=review_datetime), 4,
+    )
     due_at = _to_utc(updated_card.due)
     reviewed_at = _to_utc(review_log.review_datetime)
     delta_seconds = max(0.0, (due_at - reviewed_at).total_seconds())
@@ -116,6 +293,7 @@ def review_with_fsrs(
 
     return {
         "card_state": updated_card.to_json(),
+        "memory_columns": memory_state_columns(updated_card),
         "review_log": review_log.to_json(),
         "previous_state": previous_state,
         "retrievability_before": retrievability_before,
@@ -126,6 +304,7 @@ def review_with_fsrs(
         "scheduled_minutes": scheduled_minutes,
         "scheduled_days_exact": round(delta_seconds / 86400, 4),
         "retention_target": retention,
+        "personalized_parameters": bool(parameters),
         "memory_state": {
             "state": updated_card.state.name.lower(),
             "stability_days": round(updated_card.stability, 2),
@@ -134,6 +313,91 @@ def review_with_fsrs(
     }
 
 
+MemoryKey = tuple[int, int | None, int | None, float | None, float | None, datetime | None]
+
+
+def _memory_key(card: FsrsCard) -> MemoryKey:
+    # The due date does not affect the outcome of a review, so it is left out.
+    return (card.card_id, int(card.state.value), card.step, card.stability, card.difficulty, card.last_review)
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _cached_preview(
+    memory_key: MemoryKey,
+    desired_retention: float,
+    parameters: tuple[float, ...],
+    elapsed_days: int | None,
+) -> tuple[tuple[str, float, float, float], ...]:
+    # Py-FSRS only depends on the review time through the number of whole
+    # elapsed days, so a dummy review at last_review + elapsed_days yields the
+    # same delays as any moment of that day.
+    scheduler = _cached_scheduler(desired_retention, parameters, False, FSRS_VERSION)
+    card_id, state, step, stability, difficulty, last_review = memory_key
+    card = FsrsCard(
+        card_id=card_id, state=State(state), step=step, stability=stability,
+        difficulty=difficulty, last_review=last_review,
+    )
+    if last_review is None:
+        review_datetime = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    else:
+        review_datetime = last_review + timedelta(days=elapsed_days)
+    outcomes = []
+    for rating_name, rating in RATING_BY_NAME.items():
+        updated_card, _ = scheduler.review_card(card, rating, review_datetime=review_datetime)
+        delay = (_to_utc(updated_card.due) - review_datetime).total_seconds()
+        outcomes.append((rating_name, delay, updated_card.stability, updated_card.difficulty))
+    return tuple(outcomes)
+
+
+def preview_ratings(
+    scheduler_state: FsrsCard | str | None,
+    desired_retention: Any,
+    now: datetime | None = None,
+    parameters: Sequence[float] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Return the outcome of each possible rating without reviewing the card.
+
+    The state is loaded once and the four outcomes share one scheduler. They
+    are cached per (card memory state, retention, weights, elapsed whole days),
+    so previewing a card again costs a dictionary lookup until it changes.
+    """
+    retention = round(normalize_desired_retention(desired_retention), 4)
+    weights = tuple(float(weight) for weight in parameters) if parameters else DEFAULT_PARAMETERS
+    current_card = _load_fsrs_card(scheduler_state)
+    review_datetime = _to_utc(now) if now else datetime.now(timezone.utc)
+    elapsed_days = None
+    if current_card.last_review is not None:
+        elapsed_days = max(0, (review_datetime - _to_utc(current_card.last_review)).days)
+
+    preview = {}
+    for rating_name, delay, stability, difficulty in _cached_preview(
+        _memory_key(current_card), retention, weights, elapsed_days,
+    ):
+        scheduled_minutes = math.ceil(max(0.0, delay) / 60)
+        preview[rating_name] = {
+            "due_at": _to_naive_utc(review_datetime + timedelta(seconds=delay)),
+            "scheduled_minutes": scheduled_minutes,
+            "scheduled_days_exact": round(delay / 86400, 4),
+            "label": describe_delay(scheduled_minutes),
+            "stability_days": round(stability, 2),
+            "difficulty": round(difficulty, 2),
+        }
+    return preview
+
+
+def preview_cache_info() -> dict[str, int]:
+    info = _cached_preview.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+def describe_delay(scheduled_minutes: int) -> str:
+    if scheduled_minutes < 1:
+        return "moins d’une minute"
+    if scheduled_minutes < 1440:
+        return f"environ {scheduled_minutes} minute(s)"
+    return f"environ {round(scheduled_minutes / 1440, 1)} jour(s)"
+
+
 def describe_rating(rating_name: str, scheduled_minutes: int) -> dict[str, Any]:
     """Return concise, non-deceptive pedagogical feedback for one review."""
     descriptions = {
@@ -155,11 +419,5 @@ def describe_rating(rating_name: str, scheduled_minutes: int) -> dict[str, Any]:
         },
     }
     feedback = descriptions[rating_name].copy()
-    if scheduled_minutes < 1:
-        delay_label = "moins d’une minute"
-    elif scheduled_minutes < 1440:
-        delay_label = f"environ {scheduled_minutes} minute(s)"
-    else:
-        delay_label = f"environ {round(scheduled_minutes / 1440, 1)} jour(s)"
-    feedback["next_action"] = f"Prochaine récupération prévue dans {delay_label}."
+    feedback["next_action"] = f"Prochaine récupération prévue dans {describe_delay(scheduled_minutes)}."
     return feedback
@@ -0,0 +1,47 @@
+"""Points de reprise des traitements hors ligne.
+
+Un traitement par lots avance un curseur (dernière clé traitée) et l’écrit
+dans la même transaction que le lot lui-même : après un arrêt brutal, le
+curseur et les données restent cohérents et le traitement reprend au lot
+suivant.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from src.models.user import JobCheckpoint, db
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def open_checkpoint(name: str, signature: str = "", restart: bool = False) -> JobCheckpoint:
+    """Return the checkpoint of `name`, reset when asked or when the signature changed."""
+    checkpoint = db.session.get(JobCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name, signature=signature)
+        db.session.add(checkpoint)
+    elif restart or checkpoint.signature != signature:
+        checkpoint.signature = signature
+        checkpoint.cursor = 0
+        checkpoint.processed_items = 0
+        checkpoint.processed_rows = 0
+        checkpoint.started_at = _utcnow_naive()
+        checkpoint.completed_at = None
+    db.session.commit()
+    return checkpoint
+
+
+def advance_checkpoint(checkpoint: JobCheckpoint, cursor: int, items: int, rows: int = 0) -> None:
+    """Record a processed batch; the caller commits it together with the batch."""
+    checkpoint.cursor = cursor
+    checkpoint.processed_items += items
+    checkpoint.processed_rows += rows
+    checkpoint.updated_at = _utcnow_naive()
+
+
+def complete_checkpoint(checkpoint: JobCheckpoint) -> None:
+    checkpoint.completed_at = _utcnow_naive()
+    db.session.commit()
@@ -0,0 +1,45 @@
+"""Curseurs opaques pour la pagination par clé (keyset).
+
+Un curseur encode la clé de tri du dernier élément servi (par exemple
+(`next_review`, `id`)) ; la page suivante reprend strictement après cette clé.
+Le coût d’une page ne dépend donc pas de sa position dans la collection, et
+une insertion ou une suppression entre deux pages ne décale ni ne répète
+aucun élément. Le jeton est en base64 URL : les clients le renvoient tel quel.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination token is malformed or belongs to another listing."""
+
+
+def encode_cursor(kind: str, *values) -> str:
+    """Encode the sort key of the last returned row of a `kind` listing."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps({"k": kind, "v": payload}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, kind: str) -> list:
+    """Decode a token produced by `encode_cursor` for the same `kind`."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+    if not isinstance(payload, dict) or payload.get("k") != kind or not isinstance(payload.get("v"), list):
+        raise InvalidCursor("Invalid pagination cursor")
+    return payload["v"]
+
+
+def parse_cursor_datetime(value) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
@@ -0,0 +1,201 @@
+"""Optimisation hors ligne des poids FSRS personnels.
+
+Le travail ne s’exécute jamais pendant une requête : il est lancé par la
+commande `flask fsrs optimize-parameters`. Seuls les profils dont
+l’apprenant a explicitement accepté la personnalisation sont traités, et
+uniquement avec un historique suffisant.
+
+Chaque ajustement tourne dans un processus séparé (pool borné) et son
+résultat est enregistré dès qu’il est disponible. Un profil n’est réajusté que
+si de nouvelles revues sont arrivées depuis le dernier ajustement : une
+exécution interrompue reprend donc là où elle s’était arrêtée.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from fsrs import Scheduler
+
+from src.models.user import AdaptiveLearningProfile, Card, ReviewLog, db
+from src.services.fsrs_scheduler import RATING_BY_NAME
+from src.services.user_settings import invalidate_user_settings
+
+
+logger = logging.getLogger(__name__)
+
+# Seuil habituel de l’écosystème FSRS en dessous duquel les poids par défaut
+# prédisent mieux que des poids ajustés.
+MIN_REVIEWS_FOR_OPTIMIZATION = 400
+# Nouvelles revues nécessaires avant de réajuster un profil déjà traité.
+MIN_NEW_REVIEWS_FOR_REFIT = 200
+
+FitFunction = Callable[[list[dict]], Sequence[float]]
+
+
+class OptimizerUnavailable(RuntimeError):
+    """The optional FSRS optimizer dependencies (torch, pandas) are missing."""
+
+
+def default_worker_count() -> int:
+    """Leave at least one core to the web workers sharing the machine."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def optimizer_available() -> bool:
+    return all(importlib.util.find_spec(name) is not None for name in ("torch", "pandas"))
+
+
+def _limit_worker_threads() -> None:
+    # Un processus = un cœur : sans cette borne, chaque worker PyTorch
+    # lancerait autant de threads que de cœurs disponibles.
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = "1"
+
+
+def fit_parameters(review_logs: list[dict]) -> list[float]:
+    """Fit FSRS weights from serialized review logs (runs in a worker)."""
+    from fsrs import Optimizer
+    from fsrs import ReviewLog as FsrsReviewLog
+
+    logs = [FsrsReviewLog.from_dict(review_log) for review_log in review_logs]
+    return Optimizer(logs).compute_optimal_parameters()
+
+
+def count_reviews_by_profile(user_ids: Iterable[int]) -> dict[tuple[int, str], int]:
+    """Count reviews per (user, domain) with one grouped query."""
+    rows = db.session.execute(
+        db.select(ReviewLog.user_id, Card.learning_domain, db.func.count(ReviewLog.id))
+        .join(Card, ReviewLog.card_id == Card.id)
+        .where(ReviewLog.user_id.in_(list(user_ids)))
+        .group_by(ReviewLog.user_id, Card.learning_domain)
+    ).all()
+    return {(user_id, learning_domain): count for user_id, learning_domain, count in rows}
+
+
+def load_review_logs(user_id: int, domain: str) -> list[dict]:
+    """Serialize one learner’s reviews of one domain for the FSRS optimizer."""
+    rows = db.session.execute(
+        db.select(
+            ReviewLog.card_id,
+            ReviewLog.rating,
+            ReviewLog.reviewed_at,
+            ReviewLog.response_time,
+        )
+        .join(Card, ReviewLog.card_id == Card.id)
+        .where(ReviewLog.user_id == user_id, Card.learning_domain == domain)
+        .order_by(ReviewLog.reviewed_at, ReviewLog.id)
+    ).all()
+    return [
+        {
+            "card_id": row.card_id,
+            "rating": int(RATING_BY_NAME[row.rating]),
+            "review_datetime": row.reviewed_at.replace(tzinfo=timezone.utc).isoformat(),
+            "review_duration": round(row.response_time * 1000) if row.response_time else None,
+        }
+        for row in rows
+        if row.rating in RATING_BY_NAME
+    ]
+
+
+def select_profiles_to_fit(
+    min_reviews: int = MIN_REVIEWS_FOR_OPTIMIZATION,
+    min_new_reviews: int = MIN_NEW_REVIEWS_FOR_REFIT,
+    limit: int | None = None,
+) -> list[tuple[int, int]]:
+    """Return (profile id, review count) pairs that deserve a (re)fit."""
+    profiles = AdaptiveLearningProfile.query.filter_by(
+        personalized_parameters_enabled=True,
+    ).order_by(AdaptiveLearningProfile.id).all()
+    counts = count_reviews_by_profile({profile.user_id for profile in profiles}) if profiles else {}
+
+    selected = []
+    for profile in profiles:
+        review_count = counts.get((profile.user_id, profile.domain), 0)
+        if review_count < min_reviews:
+            continue
+        if profile.fsrs_parameters and review_count - (profile.parameters_review_count or 0) < min_new_reviews:
+            continue
+        selected.append((profile.id, review_count))
+        if limit is not None and len(selected) >= limit:
+            break
+    return selected
+
+
+def _store_parameters(profile_id: int, weights: Sequence[float], review_count: int) -> bool:
+    profile = db.session.get(AdaptiveLearningProfile, profile_id)
+    db.session.refresh(profile)
+    # Le consentement a pu être retiré pendant l’ajustement.
+    if not profile.personalized_parameters_enabled:
+        return False
+    weights = [float(weight) for weight in weights]
+    Scheduler(parameters=weights)  # Rejects out-of-bounds weights (ValueError).
+    profile.fsrs_parameters = json.dumps(weights)
+    profile.parameters_fitted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    profile.parameters_review_count = review_count
+    db.session.commit()
+    invalidate_user_settings(profile.user_id)
+    return True
+
+
+def optimize_profiles(
+    workers: int | None = None,
+    min_reviews: int = MIN_REVIEWS_FOR_OPTIMIZATION,
+    min_new_reviews: int = MIN_NEW_REVIEWS_FOR_REFIT,
+    limit: int | None = None,
+    fit: FitFunction = fit_parameters,
+) -> dict:
+    """Fit every eligible profile in a bounded process pool.
+
+    Must run inside an application context. `fit` must be a picklable,
+    module-level function; it is injectable so that deployments and tests
+    can run without the optional PyTorch dependency.
+    """
+    if fit is fit_parameters and not optimizer_available():
+        raise OptimizerUnavailable('The FSRS optimizer requires: pip install "fsrs[optimizer]"')
+
+    started = time.perf_counter()
+    workers = max(1, workers or default_worker_count())
+    pending = select_profiles_to_fit(min_reviews, min_new_reviews, limit)
+    summary = {"eligible": len(pending), "fitted": 0, "skipped": 0, "failed": 0}
+
+    # "spawn" : les workers n’héritent ni des connexions SQL ni des threads
+    # du processus parent ; ils ne reçoivent que des journaux sérialisés.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_limit_worker_threads) as pool:
+        running: dict[Future, tuple[int, int]] = {}
+        queue = iter(pending)
+        while True:
+            # Deux tâches en attente par worker : les journaux ne sont chargés
+            # en mémoire que pour les profils sur le point d’être traités.
+            for profile_id, review_count in queue:
+                profile = db.session.get(AdaptiveLearningProfile, profile_id)
+                logs = load_review_logs(profile.user_id, profile.domain)
+                db.session.rollback()  # Ne garde pas de transaction ouverte pendant l’ajustement.
+                running[pool.submit(fit, logs)] = (profile_id, review_count)
+                if len(running) >= 2 * workers:
+                    break
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                profile_id, review_count = running.pop(future)
+                try:
+                    stored = _store_parameters(profile_id, future.result(), review_count)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("FSRS optimization failed for profile %s", profile_id)
+                    summary["failed"] += 1
+                    continue
+                summary["fitted" if stored else "skipped"] += 1
+
+    summary["duration_seconds"] = round(time.perf_counter() - started, 2)
+    return summary
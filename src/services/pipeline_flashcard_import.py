@@ -5,6 +5,7 @@ Service d'importation des flashcards depuis le pipeline d'apprentissage
 
 from datetime import datetime
 from src.models.user import db, Subject, Concept, Card
+from src.services.review_queue import invalidate_review_queue
 
 
 def import_pipeline_flashcards(user_id: int, payload: dict) -> dict:
@@ -111,6 +112,8 @@ def import_pipeline_flashcards(user_id: int, payload: dict) -> dict:
         saved_count += 1
 
     try:
+        if created_card_ids:
+            invalidate_review_queue(user_id)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,147 @@
+"""Versions par apprenant des ressources peu changeantes, pour les GET conditionnels.
+
+Les réglages de rétention (`/settings`, `/adaptive-profiles`) et les parcours
+(`/mastery/get-subjects`) changent rarement mais sont relus à chaque écran.
+Chaque apprenant porte un compteur par ressource, incrémenté dans la
+transaction même qui modifie ses lignes : un écouteur `after_flush` repère les
+`Subject`, `Concept`, `AdaptiveLearningProfile` et rétentions globales
+touchés, quelle que soit la route ou la commande à l’origine de l’écriture.
+L’ETag forte dérive du compteur et du point d’accès : deux routes qui servent
+la même ressource sous des corps différents n’ont jamais la même ETag. Un
+`If-None-Match` à jour reçoit un 304 après une seule lecture de clé primaire,
+sans construire la réponse.
+
+Le compteur `cards` suit l’échéancier des cartes (création, suppression,
+échéance ou difficulté modifiées) ; les écritures en bloc qui contournent
+l’ORM l’incrémentent avec `bump_resource_version`. Les caches de processus
+(calendrier des révisions) le revérifient avant de servir une entrée.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import defaultdict
+from functools import wraps
+
+from flask import Response, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.models.user import AdaptiveLearningProfile, Card, Concept, Subject, User, db
+
+
+SETTINGS = "settings"
+SUBJECTS = "subjects"
+CARDS = "cards"
+VERSION_COLUMNS = {SETTINGS: "settings_version", SUBJECTS: "subjects_version", CARDS: "cards_version"}
+VERSIONED_MODELS = (Subject, Concept, AdaptiveLearningProfile)
+SCHEDULE_FIELDS = ("next_review", "difficulty")
+
+_user_table = User.__table__
+_subject_table = Subject.__table__
+
+
+def content_etag(payload) -> str:
+    """Strong ETag of a JSON-serialisable payload that only changes on deploy."""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def resource_version(user_id: int, resource: str) -> int | None:
+    """Return the learner’s current version of `resource` (one primary-key read)."""
+    return db.session.scalar(
+        db.select(_user_table.c[VERSION_COLUMNS[resource]]).where(_user_table.c.id == user_id)
+    )
+
+
+def bump_resource_version(resource: str, user_id: int | None = None) -> None:
+    """Increment `resource` for one learner (or everyone) in the current transaction."""
+    column = _user_table.c[VERSION_COLUMNS[resource]]
+    statement = _user_table.update().values({column: column + 1})
+    if user_id is not None:
+        statement = statement.where(_user_table.c.id == user_id)
+    db.session.execute(statement)
+
+
+def resource_etag(user_id: int, resource: str, representation: str) -> str | None:
+    """Return the learner’s current ETag for one `representation` of `resource`, or None if unknown."""
+    version = resource_version(user_id, resource)
+    return None if version is None else f"{resource}-{representation}-{user_id}-{version}"
+
+
+def not_modified(etag: str) -> Response | None:
+    """Answer 304 when the client already holds `etag`."""
+    if not request.if_none_match.contains(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    # Réponses propres à l’apprenant : revalidées à chaque affichage.
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Authorization")
+    return response
+
+
+def conditional_on(resource: str):
+    """Serve a JWT-protected GET view conditionally on the learner’s `resource` version."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = resource_etag(int(get_jwt_identity()), resource, request.endpoint)
+            if etag is None:
+                return view(*args, **kwargs)
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            response = make_response(view(*args, **kwargs))
+            return with_etag(response, etag) if response.status_code == 200 else response
+        return wrapper
+    return decorator
+
+
+def _touched_resources(session) -> tuple[dict[str, set[int]], set[int]]:
+    user_ids: dict[str, set[int]] = defaultdict(set)
+    concept_subject_ids: set[int] = set()
+    new, dirty = session.new, session.dirty
+    for instance in (*new, *dirty, *session.deleted):
+        if isinstance(instance, User):
+            if instance not in new and inspect(instance).attrs.desired_retention.history.has_changes():
+                user_ids[SETTINGS].add(instance.id)
+            continue
+        if isinstance(instance, Card):
+            state = inspect(instance)
+            if instance not in dirty or any(state.attrs[key].history.has_changes() for key in SCHEDULE_FIELDS):
+                user_ids[CARDS].add(instance.user_id)
+            continue
+        if not isinstance(instance, VERSIONED_MODELS):
+            continue
+        if instance in dirty and not session.is_modified(instance):
+            continue
+        if isinstance(instance, Subject):
+            user_ids[SUBJECTS].add(instance.user_id)
+        elif isinstance(instance, Concept):
+            concept_subject_ids.add(instance.subject_id)
+        else:
+            user_ids[SETTINGS].add(instance.user_id)
+    return user_ids, concept_subject_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_resource_versions(session, flush_context) -> None:
+    user_ids, concept_subject_ids = _touched_resources(session)
+    if concept_subject_ids:
+        user_ids[SUBJECTS].update(session.connection().execute(
+            db.select(_subject_table.c.user_id).where(_subject_table.c.id.in_(concept_subject_ids))
+        ).scalars())
+    for resource, ids in user_ids.items():
+        ids.discard(None)
+        if not ids:
+            continue
+        column = _user_table.c[VERSION_COLUMNS[resource]]
+        session.connection().execute(
+            _user_table.update().where(_user_table.c.id.in_(ids)).values({column: column + 1})
+        )
@@ -0,0 +1,185 @@
+"""Récupérabilité FSRS vectorisée pour une collection entière.
+
+Le calcul reprend exactement la courbe d’oubli de Py-FSRS
+(`Scheduler.get_card_retrievability`) mais sur des colonnes NumPy : une seule
+passe suffit pour classer ou résumer toutes les cartes d’un apprenant, sans
+reconstruire un objet FSRS par carte. Les colonnes proviennent des champs
+typés `fsrs_stability` et `fsrs_last_review` ; la lecture du JSON reste
+disponible pour les états sérialisés (audit, imports).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import datetime
+
+import numpy as np
+from fsrs.scheduler import DEFAULT_PARAMETERS
+from sqlalchemy import Integer, case, cast, event, func
+from sqlalchemy.engine import Engine
+
+from src.models.user import Card, db
+
+
+SECONDS_PER_DAY = 86400
+
+
+def _sqlite_has_math_functions() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("SELECT pow(2, 2)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+_SQLITE_HAS_MATH = _sqlite_has_math_functions()
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_pow(dbapi_connection, connection_record) -> None:
+    # Les fonctions mathématiques de SQLite sont optionnelles à la compilation.
+    if not _SQLITE_HAS_MATH and isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("pow", 2, math.pow, deterministic=True)
+
+
+def forgetting_curve(parameters: Sequence[float] | None = None) -> tuple[float, float]:
+    """Return the (decay, factor) pair of the FSRS power forgetting curve."""
+    weights = DEFAULT_PARAMETERS if parameters is None else parameters
+    decay = -float(weights[20])
+    return decay, 0.9 ** (1 / decay) - 1
+
+
+def _epoch_seconds(value: datetime) -> float:
+    # Les horodatages du schéma sont en UTC naïf : on évite toute conversion locale.
+    return (value.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
+
+
+def compute_retrievability(
+    stability: np.ndarray,
+    last_review: np.ndarray,
+    now: datetime,
+    parameters: Sequence[float] | None = None,
+) -> np.ndarray:
+    """Compute the recall probability of every card in one pass.
+
+    `stability` is in days and `last_review` in UTC epoch seconds; NaN marks a
+    card that was never reviewed, whose retrievability is NaN as well so that
+    averages only describe cards with a memory state.
+    """
+    decay, factor = forgetting_curve(parameters)
+    stability = np.asarray(stability, dtype=np.float64)
+    last_review = np.asarray(last_review, dtype=np.float64)
+    # FSRS compte des jours entiers écoulés, comme `timedelta.days`.
+    elapsed_days = np.maximum(0.0, np.floor((_epoch_seconds(now) - last_review) / SECONDS_PER_DAY))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        retrievability = (1 + factor * elapsed_days / stability) ** decay
+    retrievability[~(stability > 0)] = np.nan
+    return retrievability
+
+
+def retrievability_expression(now: datetime, dialect_name: str, parameters: Sequence[float] | None = None):
+    """SQL counterpart of `compute_retrievability`, NULL for never-reviewed cards.
+
+    Lets aggregates (per-domain averages) run in the database instead of
+    reading one row per card.
+    """
+    decay, factor = forgetting_curve(parameters)
+    if dialect_name == "sqlite":
+        # CAST tronque vers zéro, ce qui vaut `floor` une fois la valeur bornée à 0.
+        elapsed = cast(func.julianday(now) - func.julianday(Card.fsrs_last_review), Integer)
+    else:
+        elapsed = func.floor(func.extract("epoch", now - Card.fsrs_last_review) / SECONDS_PER_DAY)
+    elapsed_days = case((elapsed > 0, elapsed), else_=0)
+    return case(
+        (
+            (Card.fsrs_stability > 0) & Card.fsrs_last_review.is_not(None),
+            func.pow(1 + factor * elapsed_days / Card.fsrs_stability, decay),
+        ),
+    )
+
+
+def retention_gap(retrievability: np.ndarray, desired_retention: np.ndarray | float) -> np.ndarray:
+    """Return how far each card has fallen below its retention target."""
+    return np.asarray(desired_retention, dtype=np.float64) - retrievability
+
+
+def memory_arrays_from_states(states: Iterable[str | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Extract (stability, last_review) columns from serialized FSRS states."""
+    stability = []
+    last_review = []
+    for state in states:
+        try:
+            payload = json.loads(state) if state else None
+        except ValueError:
+            payload = None
+        if not payload or not payload.get("stability") or not payload.get("last_review"):
+            stability.append(np.nan)
+            last_review.append(np.nan)
+            continue
+        stability.append(float(payload["stability"]))
+        last_review.append(_epoch_seconds(datetime.fromisoformat(payload["last_review"])))
+    return np.asarray(stability, dtype=np.float64), np.asarray(last_review, dtype=np.float64)
+
+
+def memory_arrays_from_columns(
+    stabilities: Iterable[float | None],
+    last_reviews: Iterable[datetime | None],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Build (stability, last_review) columns from typed `Card` values."""
+    stability = np.array(list(stabilities), dtype=np.float64)
+    reviewed = np.array(list(last_reviews), dtype="datetime64[us]")
+    last_review = reviewed.astype(np.int64) / 1e6
+    last_review[np.isnat(reviewed)] = np.nan
+    return stability, last_review
+
+
+def cards_retrievability(
+    cards: Sequence[Card],
+    now: datetime,
+    domain_parameters: Mapping[str, Sequence[float] | None] | None = None,
+) -> np.ndarray:
+    """Retrievability aligned with already loaded ORM cards.
+
+    `domain_parameters` maps a `learning_domain` to the FSRS weights its cards
+    are scheduled with; missing domains use the default weights.
+    """
+    stability, last_review = memory_arrays_from_columns(
+        [card.fsrs_stability for card in cards],
+        [card.fsrs_last_review for card in cards],
+    )
+    if not domain_parameters:
+        return compute_retrievability(stability, last_review, now)
+    domains = np.array([card.learning_domain for card in cards], dtype=object)
+    retrievability = np.empty(len(cards), dtype=np.float64)
+    # Une passe par domaine : chaque domaine a sa propre courbe d’oubli.
+    for domain in set(domains.tolist()):
+        selected = domains == domain
+        retrievability[selected] = compute_retrievability(
+            stability[selected], last_review[selected], now, domain_parameters.get(domain),
+        )
+    return retrievability
+
+
+def load_user_retrievability(user_id: int, now: datetime) -> tuple[np.ndarray, np.ndarray]:
+    """Return (card ids, retrievability) for a whole collection without ORM objects."""
+    rows = db.session.execute(
+        db.select(Card.id, Card.fsrs_stability, Card.fsrs_last_review).where(Card.user_id == user_id)
+    ).all()
+    card_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    stability, last_review = memory_arrays_from_columns(
+        [row[1] for row in rows], [row[2] for row in rows],
+    )
+    return card_ids, compute_retrievability(stability, last_review, now)
+
+
+def rounded_or_none(value: float, digits: int = 4) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def mean_retrievability(retrievability: np.ndarray) -> float | None:
+    """Average over reviewed cards only, or None when none has a memory state."""
+    reviewed = retrievability[~np.isnan(retrievability)]
+    return round(float(reviewed.mean()), 3) if reviewed.size else None
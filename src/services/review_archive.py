@@ -0,0 +1,90 @@
+"""Archivage froid des états d’audit du journal des revues.
+
+Les trois états JSON d’un `ReviewLog` (avant, journal FSRS, après) forment
+l’essentiel de la taille d’une ligne mais ne servent qu’aux audits. Au-delà
+de `REVIEW_LOG_HOT_DAYS`, ils sont compressés (zlib) dans `ReviewLogArchive`
+et remis à NULL dans la table chaude, qui ne garde que les colonnes scalaires
+lues par les analyses, le rejeu et l’optimiseur. `ReviewLog.audit_states`
+relit l’archive à la demande.
+
+Le traitement avance par lots commis séparément et ne sélectionne que les
+lignes non encore archivées : il reprend naturellement après un arrêt.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.models.user import ReviewLog, ReviewLogArchive, db
+
+
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+AUDIT_STATE_COLUMNS = ("previous_state", "review_log", "next_state")
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def archive_review_logs(
+    older_than_days: int,
+    batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+    now: datetime | None = None,
+) -> dict:
+    """Move the audit states of logs older than `older_than_days` to the archive."""
+    started = time.perf_counter()
+    now = now or _utcnow_naive()
+    cutoff = now - timedelta(days=older_than_days)
+    last_id = archived = raw_bytes = stored_bytes = 0
+    while True:
+        rows = db.session.execute(
+            db.select(ReviewLog.id, *(getattr(ReviewLog, column) for column in AUDIT_STATE_COLUMNS))
+            .where(ReviewLog.id > last_id, ReviewLog.reviewed_at < cutoff, ReviewLog.next_state.is_not(None))
+            .order_by(ReviewLog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        archive_rows = []
+        for row in rows:
+            states = dict(zip(AUDIT_STATE_COLUMNS, row[1:]))
+            blob = ReviewLogArchive.compress(states)
+            raw_bytes += sum(len(value or "") for value in states.values())
+            stored_bytes += len(blob)
+            archive_rows.append({"review_log_id": row.id, "states_blob": blob, "archived_at": now})
+        db.session.execute(db.insert(ReviewLogArchive), archive_rows)
+        db.session.execute(
+            db.update(ReviewLog)
+            .where(ReviewLog.id.in_([row.id for row in rows]))
+            .values(dict.fromkeys(AUDIT_STATE_COLUMNS))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        last_id = rows[-1].id
+        archived += len(rows)
+
+    return {
+        "archived": archived,
+        "cutoff": cutoff.isoformat(),
+        "raw_bytes": raw_bytes,
+        "compressed_bytes": stored_bytes,
+        "duration_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def restore_review_logs(batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> int:
+    """Move archived states back into the hot table (before a downgrade)."""
+    restored = 0
+    while True:
+        archives = ReviewLogArchive.query.order_by(ReviewLogArchive.review_log_id).limit(batch_size).all()
+        if not archives:
+            return restored
+        db.session.execute(
+            db.update(ReviewLog),
+            [{"id": archive.review_log_id, **archive.states()} for archive in archives],
+        )
+        for archive in archives:
+            db.session.delete(archive)
+        db.session.commit()
+        restored += len(archives)
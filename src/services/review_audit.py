@@ -0,0 +1,54 @@
+"""Écriture dédupliquée de la chaîne d’audit FSRS.
+
+L’état `previous_state` d’une revue est, octet pour octet, le `next_state` de
+la revue précédente de la même carte. Chaque nouveau journal référence donc ce
+maillon (`previous_log_id`) au lieu de recopier l’état, qui n’est stocké
+qu’une fois ; `ReviewLog.audit_states` le reconstitue à la lecture. L’état est
+conservé en clair lorsque la chaîne est rompue (première revue, état réécrit
+par un rejeu ou une conversion SM-2, maillon précédent déjà archivé).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import func
+
+from src.models.user import ReviewLog, db
+
+
+def chained_review_logs(log_rows: list[dict]) -> list[ReviewLog]:
+    """Build the `ReviewLog` rows of a batch, storing each FSRS state once.
+
+    `log_rows` are in application order; a card reviewed several times in
+    the batch chains to its own earlier log. One query reads the latest
+    stored link of every card.
+    """
+    card_ids = {row["card_id"] for row in log_rows}
+    latest_ids = (
+        db.select(func.max(ReviewLog.id))
+        .where(ReviewLog.card_id.in_(card_ids))
+        .group_by(ReviewLog.card_id)
+    )
+    stored_links = {
+        row.card_id: row
+        for row in db.session.execute(
+            db.select(ReviewLog.id, ReviewLog.card_id, ReviewLog.next_state).where(ReviewLog.id.in_(latest_ids))
+        )
+    }
+
+    logs = []
+    batch_links: dict[int, ReviewLog] = {}
+    for row in log_rows:
+        log = ReviewLog(**row)
+        previous = batch_links.get(row["card_id"])
+        if previous is not None:
+            if previous.next_state == row["previous_state"]:
+                log.previous_log = previous
+                log.previous_state = None
+        else:
+            stored = stored_links.get(row["card_id"])
+            if stored is not None and stored.next_state == row["previous_state"]:
+                log.previous_log_id = stored.id
+                log.previous_state = None
+        batch_links[row["card_id"]] = log
+        logs.append(log)
+    return logs
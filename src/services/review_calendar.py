@@ -0,0 +1,91 @@
+"""Calendrier des révisions prévues, calculé en une seule requête agrégée.
+
+Les échéances sont regroupées par jour (`date()` existe sous SQLite comme sous
+PostgreSQL) et par difficulté déclarée : l’horizon de 60 jours coûte une
+requête, sans charger une seule carte. Le résultat est gardé en mémoire par
+apprenant jusqu’à sa prochaine revue ou création de carte, dans un cache LRU
+borné. Chaque entrée porte le `cards_version` de l’apprenant, lu avant le
+calcul et revérifié par une lecture de clé primaire : une revue traitée par un
+autre processus invalide donc aussi l’entrée de celui-ci.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time as day_start, timedelta
+
+from sqlalchemy import func
+
+from src.models.user import Card, db
+from src.services.resource_versions import CARDS, resource_version
+
+
+CALENDAR_DIFFICULTIES = ("easy", "medium", "hard")
+CALENDAR_CACHE_MAX_USERS = 10_000
+
+_calendars: OrderedDict[int, tuple[int | None, tuple[date, int], dict[str, dict]]] = OrderedDict()
+_calendars_lock = threading.Lock()
+
+
+def _bucket_key(value) -> str:
+    # SQLite renvoie le jour sous forme de texte, PostgreSQL sous forme de date.
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _load_calendar(user_id: int, start: date, days: int) -> dict[str, dict]:
+    day = func.date(Card.next_review)
+    rows = db.session.execute(
+        db.select(day, Card.difficulty, func.count())
+        .where(
+            Card.user_id == user_id,
+            Card.next_review >= datetime.combine(start, day_start.min),
+            Card.next_review < datetime.combine(start + timedelta(days=days), day_start.min),
+        )
+        .group_by(day, Card.difficulty)
+    ).all()
+
+    calendar = {
+        (start + timedelta(days=offset)).isoformat(): {
+            "cards_due": 0,
+            "difficulty_distribution": dict.fromkeys(CALENDAR_DIFFICULTIES, 0),
+        }
+        for offset in range(days)
+    }
+    for bucket, difficulty, count in rows:
+        entry = calendar.get(_bucket_key(bucket))
+        if entry is None:
+            continue
+        entry["cards_due"] += count
+        if difficulty in entry["difficulty_distribution"]:
+            entry["difficulty_distribution"][difficulty] += count
+    return calendar
+
+
+def review_calendar(user_id: int, start: date, days: int) -> dict[str, dict]:
+    """Return cards due per day over `days` days from `start`, by difficulty."""
+    key = (start, days)
+    # Lue avant le calcul : une écriture concurrente rendra l’entrée périmée.
+    version = resource_version(user_id, CARDS)
+    with _calendars_lock:
+        cached = _calendars.get(user_id)
+        if cached and cached[:2] == (version, key):
+            _calendars.move_to_end(user_id)
+            return cached[2]
+
+    calendar = _load_calendar(user_id, start, days)
+    with _calendars_lock:
+        _calendars[user_id] = (version, key, calendar)
+        _calendars.move_to_end(user_id)
+        while len(_calendars) > CALENDAR_CACHE_MAX_USERS:
+            _calendars.popitem(last=False)
+    return calendar
+
+
+def invalidate_review_calendar(user_id: int | None = None) -> None:
+    """Forget cached calendars (one learner, or everyone after a bulk job)."""
+    with _calendars_lock:
+        if user_id is None:
+            _calendars.clear()
+        else:
+            _calendars.pop(user_id, None)
@@ -0,0 +1,156 @@
+"""Export en flux de l’historique des revues d’un apprenant.
+
+L’historique complet (`ReviewLog`) est lu par lots (`yield_per` : curseur
+côté serveur sous PostgreSQL) et sérialisé lot par lot, en NDJSON (une revue
+JSON par ligne) ou en CSV au format `revlog` des optimiseurs FSRS externes.
+Rien n’est accumulé : la mémoire du processus reste bornée par la taille
+d’un lot et les premiers octets partent avant la fin de la lecture.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterator
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import aliased
+
+from src.models.user import Card, ReviewLog, ReviewLogArchive, db
+from src.services.fsrs_scheduler import RATING_BY_NAME
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Colonnes `revlog` des optimiseurs FSRS : horodatage et durée en millisecondes.
+OPTIMIZER_CSV_COLUMNS = ("card_id", "review_time", "review_rating", "review_duration")
+
+
+def _utc_isoformat(value: datetime | None) -> str | None:
+    return value.replace(tzinfo=timezone.utc).isoformat() if value else None
+
+
+def _audit_states(row) -> dict:
+    # Même résolution que `ReviewLog.audit_states`, à partir des colonnes jointes.
+    if row.next_state is None and row.states_blob is not None:
+        states = ReviewLogArchive.decompress(row.states_blob)
+    else:
+        states = {"previous_state": row.previous_state, "review_log": row.review_log, "next_state": row.next_state}
+    if states["previous_state"] is None and row.previous_log_id is not None:
+        if row.previous_next_state is None and row.previous_states_blob is not None:
+            states["previous_state"] = ReviewLogArchive.decompress(row.previous_states_blob)["next_state"]
+        else:
+            states["previous_state"] = row.previous_next_state
+    return states
+
+
+def _ndjson_chunk(rows, include_states: bool) -> str:
+    lines = []
+    for row in rows:
+        record = {
+            "id": row.id,
+            "card_id": row.card_id,
+            "learning_domain": row.learning_domain,
+            "rating": row.rating,
+            "response_time": row.response_time,
+            "retrievability_before": row.retrievability_before,
+            "scheduled_days": row.scheduled_days,
+            "scheduled_minutes": row.scheduled_minutes,
+            "scheduler_version": row.scheduler_version,
+            "reviewed_at": _utc_isoformat(row.reviewed_at),
+        }
+        if include_states:
+            record.update(_audit_states(row))
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n"
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        rating = RATING_BY_NAME.get(row.rating)
+        if rating is None or row.reviewed_at is None:
+            continue
+        writer.writerow((
+            row.card_id,
+            round(row.reviewed_at.replace(tzinfo=timezone.utc).timestamp() * 1000),
+            int(rating),
+            round(row.response_time * 1000) if row.response_time else None,
+        ))
+    return buffer.getvalue()
+
+
+def _history_statement(user_id: int, domain: str | None, include_states: bool):
+    columns = [
+        ReviewLog.id,
+        ReviewLog.card_id,
+        Card.learning_domain,
+        ReviewLog.rating,
+        ReviewLog.response_time,
+        ReviewLog.retrievability_before,
+        ReviewLog.scheduled_days,
+        ReviewLog.scheduled_minutes,
+        ReviewLog.scheduler_version,
+        ReviewLog.reviewed_at,
+    ]
+    # Jointure externe : les journaux d’une carte supprimée restent exportés.
+    statement = db.select(*columns).outerjoin(Card, ReviewLog.card_id == Card.id)
+    if include_states:
+        previous = aliased(ReviewLog)
+        previous_archive = aliased(ReviewLogArchive)
+        statement = (
+            statement.add_columns(
+                ReviewLog.previous_log_id,
+                ReviewLog.previous_state,
+                ReviewLog.review_log,
+                ReviewLog.next_state,
+                ReviewLogArchive.states_blob,
+                previous.next_state.label("previous_next_state"),
+                previous_archive.states_blob.label("previous_states_blob"),
+            )
+            .outerjoin(ReviewLogArchive, ReviewLogArchive.review_log_id == ReviewLog.id)
+            .outerjoin(previous, previous.id == ReviewLog.previous_log_id)
+            .outerjoin(previous_archive, previous_archive.review_log_id == previous.id)
+        )
+    statement = statement.where(ReviewLog.user_id == user_id)
+    if domain:
+        statement = statement.where(Card.learning_domain == domain)
+    # Servi par l’index (user_id, reviewed_at).
+    return statement.order_by(ReviewLog.reviewed_at, ReviewLog.id)
+
+
+def _stream(statement, export_format: str, include_states: bool, chunk_size: int) -> Iterator[str]:
+    if export_format == "csv":
+        yield ",".join(OPTIMIZER_CSV_COLUMNS) + "\n"
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+    try:
+        for rows in result.partitions():
+            chunk = _csv_chunk(rows) if export_format == "csv" else _ndjson_chunk(rows, include_states)
+            if chunk:
+                yield chunk
+    finally:
+        result.close()
+
+
+def export_review_history(
+    user_id: int,
+    export_format: str = "ndjson",
+    domain: str | None = None,
+    include_states: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Return a lazy iterator of text chunks covering the learner’s review history.
+
+    Reviews come in chronological order. NDJSON records mirror
+    `ReviewLog.to_dict` (plus the card’s domain, UTC timestamps, and the
+    audit states when `include_states` is set); the CSV ignores
+    `include_states`. Nothing is read until the iterator is consumed, which
+    must happen inside the application context.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    statement = _history_statement(user_id, domain, include_states)
+    return _stream(statement, export_format, include_states, chunk_size)
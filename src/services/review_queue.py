@@ -0,0 +1,185 @@
+"""File quotidienne de révision matérialisée par apprenant.
+
+La file est construite une fois par jour (ou à la demande, en début de
+session) : elle contient, triées par (échéance, identifiant), les cartes dues
+avant la fin de la journée UTC. Elle est stockée sous forme compacte
+(identifiants 32 bits et échéances en microsecondes 64 bits) ; les cartes
+déjà dues en forment le préfixe. Une page se lit par clé (`after`) en
+O(log n + taille de page). Chaque revue retire la carte de la file et l’y
+réinsère à sa place si elle redevient due dans la journée (pas
+d’apprentissage). Toute création de carte ou tout changement de rétention
+invalide la file, reconstruite à la requête suivante. Le calendrier des
+révisions, dérivé des mêmes échéances, est invalidé aux mêmes moments.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.models.user import Card, DailyReviewQueue, db
+from src.services.resource_versions import CARDS, bump_resource_version
+from src.services.review_calendar import invalidate_review_calendar
+
+
+ALL_DOMAINS = ""
+_ID_DTYPE = np.dtype("<u4")
+_DUE_DTYPE = np.dtype("<i8")
+_EPOCH = datetime(1970, 1, 1)
+_UPSERT_BUILDERS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def _unpack(blob: bytes) -> np.ndarray:
+    # Vue sans copie : découper une page ne lit que ses propres octets.
+    return np.frombuffer(blob or b"", dtype=_ID_DTYPE)
+
+
+def _due_key(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _unpack_due(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob or b"", dtype=_DUE_DTYPE)
+
+
+def _end_of_day(now: datetime) -> datetime:
+    return datetime.combine(now.date() + timedelta(days=1), time.min)
+
+
+def _packed(card_ids: np.ndarray, due_keys: np.ndarray) -> dict:
+    return {
+        "card_ids": card_ids.astype(_ID_DTYPE).tobytes(),
+        "due_keys": due_keys.astype(_DUE_DTYPE).tobytes(),
+        "size": len(card_ids),
+    }
+
+
+def _store(queue: DailyReviewQueue, card_ids: np.ndarray, due_keys: np.ndarray) -> None:
+    for column, value in _packed(card_ids, due_keys).items():
+        setattr(queue, column, value)
+
+
+def build_review_queue(user_id: int, domain: str, now: datetime) -> DailyReviewQueue:
+    """(Re)build today’s queue of one domain scope; the caller commits."""
+    query = (
+        db.select(Card.id, Card.next_review)
+        .where(Card.user_id == user_id, Card.next_review < _end_of_day(now))
+        .order_by(Card.next_review, Card.id)
+    )
+    if domain != ALL_DOMAINS:
+        query = query.where(Card.learning_domain == domain)
+    rows = db.session.execute(query).all()
+    values = {
+        "queue_date": now.date(),
+        **_packed(
+            np.fromiter((row.id for row in rows), dtype=_ID_DTYPE, count=len(rows)),
+            np.fromiter((_due_key(row.next_review) for row in rows), dtype=_DUE_DTYPE, count=len(rows)),
+        ),
+        "built_at": now,
+        "updated_at": now,
+    }
+    builder = _UPSERT_BUILDERS.get(db.session.get_bind().dialect.name)
+    if builder is None:
+        # Autres moteurs : lecture puis écriture, sous verrou de ligne.
+        queue = DailyReviewQueue.query.filter_by(user_id=user_id, domain=domain).with_for_update().first()
+        if queue is None:
+            queue = DailyReviewQueue(user_id=user_id, domain=domain)
+            db.session.add(queue)
+        for column, value in values.items():
+            setattr(queue, column, value)
+        db.session.flush()
+        return queue
+    # Deux premières requêtes simultanées construisent la même file : la
+    # seconde la réécrit au lieu d’échouer sur la contrainte (user_id, domain).
+    statement = builder(DailyReviewQueue.__table__).values(user_id=user_id, domain=domain, **values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "domain"],
+        set_={column: statement.excluded[column] for column in values},
+    )
+    db.session.execute(statement)
+    return DailyReviewQueue.query.filter_by(user_id=user_id, domain=domain).populate_existing().one()
+
+
+def get_review_queue(user_id: int, domain: str, now: datetime, refresh: bool = False) -> DailyReviewQueue:
+    """Return today’s queue, building it on the first request of the day."""
+    queue = DailyReviewQueue.query.filter_by(user_id=user_id, domain=domain).first()
+    if refresh or queue is None or queue.queue_date != now.date() or queue.due_keys is None:
+        queue = build_review_queue(user_id, domain, now)
+    return queue
+
+
+def _position_after(card_ids: np.ndarray, due_keys: np.ndarray, after: tuple[int, int]) -> int:
+    due_key, card_id = after
+    first = int(np.searchsorted(due_keys, due_key, side="left"))
+    last = int(np.searchsorted(due_keys, due_key, side="right"))
+    return first + int(np.searchsorted(card_ids[first:last], card_id, side="right"))
+
+
+def queue_page(
+    queue: DailyReviewQueue,
+    after: tuple[int, int] | None,
+    limit: int,
+    now: datetime,
+) -> tuple[list[Card], tuple[int, int] | None]:
+    """Load the page of due cards following the (due key, card id) `after`.
+
+    Returns the cards and the key to resume from, or None on the last page.
+    Cards only due later today stay in the queue and are served once due.
+    """
+    card_ids = _unpack(queue.card_ids)
+    due_keys = _unpack_due(queue.due_keys)
+    start = 0 if after is None else _position_after(card_ids, due_keys, after)
+    due_now = int(np.searchsorted(due_keys, _due_key(now), side="right"))
+    stop = min(start + limit, due_now)
+    page_ids = card_ids[start:stop].tolist()
+    if not page_ids:
+        return [], None
+    cards = {
+        card.id: card
+        for card in Card.query.filter(
+            Card.user_id == queue.user_id, Card.id.in_(page_ids),
+        )
+    }
+    next_key = (int(due_keys[stop - 1]), page_ids[-1]) if stop < due_now else None
+    return [cards[card_id] for card_id in page_ids if card_id in cards], next_key
+
+
+def record_reviews(user_id: int, reviewed: Mapping[int, tuple[str, datetime]], now: datetime) -> None:
+    """Maintain today’s queues after reviews; the caller commits.
+
+    `reviewed` maps each card id to its resolved domain and new due date.
+    """
+    if not reviewed:
+        return
+    invalidate_review_calendar(user_id)
+    end_of_day = _end_of_day(now)
+    reviewed_ids = np.fromiter(reviewed, dtype=_ID_DTYPE, count=len(reviewed))
+    queues = DailyReviewQueue.query.filter_by(user_id=user_id, queue_date=now.date()).with_for_update().all()
+    for queue in queues:
+        card_ids = _unpack(queue.card_ids)
+        due_keys = _unpack_due(queue.due_keys)
+        kept = ~np.isin(card_ids, reviewed_ids)
+        due_again = [
+            (card_id, _due_key(next_review)) for card_id, (domain, next_review) in reviewed.items()
+            if next_review < end_of_day and queue.domain in (ALL_DOMAINS, domain)
+        ]
+        card_ids = np.concatenate([card_ids[kept], np.array([item[0] for item in due_again], dtype=_ID_DTYPE)])
+        due_keys = np.concatenate([due_keys[kept], np.array([item[1] for item in due_again], dtype=_DUE_DTYPE)])
+        order = np.lexsort((card_ids, due_keys)) if due_again else slice(None)
+        _store(queue, card_ids[order], due_keys[order])
+
+
+def invalidate_review_queue(user_id: int | None = None) -> None:
+    """Drop materialized queues (one learner, or everyone after a bulk job)."""
+    invalidate_review_calendar(user_id)
+    # Les écritures en bloc contournent l’ORM : les autres processus l’apprennent ainsi.
+    bump_resource_version(CARDS, user_id)
+    query = DailyReviewQueue.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    query.delete(synchronize_session=False)
+
@@ -0,0 +1,240 @@
+"""Rejeu des états FSRS des cartes à partir du journal immuable `ReviewLog`.
+
+Après un changement de `FSRS_VERSION` ou de poids, l’état mémoire de chaque
+carte est recalculé en rejouant ses revues dans l’ordre. Le rejeu avance par
+fenêtres de cartes (pagination par clé) ; les revues d’une fenêtre sont lues
+en flux (`yield_per`) triées par (carte, date), puis les cartes sont mises à
+jour par un UPDATE groupé commis avec le point de reprise. La mémoire reste
+bornée par la taille d’une fenêtre, quel que soit le volume du journal.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import attrgetter
+
+from fsrs import Card as FsrsCard
+from fsrs import Scheduler
+from sqlalchemy import func
+
+from src.models.user import AdaptiveLearningProfile, Card, ReviewLog, ReviewLogArchive, User, db
+from src.services.adaptive_learning import get_effective_retention, get_personalized_parameters
+from src.services.fsrs_scheduler import (
+    DEFAULT_PARAMETERS,
+    FSRS_VERSION,
+    RATING_BY_NAME,
+    get_scheduler,
+    memory_state_columns,
+)
+from src.services.job_checkpoints import advance_checkpoint, complete_checkpoint, open_checkpoint
+from src.services.review_queue import invalidate_review_queue
+
+
+REPLAY_JOB_NAME = "replay-card-states"
+DEFAULT_REPLAY_BATCH_SIZE = 500
+REPLAY_LOG_CHUNK_SIZE = 2000
+
+
+def replay_signature(user_id: int | None = None) -> str:
+    """Identify the scheduler configuration a replay is computed with.
+
+    Besides the FSRS version and default weights, the signature covers every
+    learner’s retention and domain profiles (one learner’s when `user_id` is
+    given): a change of personal weights or retention restarts a completed
+    replay instead of leaving it a no-op.
+    """
+    weights = hashlib.sha1(json.dumps(DEFAULT_PARAMETERS).encode()).hexdigest()[:12]
+    user_filter = [] if user_id is None else [User.id == user_id]
+    profile_filter = [] if user_id is None else [AdaptiveLearningProfile.user_id == user_id]
+    settings = hashlib.sha1()
+    for row in db.session.execute(
+        db.select(User.id, User.desired_retention).where(*user_filter).order_by(User.id)
+    ):
+        settings.update(repr(tuple(row)).encode())
+    for row in db.session.execute(
+        db.select(
+            AdaptiveLearningProfile.user_id,
+            AdaptiveLearningProfile.domain,
+            AdaptiveLearningProfile.desired_retention,
+            AdaptiveLearningProfile.personalized_parameters_enabled,
+            AdaptiveLearningProfile.fsrs_parameters,
+        ).where(*profile_filter).order_by(AdaptiveLearningProfile.user_id, AdaptiveLearningProfile.domain)
+    ):
+        settings.update(repr(tuple(row)).encode())
+    return f"{FSRS_VERSION}:{weights}:{settings.hexdigest()[:12]}"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _replayed_columns(fsrs_card: FsrsCard) -> dict:
+    due = _naive_utc(fsrs_card.due)
+    last_review = _naive_utc(fsrs_card.last_review)
+    interval_minutes = math.ceil(max(0.0, (due - last_review).total_seconds()) / 60)
+    return {
+        "id": fsrs_card.card_id,
+        **memory_state_columns(fsrs_card),
+        "scheduler_type": "fsrs",
+        "scheduler_state": fsrs_card.to_json(),
+        "scheduler_version": FSRS_VERSION,
+        "interval": interval_minutes // 1440,
+        "interval_minutes": interval_minutes,
+        "last_reviewed": last_review,
+        "next_review": due,
+    }
+
+
+def _schedulers_for(card_rows: list) -> dict[int, Scheduler]:
+    """Resolve each card’s scheduler (retention and consented weights) for one window."""
+    user_ids = {row.user_id for row in card_rows}
+    users = {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+    profiles: dict[int, dict] = defaultdict(dict)
+    for profile in AdaptiveLearningProfile.query.filter(AdaptiveLearningProfile.user_id.in_(user_ids)):
+        profiles[profile.user_id][profile.domain] = profile
+
+    schedulers = {}
+    for row in card_rows:
+        user = users[row.user_id]
+        domain = row.learning_domain
+        retention, _ = get_effective_retention(user, domain, profiles[row.user_id])
+        parameters = get_personalized_parameters(user, domain, profiles[row.user_id])
+        schedulers[row.id] = get_scheduler(retention, parameters, enable_fuzzing=False)
+    return schedulers
+
+
+def _seed_cards(card_ids: list[int]) -> dict[int, FsrsCard]:
+    """Return the memory state each card had before its first logged review.
+
+    A card converted from SM-2 (bulk or at its first review) did not start
+    blank: its seed only survives in the first log’s `previous_state`. New
+    cards (never reviewed) are left out and replay from a fresh FSRS card.
+    """
+    first_ids = (
+        db.select(func.min(ReviewLog.id))
+        .where(ReviewLog.card_id.in_(card_ids))
+        .group_by(ReviewLog.card_id)
+    )
+    rows = db.session.execute(
+        db.select(ReviewLog.card_id, ReviewLog.previous_state, ReviewLogArchive.states_blob)
+        .outerjoin(ReviewLogArchive, ReviewLogArchive.review_log_id == ReviewLog.id)
+        .where(ReviewLog.id.in_(first_ids))
+    )
+    seeds = {}
+    for card_id, previous_state, states_blob in rows:
+        if previous_state is None and states_blob is not None:
+            previous_state = ReviewLogArchive.decompress(states_blob)["previous_state"]
+        if not previous_state:
+            continue
+        try:
+            seed = FsrsCard.from_json(previous_state)
+        except (TypeError, ValueError, KeyError):
+            continue
+        if seed.last_review is not None:
+            seed.card_id = card_id
+            seeds[card_id] = seed
+    return seeds
+
+
+def _replay_window(card_ids: list[int], log_filter: list) -> tuple[int, int]:
+    """Replay the logs of sorted `card_ids` and rewrite their states; the caller commits."""
+    card_rows = db.session.execute(
+        db.select(Card.id, Card.user_id, Card.learning_domain).where(Card.id.in_(card_ids))
+    ).all()
+    schedulers = _schedulers_for(card_rows)
+    seeds = _seed_cards(card_ids)
+
+    logs = db.session.execute(
+        db.select(ReviewLog.card_id, ReviewLog.rating, ReviewLog.reviewed_at)
+        .where(ReviewLog.card_id.between(card_ids[0], card_ids[-1]), *log_filter)
+        .order_by(ReviewLog.card_id, ReviewLog.reviewed_at, ReviewLog.id)
+        .execution_options(yield_per=REPLAY_LOG_CHUNK_SIZE)
+    )
+    updates = []
+    log_count = 0
+    for card_id, card_logs in groupby(logs, key=attrgetter("card_id")):
+        scheduler = schedulers.get(card_id)
+        if scheduler is None:  # Journal orphelin : la carte a été supprimée.
+            continue
+        fsrs_card = seeds.get(card_id) or FsrsCard(card_id=card_id)
+        for log in card_logs:
+            rating = RATING_BY_NAME.get(log.rating)
+            if rating is None:
+                continue
+            fsrs_card, _ = scheduler.review_card(
+                fsrs_card, rating, review_datetime=log.reviewed_at.replace(tzinfo=timezone.utc),
+            )
+            log_count += 1
+        if fsrs_card.last_review is not None:
+            updates.append(_replayed_columns(fsrs_card))
+
+    if updates:
+        db.session.execute(db.update(Card), updates)
+    return len(updates), log_count
+
+
+def replay_cards(card_ids, batch_size: int = DEFAULT_REPLAY_BATCH_SIZE) -> tuple[int, int]:
+    """Replay the states of the given cards, without a checkpoint; the caller commits.
+
+    Returns (cards rewritten, logs replayed).
+    """
+    ordered = sorted(card_ids)
+    cards = logs = 0
+    for start in range(0, len(ordered), batch_size):
+        # Sans filtre d’apprenant : la plage d’identifiants reste servie par l’index (carte, date).
+        updated, log_count = _replay_window(ordered[start:start + batch_size], [])
+        cards += updated
+        logs += log_count
+    return cards, logs
+
+
+def replay_card_states(
+    batch_size: int = DEFAULT_REPLAY_BATCH_SIZE,
+    restart: bool = False,
+    user_id: int | None = None,
+) -> dict:
+    """Rebuild card states from review logs, resuming from the last checkpoint.
+
+    Must run inside an application context. Only cards with at least one
+    review log are rewritten; review counters and content are left untouched.
+    """
+    started = time.perf_counter()
+    name = REPLAY_JOB_NAME if user_id is None else f"{REPLAY_JOB_NAME}:user-{user_id}"
+    checkpoint = open_checkpoint(name, replay_signature(user_id), restart)
+    if checkpoint.completed_at:
+        return {**checkpoint.to_dict(), "cards_this_run": 0, "logs_this_run": 0, "duration_seconds": 0.0}
+
+    log_filter = [] if user_id is None else [ReviewLog.user_id == user_id]
+    cards_this_run = logs_this_run = 0
+    while True:
+        card_ids = db.session.execute(
+            db.select(ReviewLog.card_id)
+            .where(ReviewLog.card_id > checkpoint.cursor, *log_filter)
+            .group_by(ReviewLog.card_id)
+            .order_by(ReviewLog.card_id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not card_ids:
+            if cards_this_run:
+                invalidate_review_queue(user_id)
+            complete_checkpoint(checkpoint)
+            break
+
+        updated, log_count = _replay_window(card_ids, log_filter)
+        advance_checkpoint(checkpoint, card_ids[-1], updated, log_count)
+        db.session.commit()
+        cards_this_run += updated
+        logs_this_run += log_count
+
+    return {
+        **checkpoint.to_dict(),
+        "cards_this_run": cards_this_run,
+        "logs_this_run": logs_this_run,
+        "duration_seconds": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,114 @@
+"""Conversion en masse des cartes SM-2 historiques vers FSRS.
+
+Sans ce traitement, une carte SM-2 n’est convertie qu’à sa première revue et
+garde d’ici là des intervalles SM-2 dans les calendriers. La commande
+`flask fsrs migrate-sm2` convertit toutes les cartes par lots paginés par clé,
+avec le même amorçage que la conversion paresseuse (`card_from_sm2`).
+
+Le traitement peut tourner pendant que l’application sert des requêtes : chaque
+lot est une transaction courte et chaque UPDATE est gardé par
+`scheduler_type = 'sm2'`, si bien qu’une carte revue entre-temps (donc déjà
+convertie par `review_card`) n’est jamais écrasée. L’échéance existante est
+conservée pour ne pas déplacer les révisions déjà promises.
+"""
+
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import bindparam
+
+from src.models.user import Card, db
+from src.services.fsrs_scheduler import FSRS_VERSION, card_from_sm2, memory_state_columns
+from src.services.job_checkpoints import advance_checkpoint, complete_checkpoint, open_checkpoint
+
+
+SM2_MIGRATION_JOB_NAME = "migrate-sm2-to-fsrs"
+DEFAULT_MIGRATION_BATCH_SIZE = 1000
+LEGACY_SCHEDULER_TYPE = "sm2"
+
+_card_table = Card.__table__
+_GUARDED_UPDATE = (
+    _card_table.update()
+    .where(_card_table.c.id == bindparam("card_id"))
+    .where(_card_table.c.scheduler_type == LEGACY_SCHEDULER_TYPE)
+    .values(
+        scheduler_type="fsrs",
+        scheduler_version=FSRS_VERSION,
+        scheduler_state=bindparam("new_scheduler_state"),
+        fsrs_state=bindparam("new_fsrs_state"),
+        fsrs_step=bindparam("new_fsrs_step"),
+        fsrs_stability=bindparam("new_fsrs_stability"),
+        fsrs_difficulty=bindparam("new_fsrs_difficulty"),
+        fsrs_last_review=bindparam("new_fsrs_last_review"),
+        interval_minutes=bindparam("new_interval_minutes"),
+    )
+)
+
+
+def _converted_row(row) -> dict:
+    fsrs_card = card_from_sm2(
+        row.id, row.interval, row.easiness_factor, row.review_count, row.last_reviewed, row.next_review,
+    )
+    reviewed = fsrs_card.last_review is not None
+    columns = memory_state_columns(fsrs_card) if reviewed else dict.fromkeys(
+        ("fsrs_state", "fsrs_step", "fsrs_stability", "fsrs_difficulty", "fsrs_last_review"),
+    )
+    return {
+        "card_id": row.id,
+        # Une carte jamais revue reste sans état : FSRS la traite comme nouvelle.
+        "new_scheduler_state": fsrs_card.to_json() if reviewed else "",
+        "new_interval_minutes": max(1, row.interval or 1) * 1440 if reviewed else None,
+        **{f"new_{column}": value for column, value in columns.items()},
+    }
+
+
+def _converted_count(result, batch: list[dict]) -> int:
+    if result.supports_sane_multi_rowcount():
+        return result.rowcount
+    # psycopg2 regroupe l’executemany : `rowcount` ne compte que la dernière
+    # instruction. Le lot est relu ; une carte écartée par la garde porte
+    # l’état écrit par sa revue, pas celui de la conversion.
+    written = dict(db.session.execute(
+        db.select(Card.id, Card.scheduler_state).where(Card.id.in_([row["card_id"] for row in batch]))
+    ).all())
+    return sum(written.get(row["card_id"]) == row["new_scheduler_state"] for row in batch)
+
+
+def migrate_sm2_cards(batch_size: int = DEFAULT_MIGRATION_BATCH_SIZE, restart: bool = False) -> dict:
+    """Convert every legacy SM-2 card, resuming after the last converted id.
+
+    Must run inside an application context. Cards created as SM-2 after a
+    run have higher ids, so running the command again picks them up.
+    """
+    started = time.perf_counter()
+    checkpoint = open_checkpoint(SM2_MIGRATION_JOB_NAME, FSRS_VERSION, restart)
+    scanned = converted = 0
+    while True:
+        rows = db.session.execute(
+            db.select(
+                Card.id, Card.interval, Card.easiness_factor, Card.review_count, Card.last_reviewed, Card.next_review,
+            )
+            .where(Card.id > checkpoint.cursor, Card.scheduler_type == LEGACY_SCHEDULER_TYPE)
+            .order_by(Card.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        batch = [_converted_row(row) for row in rows]
+        batch_converted = _converted_count(db.session.execute(_GUARDED_UPDATE, batch), batch)
+        advance_checkpoint(checkpoint, rows[-1].id, batch_converted, len(rows))
+        db.session.commit()
+        scanned += len(rows)
+        converted += batch_converted
+
+    complete_checkpoint(checkpoint)
+    elapsed = time.perf_counter() - started
+    return {
+        "scanned": scanned,
+        "converted": converted,
+        "skipped": scanned - converted,
+        "duration_seconds": round(elapsed, 2),
+        "cards_per_second": round(scanned / elapsed) if elapsed else 0,
+        "checkpoint": checkpoint.to_dict(),
+    }
@@ -0,0 +1,125 @@
+"""Réglages de rétention d’un apprenant, lus en une requête puis mémorisés.
+
+La rétention globale et tous les profils de domaine sont chargés ensemble
+(jointure externe `user` → `adaptive_learning_profile`) et figés dans un
+instantané sans objet ORM. L’instantané est mémorisé pour la requête en cours
+(`flask.g`) et dans un cache de processus borné (LRU) : les boucles de revue
+n’émettent plus aucune requête de réglages. Chaque entrée du cache porte le
+`settings_version` de l’apprenant, incrémenté dans la transaction de toute
+écriture de ses réglages ; une lecture de clé primaire le revérifie une fois
+par requête, si bien qu’une écriture faite par un autre processus (autre
+worker, ajustement hors ligne des poids FSRS) est vue dès sa validation.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from flask import g, has_app_context
+
+from src.models.user import AdaptiveLearningProfile, User, db
+from src.services.resource_versions import SETTINGS, resource_version
+
+
+SETTINGS_CACHE_MAX_USERS = 10_000
+
+_settings: OrderedDict[int, tuple[int, UserSettings]] = OrderedDict()
+_settings_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DomainProfile:
+    """Immutable copy of the `AdaptiveLearningProfile` fields used to schedule reviews."""
+
+    domain: str
+    desired_retention: float
+    personalized_parameters_enabled: bool
+    fsrs_parameters: str | None
+    updated_at: datetime | None
+
+
+@dataclass(frozen=True)
+class UserSettings:
+    """A learner’s global retention and domain profiles.
+
+    Exposes `id` and `desired_retention` like `User`, so it can be passed to
+    `get_effective_retention` and `get_personalized_parameters`.
+    """
+
+    id: int
+    desired_retention: float | None
+    profiles: dict[str, DomainProfile]
+
+
+def _load_user_settings(user_id: int) -> tuple[int, UserSettings] | None:
+    rows = db.session.execute(
+        db.select(User.settings_version, User.desired_retention, AdaptiveLearningProfile)
+        .outerjoin(AdaptiveLearningProfile, AdaptiveLearningProfile.user_id == User.id)
+        .where(User.id == user_id)
+    ).all()
+    if not rows:
+        return None
+    profiles = {
+        profile.domain: DomainProfile(
+            domain=profile.domain,
+            desired_retention=profile.desired_retention,
+            personalized_parameters_enabled=bool(profile.personalized_parameters_enabled),
+            fsrs_parameters=profile.fsrs_parameters,
+            updated_at=profile.updated_at,
+        )
+        for _, _, profile in rows
+        if profile is not None
+    }
+    version, desired_retention, _ = rows[0]
+    return version, UserSettings(id=user_id, desired_retention=desired_retention, profiles=profiles)
+
+
+def _request_memo() -> dict[int, UserSettings]:
+    if "user_settings" not in g:
+        g.user_settings = {}
+    return g.user_settings
+
+
+def load_user_settings(user_id: int) -> UserSettings | None:
+    """Return the learner’s settings snapshot, or None if the learner does not exist."""
+    memo = _request_memo() if has_app_context() else {}
+    if user_id in memo:
+        return memo[user_id]
+    with _settings_lock:
+        cached = _settings.get(user_id)
+    if cached and resource_version(user_id, SETTINGS) == cached[0]:
+        with _settings_lock:
+            if user_id in _settings:
+                _settings.move_to_end(user_id)
+        memo[user_id] = cached[1]
+        return cached[1]
+
+    loaded = _load_user_settings(user_id)
+    if loaded is None:
+        invalidate_user_settings(user_id)
+        return None
+    with _settings_lock:
+        _settings[user_id] = loaded
+        _settings.move_to_end(user_id)
+        while len(_settings) > SETTINGS_CACHE_MAX_USERS:
+            _settings.popitem(last=False)
+    memo[user_id] = loaded[1]
+    return loaded[1]
+
+
+def invalidate_user_settings(user_id: int | None = None) -> None:
+    """Forget cached settings (one learner, or everyone after a bulk job)."""
+    with _settings_lock:
+        if user_id is None:
+            _settings.clear()
+        else:
+            _settings.pop(user_id, None)
+    if has_app_context():
+        memo = _request_memo()
+        if user_id is None:
+            memo.clear()
+        else:
+            memo.pop(user_id, None)
@@ -0,0 +1,280 @@
+"""Prévision Monte-Carlo de la charge quotidienne de révisions FSRS.
+
+Le calendrier simple ne compte que les échéances déjà connues. Ce service
+simule, pour toute la collection, les révisions futures que ces échéances
+engendreront : chaque revue est réussie avec une probabilité égale à la
+récupérabilité FSRS de la carte, puis la stabilité, la difficulté et la
+prochaine échéance sont mises à jour avec les formules de Py-FSRS.
+
+Simplifications assumées et exposées dans la réponse :
+- la simulation avance au jour près (les pas d’apprentissage intra-journée
+  sont comptés comme des revues supplémentaires du même jour) ;
+- les notes d’une première revue ou d’un rappel réussi suivent les
+  distributions par défaut du simulateur FSRS, faute d’historique personnel
+  (les poids FSRS personnels consentis, eux, sont appliqués par domaine) ;
+- au-delà de `MAX_SIMULATED_CELLS`, le nombre de simulations est réduit ;
+  la réponse indique le nombre demandé et le nombre réellement simulé ;
+- aucune nouvelle carte n’est ajoutée pendant l’horizon simulé.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+import numpy as np
+from fsrs.scheduler import DEFAULT_PARAMETERS, MAX_DIFFICULTY, MIN_DIFFICULTY, STABILITY_MIN
+
+from src.models.user import Card, db
+from src.services.adaptive_learning import get_effective_retention, get_personalized_parameters
+from src.services.retrievability import forgetting_curve
+
+
+# Distributions par défaut du simulateur FSRS : (again, hard, good, easy) pour
+# une première revue et (hard, good, easy) pour un rappel réussi.
+FIRST_RATING_PROBABILITIES = (0.24, 0.094, 0.495, 0.171)
+SUCCESS_RATING_PROBABILITIES = (0.224, 0.631, 0.145)
+# Revues du même jour générées par les pas d’apprentissage (1 min, 10 min).
+LEARNING_REVIEWS_BY_FIRST_RATING = np.array([0, 3, 2, 2, 1])
+RELEARNING_REVIEWS_AFTER_LAPSE = 2
+DEFAULT_REVIEW_SECONDS = 90.0
+MAXIMUM_INTERVAL_DAYS = 36500
+# Budget de la simulation (cartes × simulations) : garde la réponse sous la
+# seconde pour une collection de 20 000 cartes (50 simulations).
+MAX_SIMULATED_CELLS = 1_000_000
+
+
+def _percentiles(values: np.ndarray) -> dict[str, float]:
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {"p10": round(float(p10), 1), "p50": round(float(p50), 1), "p90": round(float(p90), 1)}
+
+
+def _sample_ratings(rng: np.random.Generator, probabilities: Sequence[float], size: int) -> np.ndarray:
+    """Draw 0-based categories; faster than `Generator.choice` with weights."""
+    cumulative = np.cumsum(probabilities)
+    return np.minimum(np.searchsorted(cumulative, rng.random(size) * cumulative[-1], side="right"),
+                      len(probabilities) - 1)
+
+
+def _bucket_by_day(cells: np.ndarray, days_of_cells: np.ndarray, buckets: list[list[np.ndarray]]) -> None:
+    """Append simulation cells to the bucket of the day they fall due."""
+    in_horizon = days_of_cells < len(buckets)
+    cells = cells[in_horizon]
+    # Petits entiers : NumPy applique alors un tri radix linéaire.
+    days_of_cells = days_of_cells[in_horizon].astype(np.int16)
+    order = np.argsort(days_of_cells, kind="stable")
+    cells = cells[order]
+    days_of_cells = days_of_cells[order]
+    unique_days, starts = np.unique(days_of_cells, return_index=True)
+    for day, chunk in zip(unique_days, np.split(cells, starts[1:])):
+        buckets[int(day)].append(chunk)
+
+
+def simulate_workload(
+    stability: np.ndarray,
+    difficulty: np.ndarray,
+    due_day: np.ndarray,
+    last_review_day: np.ndarray,
+    desired_retention: np.ndarray,
+    review_seconds: np.ndarray,
+    days: int,
+    simulations: int,
+    seed: int = 0,
+    parameters: Sequence[float] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Simulate `simulations` futures and return (reviews, minutes) per day.
+
+    Every input is one column per card; days are integers relative to the
+    first simulated day, NaN stability marks a card without memory state.
+    Both outputs have the shape (simulations, days).
+
+    Each (simulation, card) pair is a flat cell index. Cells wait in the
+    bucket of their due day, so the cost grows with the number of simulated
+    reviews rather than with cards × simulations × days.
+    """
+    w = np.asarray(DEFAULT_PARAMETERS if parameters is None else parameters, dtype=np.float64)
+    decay, factor = forgetting_curve(w)
+    rng = np.random.default_rng(seed)
+    card_count = len(stability)
+
+    def initial_difficulty(rating: np.ndarray | int) -> np.ndarray:
+        return w[4] - np.exp(w[5] * (np.asarray(rating) - 1)) + 1
+
+    def next_interval(stab: np.ndarray, retention: np.ndarray) -> np.ndarray:
+        interval = np.rint(stab / factor * (retention ** (1 / decay) - 1))
+        return np.clip(interval, 1, MAXIMUM_INTERVAL_DAYS).astype(np.int64)
+
+    easy_difficulty = initial_difficulty(4)
+    stability = np.asarray(stability, dtype=np.float64)
+    difficulty = np.asarray(difficulty, dtype=np.float64)
+    unknown = np.isnan(stability) | np.isnan(difficulty)
+    s = np.tile(np.where(unknown, np.nan, stability), simulations)
+    d = np.tile(difficulty, simulations)
+    last = np.tile(np.asarray(last_review_day, dtype=np.int64), simulations)
+    reviews = np.zeros((simulations, days))
+    seconds = np.zeros((simulations, days))
+    buckets: list[list[np.ndarray]] = [[] for _ in range(days)]
+    _bucket_by_day(
+        np.arange(card_count * simulations),
+        np.tile(np.maximum(np.asarray(due_day, dtype=np.int64), 0), simulations),
+        buckets,
+    )
+
+    for day in range(days):
+        if not buckets[day]:
+            continue
+        cells = np.concatenate(buckets[day])
+        buckets[day] = []
+        sim_idx, card_idx = np.divmod(cells, card_count)
+        stab = s[cells]
+        diff = d[cells]
+        is_new = np.isnan(stab)
+
+        # Revue d’une carte connue : rappel tiré selon la récupérabilité. Les
+        # formules sont évaluées sur toutes les cellules (valeurs neutres pour
+        # les cartes nouvelles) afin d’éviter des copies masquées coûteuses.
+        stab = np.where(is_new, 1.0, stab)
+        diff = np.where(is_new, 5.0, diff)
+        retrievability = (1 + factor * (day - last[cells]) / stab) ** decay
+        recalled = rng.random(cells.size) < retrievability
+        rating = np.where(recalled, _sample_ratings(rng, SUCCESS_RATING_PROBABILITIES, cells.size) + 2, 1)
+        bonus = np.where(rating == 2, w[15], np.where(rating == 4, w[16], 1.0))
+        forgotten = 1 - retrievability
+        recall_stability = stab * (
+            1 + np.exp(w[8]) * (11 - diff) * stab ** -w[9] * (np.exp(forgotten * w[10]) - 1) * bonus
+        )
+        forget_stability = np.minimum(
+            w[11] * diff ** -w[12] * ((stab + 1) ** w[13] - 1) * np.exp(forgotten * w[14]),
+            stab / np.exp(w[17] * w[18]),
+        )
+        stab = np.where(recalled, recall_stability, forget_stability)
+        damped = diff + (10.0 - diff) * -w[6] * (rating - 3) / 9.0
+        diff = np.clip(w[7] * easy_difficulty + (1 - w[7]) * damped, MIN_DIFFICULTY, MAX_DIFFICULTY)
+        same_day_reviews = np.where(recalled, 1.0, RELEARNING_REVIEWS_AFTER_LAPSE)
+
+        # Première revue : stabilité et difficulté initiales de FSRS.
+        new_count = int(is_new.sum())
+        if new_count:
+            first = _sample_ratings(rng, FIRST_RATING_PROBABILITIES, new_count) + 1
+            stab[is_new] = w[first - 1]
+            diff[is_new] = np.clip(initial_difficulty(first), MIN_DIFFICULTY, MAX_DIFFICULTY)
+            same_day_reviews[is_new] = LEARNING_REVIEWS_BY_FIRST_RATING[first]
+
+        stab = np.maximum(stab, STABILITY_MIN)
+        s[cells] = stab
+        d[cells] = diff
+        last[cells] = day
+        _bucket_by_day(cells, day + next_interval(stab, desired_retention[card_idx]), buckets)
+        reviews[:, day] = np.bincount(sim_idx, weights=same_day_reviews, minlength=simulations)
+        seconds[:, day] = np.bincount(
+            sim_idx, weights=same_day_reviews * review_seconds[card_idx], minlength=simulations,
+        )
+
+    return reviews, seconds / 60
+
+
+def load_forecast_inputs(settings, start: datetime) -> tuple[dict[str, np.ndarray], dict]:
+    """Load the columns of a whole collection without building ORM objects.
+
+    `settings` is the learner’s `UserSettings` snapshot. Also returns the
+    card positions simulated with each set of FSRS weights (None: defaults),
+    resolved per domain like the review path does.
+    """
+    rows = db.session.execute(
+        db.select(
+            Card.fsrs_stability,
+            Card.fsrs_difficulty,
+            Card.fsrs_last_review,
+            Card.next_review,
+            Card.review_count,
+            Card.total_response_time,
+            Card.learning_domain,
+        )
+        .where(Card.user_id == settings.id)
+        .order_by(Card.id)
+    ).all()
+    retention_by_domain: dict[str, float] = {}
+
+    def retention_for(domain: str) -> float:
+        if domain not in retention_by_domain:
+            retention_by_domain[domain] = get_effective_retention(settings, domain, settings.profiles)[0]
+        return retention_by_domain[domain]
+
+    def day_offsets(values: tuple[datetime | None, ...]) -> list[int]:
+        # `timedelta.days` arrondit vers le bas : une échéance passée tombe sur
+        # un jour négatif, ramené au premier jour simulé par la simulation.
+        return [(value - start).days if value else 0 for value in values]
+
+    if not rows:
+        empty = np.array([], dtype=np.float64)
+        return {key: empty for key in (
+            "stability", "difficulty", "due_day", "last_review_day", "desired_retention", "review_seconds",
+        )}, {}
+    (stability, difficulty, last_review, next_review,
+     review_count, total_response_time, learning_domain) = zip(*rows)
+    parameters_by_domain = {
+        domain: get_personalized_parameters(settings, domain, settings.profiles) for domain in set(learning_domain)
+    }
+    positions: dict[tuple[float, ...] | None, list[int]] = {}
+    for position, domain in enumerate(learning_domain):
+        positions.setdefault(parameters_by_domain[domain], []).append(position)
+    # Ordre stable des groupes : les graines dérivées restent reproductibles.
+    parameter_groups = {
+        parameters: np.array(positions[parameters])
+        for parameters in sorted(positions, key=lambda weights: (weights is not None, weights or ()))
+    }
+    return {
+        "stability": np.array(stability, dtype=np.float64),
+        "difficulty": np.array(difficulty, dtype=np.float64),
+        "due_day": np.array(day_offsets(next_review), dtype=np.int64),
+        "last_review_day": np.array(day_offsets(last_review), dtype=np.int64),
+        "desired_retention": np.array(list(map(retention_for, learning_domain))),
+        "review_seconds": np.array([
+            seconds / count if count and seconds else DEFAULT_REVIEW_SECONDS
+            for count, seconds in zip(review_count, total_response_time)
+        ]),
+    }, parameter_groups
+
+
+def forecast_workload(settings, now: datetime, days: int, simulations: int, seed: int = 0) -> dict:
+    """Return expected reviews and minutes per day with percentile bands."""
+    start = datetime.combine(now.date(), datetime.min.time())
+    inputs, parameter_groups = load_forecast_inputs(settings, start)
+    card_count = len(inputs["stability"])
+    requested_simulations = simulations
+    simulations = max(1, min(simulations, MAX_SIMULATED_CELLS // max(1, card_count)))
+    # Les cartes sont indépendantes : chaque jeu de poids est simulé à part,
+    # puis les charges de chaque simulation sont additionnées.
+    reviews = np.zeros((simulations, days))
+    minutes = np.zeros((simulations, days))
+    for index, (parameters, positions) in enumerate(parameter_groups.items()):
+        group_reviews, group_minutes = simulate_workload(
+            days=days,
+            simulations=simulations,
+            seed=seed + index,
+            parameters=parameters,
+            **{key: values[positions] for key, values in inputs.items()},
+        )
+        reviews += group_reviews
+        minutes += group_minutes
+
+    forecast = []
+    for offset in range(days):
+        forecast.append({
+            "date": (start.date() + timedelta(days=offset)).isoformat(),
+            "expected_reviews": round(float(reviews[:, offset].mean()), 1),
+            "reviews": _percentiles(reviews[:, offset]),
+            "expected_minutes": round(float(minutes[:, offset].mean()), 1),
+            "minutes": _percentiles(minutes[:, offset]),
+        })
+    return {
+        "days": forecast,
+        "total_cards": card_count,
+        "simulations": simulations,
+        "requested_simulations": requested_simulations,
+        "simulations_reduced": simulations < requested_simulations,
+        "personalized_parameters": any(parameters is not None for parameters in parameter_groups),
+        "seed": seed,
+        "expected_total_reviews": round(float(reviews.sum(axis=1).mean()), 1),
+        "expected_total_minutes": round(float(minutes.sum(axis=1).mean()), 1),
+    }
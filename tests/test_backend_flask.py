@@ -2,8 +2,10 @@ import io
 import os
 import sys
 import uuid
+from contextlib import contextmanager
 
 import pytest
+from sqlalchemy import event
 
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["SECRET_KEY"] = "test-secret-with-enough-length-for-hs256"
@@ -27,6 +29,8 @@ from src.models.user import (  # noqa: E402
     Subject,
     db,
 )
+from src.services.review_calendar import invalidate_review_calendar  # noqa: E402
+from src.services.user_settings import invalidate_user_settings  # noqa: E402
 from src.utils import document_extraction  # noqa: E402
 
 
@@ -36,6 +40,9 @@ def client():
     with app.app_context():
         db.drop_all()
         db.create_all()
+    # Les identifiants recommencent à 1 dans chaque base de test.
+    invalidate_review_calendar()
+    invalidate_user_settings()
 
     with app.test_client() as test_client:
         yield test_client
@@ -45,6 +52,28 @@ def client():
         db.drop_all()
 
 
+@pytest.fixture()
+def count_queries(client):
+    """Context manager collecting the SQL statements executed inside it."""
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counting
+
+
 @pytest.fixture()
 def auth_headers(client):
     suffix = uuid.uuid4().hex[:8]
@@ -213,6 +242,87 @@ def test_create_and_review_spaced_repetition_card(client, auth_headers):
         assert review_log.scheduled_minutes == body["next_review_in_minutes"]
         assert review_log.scheduled_days == body["updated_card"]["interval"]
 
+        reviewed_card = db.session.get(Card, card["id"])
+        assert reviewed_card.fsrs_state is not None
+        assert round(reviewed_card.fsrs_stability, 2) == body["memory_state"]["stability_days"]
+        assert reviewed_card.fsrs_last_review == review_log.reviewed_at
+        assert Card.query.filter(Card.fsrs_stability < 30).count() == 1
+
+
+def test_batch_review_applies_ordered_reviews_in_one_commit(client, auth_headers):
+    card_ids = []
+    for concept_name in ("Invoice", "Purchase order"):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept_name, "content": f"Define {concept_name}"},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+
+    response = client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [
+            {"card_id": card_ids[0], "rating": "again", "response_time": 4, "reviewed_at": "2026-01-05T09:00:00Z"},
+            {"card_id": card_ids[0], "rating": "good", "response_time": 6, "reviewed_at": "2026-01-05T09:05:00Z"},
+            {"card_id": card_ids[1], "rating": "easy", "reviewed_at": "2026-01-05T09:06:00+00:00"},
+            {"card_id": card_ids[1], "rating": "good", "reviewed_at": "2026-01-04T09:00:00Z"},
+            {"card_id": 999999, "rating": "good"},
+        ]},
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["applied_count"] == 3
+    assert [item["status"] for item in body["results"]] == ["applied", "applied", "applied", "skipped", "skipped"]
+    assert body["results"][3]["reason"] == "older_than_last_review"
+    assert body["results"][4]["reason"] == "card_not_found"
+    first_card = next(card for card in body["updated_cards"] if card["id"] == card_ids[0])
+    assert first_card["review_count"] == 2
+    assert first_card["last_reviewed"] == "2026-01-05T09:05:00"
+
+    with app.app_context():
+        from src.models.user import ReviewLog
+        logs = ReviewLog.query.filter_by(card_id=card_ids[0]).order_by(ReviewLog.reviewed_at).all()
+        assert [log.rating for log in logs] == ["again", "good"]
+        # Chaque état n’est stocké qu’une fois : le second journal référence le premier.
+        assert logs[1].previous_log_id == logs[0].id
+        assert logs[1].previous_state is None
+        assert logs[1].audit_states["previous_state"] == logs[0].next_state
+        assert logs[1].to_dict(include_states=True)["previous_state"] == logs[0].next_state
+
+    invalid_response = client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [{"card_id": card_ids[0], "rating": "good", "reviewed_at": "yesterday"}]},
+    )
+    assert invalid_response.status_code == 400
+
+
+def test_rating_preview_endpoint_and_due_card_previews(client, auth_headers):
+    create_response = client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Gerunds", "content": "Explain gerunds"},
+    )
+    card_id = create_response.get_json()["card"]["id"]
+
+    response = client.get(f"/api/spaced-repetition/cards/{card_id}/rating-preview", headers=auth_headers)
+    assert response.status_code == 200
+    preview = response.get_json()["preview"]
+    assert set(preview) == {"again", "hard", "good", "easy"}
+    assert preview["again"]["scheduled_minutes"] <= preview["easy"]["scheduled_minutes"]
+
+    review = client.post(
+        "/api/spaced-repetition/review-card", headers=auth_headers, json={"card_id": card_id, "rating": "good"},
+    )
+    assert review.get_json()["next_review_in_minutes"] == preview["good"]["scheduled_minutes"]
+
+    due_response = client.get("/api/spaced-repetition/get-due-cards?preview=true", headers=auth_headers)
+    assert due_response.status_code == 200
+    assert client.get(
+        "/api/spaced-repetition/cards/999999/rating-preview", headers=auth_headers,
+    ).status_code == 404
+
 
 def test_update_progress_creates_study_session(client, auth_headers):
     with app.app_context():
@@ -385,6 +495,7 @@ def test_adaptive_profiles_filter_sessions_and_apply_domain_retention(client, au
     assert language_due["domain"] == "language"
     assert language_due["total_due"] == 1
     assert language_due["due_cards"][0]["learning_domain"] == "language"
+    assert language_due["due_cards"][0]["retrievability"] is None
 
     review_response = client.post(
         "/api/spaced-repetition/review-card",
@@ -406,6 +517,7 @@ def test_adaptive_profiles_filter_sessions_and_apply_domain_retention(client, au
         item for item in overview_response.get_json()["domains"] if item["domain"] == "language"
     )
     assert language_overview["cards_total"] == 1
+    assert 0 < language_overview["average_retrievability"] <= 1
     assert language_overview["desired_retention"] == 0.93
     assert language_overview["retention_source"] == "domain_profile"
 
@@ -914,3 +1026,29 @@ def test_multi_speaker_listening_uses_three_questions_per_private_stimulus(clien
     assert remediation_response.status_code == 201
     assert remediation_response.get_json()["created_count"] == 2
     assert Card.query.filter_by(subject_id=subject_id).count() == 2
+
+
+def test_card_payloads_support_compact_view_and_field_selection(client, auth_headers):
+    card_id = client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Articles", "content": "a / an / the", "back_content": "Use 'an' before a vowel sound"},
+    ).get_json()["card"]["id"]
+
+    compact = client.get("/api/spaced-repetition/get-due-cards?view=compact", headers=auth_headers).get_json()
+    assert set(compact["due_cards"][0]) == {"id", "front_content", "back_content", "learning_domain", "retrievability"}
+
+    selected = client.get("/api/spaced-repetition/cards?fields=tags,difficulty", headers=auth_headers).get_json()
+    assert selected["cards"] == [{"id": card_id, "tags": [], "difficulty": "medium"}]
+
+    review = client.post(
+        "/api/spaced-repetition/review-card?view=compact",
+        headers=auth_headers,
+        json={"card_id": card_id, "rating": "good"},
+    ).get_json()
+    assert set(review["updated_card"]) == set(Card.COMPACT_FIELDS)
+
+    full = client.get("/api/spaced-repetition/cards", headers=auth_headers).get_json()["cards"][0]
+    assert "days_overdue" in full and len(full) == 20
+    for query in ("fields=front_content,secret", "view=tiny"):
+        assert client.get(f"/api/spaced-repetition/cards?{query}", headers=auth_headers).status_code == 400
@@ -0,0 +1,69 @@
+from tests.test_backend_flask import auth_headers, client, count_queries  # noqa: F401
+
+
+def _get(client, auth_headers, path, etag=None):
+    headers = dict(auth_headers, **({"If-None-Match": etag} if etag else {}))
+    return client.get(path, headers=headers)
+
+
+def test_settings_and_profiles_answer_304_until_a_retention_changes(client, auth_headers, count_queries):
+    settings = _get(client, auth_headers, "/api/spaced-repetition/settings")
+    etag = settings.headers["ETag"]
+    assert settings.status_code == 200
+    assert "private" in settings.headers["Cache-Control"]
+
+    with count_queries() as statements:
+        cached = _get(client, auth_headers, "/api/spaced-repetition/settings", etag)
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert len(statements) == 1
+
+    # Même version, autre représentation : l’ETag des réglages ne vaut pas pour les profils.
+    profiles = _get(client, auth_headers, "/api/spaced-repetition/adaptive-profiles", etag)
+    assert profiles.status_code == 200
+    assert profiles.headers["ETag"] != etag
+    assert _get(client, auth_headers, "/api/spaced-repetition/adaptive-profiles", profiles.headers["ETag"]).status_code == 304
+    etag = profiles.headers["ETag"]
+
+    client.put(
+        "/api/spaced-repetition/adaptive-profiles/language",
+        headers=auth_headers,
+        json={"desired_retention": 0.85},
+    )
+    refreshed = _get(client, auth_headers, "/api/spaced-repetition/adaptive-profiles", etag)
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+
+    etag = refreshed.headers["ETag"]
+    client.put("/api/spaced-repetition/settings", headers=auth_headers, json={"desired_retention": 0.93})
+    updated = _get(client, auth_headers, "/api/spaced-repetition/settings", etag)
+    assert updated.status_code == 200
+    assert updated.get_json()["desired_retention"] == 0.93
+
+
+def test_subjects_etag_follows_path_changes_only(client, auth_headers):
+    etag = _get(client, auth_headers, "/api/mastery/get-subjects").headers["ETag"]
+
+    client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Tenses", "content": "Explain it"},
+    )
+    assert _get(client, auth_headers, "/api/mastery/get-subjects", etag).status_code == 304
+
+    client.post(
+        "/api/mastery/create-path",
+        headers=auth_headers,
+        json={"template_id": "computing-foundations", "weekly_hours": 4},
+    )
+    response = _get(client, auth_headers, "/api/mastery/get-subjects", etag)
+    assert response.status_code == 200
+    assert len(response.get_json()["subjects"]) == 1
+    assert _get(client, auth_headers, "/api/mastery/subjects", response.headers["ETag"]).status_code == 200
+
+
+def test_catalog_is_served_with_a_content_etag(client, auth_headers):
+    catalog = _get(client, auth_headers, "/api/mastery/catalog")
+    assert catalog.status_code == 200
+    assert catalog.get_json()["templates"]
+    assert _get(client, auth_headers, "/api/mastery/catalog", catalog.headers["ETag"]).status_code == 304
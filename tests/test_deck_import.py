@@ -0,0 +1,125 @@
+import io
+from datetime import datetime, timezone
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import Card, DailyReviewStats, ReviewLog, User
+from src.services.deck_import import _copy_buffer, import_deck
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+DECK = (
+    "id,front,back,tags,domain\n"
+    "a1,Bonjour,Hello,fr greeting,language\n"
+    "a2,Boucle,Loop,\"code,basics\",computing\n"
+    "a3,Bonjour,Hello,,language\n"
+    "a4,,Missing front,,\n"
+    "a5,Merci,Thanks,,cooking\n"
+)
+REVLOG = (
+    "card_id,review_time,review_rating,review_duration\n"
+    f"a1,{_ms(2026, 1, 5, 9)},3,4200\n"
+    f"a2,{_ms(2026, 1, 6, 9)},1,\n"
+    f"a1,{_ms(2026, 1, 9, 9)},4,2000\n"
+    f"unknown,{_ms(2026, 1, 9, 9)},3,\n"
+    f"a2,{_ms(2026, 1, 10, 9)},0,\n"
+)
+
+
+def test_csv_deck_import_inserts_cards_and_replays_their_history(client, auth_headers):
+    response = client.post(
+        "/api/spaced-repetition/import-deck",
+        headers=auth_headers,
+        data={
+            "deck": (io.BytesIO(DECK.encode()), "deck.csv"),
+            "revlog": (io.BytesIO(REVLOG.encode()), "revlog.csv"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["cards_imported"] == 2
+    assert result["duplicates_skipped"] == 1
+    assert result["invalid_rows"] == 2
+    assert result["reviews_imported"] == 3
+    assert result["reviews_skipped"] == 2
+    assert result["cards_replayed"] == 2
+    assert [(error["file"], error["line"]) for error in result["errors"]] == [("deck", 5), ("deck", 6), ("revlog", 6)]
+
+    with app.app_context():
+        cards = {card.front_content: card for card in Card.query}
+        assert set(cards) == {"Bonjour", "Boucle"}
+        bonjour, boucle = cards["Bonjour"], cards["Boucle"]
+        # Insertion en bloc : le domaine est résolu par l’import, pas par l’ORM.
+        assert (bonjour.learning_domain, boucle.learning_domain) == ("language", "computing")
+        assert bonjour.tags == "fr,greeting"
+        assert (bonjour.review_count, bonjour.success_count, bonjour.total_response_time) == (2, 2, 6.2)
+        assert (boucle.review_count, boucle.success_count) == (1, 0)
+        assert bonjour.scheduler_type == "fsrs" and bonjour.fsrs_stability is not None
+        assert bonjour.last_reviewed == datetime(2026, 1, 9, 9)
+        assert bonjour.next_review > bonjour.last_reviewed
+        assert {log.scheduler_version for log in ReviewLog.query} == {"import"}
+        stats = {(row.domain, row.day.isoformat()): row for row in DailyReviewStats.query}
+        assert stats[("language", "2026-01-05")].new_card_count == 1
+        assert stats[("language", "2026-01-09")].new_card_count == 0
+        assert stats[("computing", "2026-01-06")].again_count == 1
+
+    # Réimporté, le paquet ne crée aucun doublon.
+    response = client.post(
+        "/api/spaced-repetition/import-deck",
+        headers=auth_headers,
+        data={"deck": (io.BytesIO(DECK.encode()), "deck.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.get_json()["cards_imported"] == 0
+    assert response.get_json()["duplicates_skipped"] == 3
+
+
+def test_anki_text_export_is_parsed_with_its_header_options(client, auth_headers):
+    deck = (
+        "#separator:tab\n"
+        "#html:true\n"
+        "#guid column:1\n"
+        "#tags column:4\n"
+        "g1\tWhat is <b>FSRS</b>?\tA scheduler<br>for reviews &amp; recall\tsrs memory\n"
+    )
+    with app.app_context():
+        user_id = User.query.one().id
+        result = import_deck(user_id, io.StringIO(deck, newline=""), "anki")
+        assert result["cards_imported"] == 1
+        card = Card.query.one()
+        assert card.front_content == "What is FSRS?"
+        assert card.back_content == "A scheduler\nfor reviews & recall"
+        assert card.tags == "srs,memory"
+        assert card.learning_domain == "general" and card.domain_inherited
+
+
+def test_deck_without_required_columns_is_rejected_and_nothing_is_written(client, auth_headers):
+    response = client.post(
+        "/api/spaced-repetition/import-deck",
+        headers=auth_headers,
+        data={"deck": (io.BytesIO(b"question,notes\nQ,N\n"), "deck.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 400
+    assert "back" in response.get_json()["message"]
+    with app.app_context():
+        assert Card.query.count() == 0
+
+
+def test_copy_buffer_escapes_card_text_for_postgresql():
+    rows = [
+        {"front_content": "tab\there", "back_content": "line\nbreak\r\nend", "tags": None, "is_suspended": False},
+        {"front_content": "C:\\temp\\new", "back_content": "\\N", "tags": "", "is_suspended": True},
+        {"front_content": "when", "back_content": datetime(2026, 1, 5, 9, 30), "tags": "a,b", "is_suspended": None},
+    ]
+    buffer = _copy_buffer(rows, list(rows[0]))
+    # Une ligne par carte, quatre champs chacune : aucun séparateur ne fuit du texte.
+    assert buffer.getvalue() == (
+        "tab\\there\tline\\nbreak\\r\\nend\t\\N\tf\n"
+        "C:\\\\temp\\\\new\t\\\\N\t\tt\n"
+        "when\t2026-01-05 09:30:00\ta,b\t\\N\n"
+    )
+    assert [len(line.split("\t")) for line in buffer.read().splitlines()] == [4, 4, 4]
@@ -1,14 +1,23 @@
 import json
 
 import math
+from datetime import datetime, timedelta
 
 import pytest
 
 from src.services.fsrs_scheduler import (
     DEFAULT_RETENTION,
+    card_from_memory_state,
+    clear_scheduler_cache,
+    get_scheduler,
+    memory_state_columns,
     normalize_desired_retention,
     normalize_rating,
+    preview_cache_info,
+    preview_ratings,
+    RATING_BY_NAME,
     review_with_fsrs,
+    scheduler_cache_info,
 )
 
 
@@ -50,3 +59,69 @@ def test_fsrs_review_preserves_a_subday_learning_interval():
     assert result["scheduled_days"] == 0
     assert result["scheduled_days_exact"] == pytest.approx(delta_seconds / 86400, abs=0.0001)
     assert 0 <= result["retrievability_after"] <= 1
+
+
+def test_scheduler_registry_reuses_one_instance_per_configuration():
+    clear_scheduler_cache()
+
+    first = get_scheduler(0.9)
+    assert get_scheduler("0.9") is first
+    assert get_scheduler(0.95) is not first
+    assert get_scheduler(0.9, enable_fuzzing=True) is not first
+    assert first.enable_fuzzing is False
+
+    info = scheduler_cache_info()
+    assert info["hits"] == 1
+    assert info["misses"] == 3
+    assert info["size"] == 3
+
+    review_with_fsrs("", normalize_rating({"rating": "good"})[1], 0.9)
+    assert scheduler_cache_info()["hits"] == 2
+
+
+def test_typed_memory_columns_schedule_like_the_json_state():
+    _, good = normalize_rating({"rating": "good"})
+    first = review_with_fsrs("", good, 0.9, reviewed_at=datetime(2026, 2, 1, 8, 0))
+    columns = first["memory_columns"]
+    assert columns["fsrs_state"] == json.loads(first["card_state"])["state"]
+    assert columns["fsrs_last_review"] == datetime(2026, 2, 1, 8, 0)
+
+    rebuilt = card_from_memory_state(
+        42,
+        state=columns["fsrs_state"],
+        step=columns["fsrs_step"],
+        stability=columns["fsrs_stability"],
+        difficulty=columns["fsrs_difficulty"],
+        due=first["due_at"],
+        last_review=columns["fsrs_last_review"],
+    )
+    later = datetime(2026, 2, 4, 8, 0)
+    from_columns = review_with_fsrs(rebuilt, good, 0.9, reviewed_at=later)
+    from_json = review_with_fsrs(first["card_state"], good, 0.9, reviewed_at=later)
+    assert from_columns["due_at"] == from_json["due_at"]
+    assert from_columns["memory_columns"] == from_json["memory_columns"]
+    assert memory_state_columns(rebuilt) == columns
+
+
+def test_rating_preview_matches_each_review_and_is_cached():
+    _, good = normalize_rating({"rating": "good"})
+    first = review_with_fsrs("", good, 0.9, reviewed_at=datetime(2026, 2, 1, 8, 0))
+    state = card_from_memory_state(
+        7, due=first["due_at"], **{
+            column.removeprefix("fsrs_"): value for column, value in first["memory_columns"].items()
+        },
+    )
+    now = datetime(2026, 2, 6, 18, 45)
+
+    preview = preview_ratings(state, 0.9, now=now)
+    for rating_name, rating in RATING_BY_NAME.items():
+        reviewed = review_with_fsrs(state, rating, 0.9, reviewed_at=now)
+        assert preview[rating_name]["due_at"] == reviewed["due_at"]
+        assert preview[rating_name]["scheduled_minutes"] == reviewed["scheduled_minutes"]
+        assert preview[rating_name]["stability_days"] == reviewed["memory_state"]["stability_days"]
+    assert preview["again"]["scheduled_minutes"] < preview["good"]["scheduled_minutes"]
+
+    hits = preview_cache_info()["hits"]
+    later_same_day = preview_ratings(state, 0.9, now=now + timedelta(minutes=30))
+    assert preview_cache_info()["hits"] == hits + 1
+    assert later_same_day["good"]["due_at"] == preview["good"]["due_at"] + timedelta(minutes=30)
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timedelta
+
+from fsrs.scheduler import DEFAULT_PARAMETERS
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import AdaptiveLearningProfile, Card, ReviewLog, User, db
+from src.services.parameter_optimizer import optimize_profiles
+
+FITTED_PARAMETERS = [round(DEFAULT_PARAMETERS[0] * 2, 4), *DEFAULT_PARAMETERS[1:]]
+
+
+def fake_fit(review_logs):
+    """Module-level stand-in for the torch optimizer (picklable by workers)."""
+    assert all(1 <= review_log["rating"] <= 4 for review_log in review_logs)
+    return FITTED_PARAMETERS
+
+
+def _seed_language_reviews(client, auth_headers, count):
+    response = client.put(
+        "/api/spaced-repetition/adaptive-profiles/language",
+        headers=auth_headers,
+        json={"desired_retention": 0.9, "personalized_parameters": True},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["profile"]["personalized_parameters_enabled"] is True
+
+    with app.app_context():
+        user = User.query.one()
+        card = Card(user_id=user.id, learning_domain="language", concept_name="Collocations")
+        db.session.add(card)
+        db.session.flush()
+        start = datetime(2026, 1, 1)
+        db.session.add_all([
+            ReviewLog(user_id=user.id, card_id=card.id, rating="good" if index % 4 else "again",
+                      response_time=8.0, reviewed_at=start + timedelta(days=index))
+            for index in range(count)
+        ])
+        db.session.commit()
+        return card.id
+
+
+def test_optimizer_fits_consenting_profiles_and_resumes(client, auth_headers):
+    card_id = _seed_language_reviews(client, auth_headers, 6)
+
+    with app.app_context():
+        first = optimize_profiles(workers=1, min_reviews=5, min_new_reviews=3, fit=fake_fit)
+        assert first["fitted"] == 1
+        profile = AdaptiveLearningProfile.query.one()
+        assert json.loads(profile.fsrs_parameters) == FITTED_PARAMETERS
+        assert profile.parameters_review_count == 6
+
+        # Rien de nouveau : le profil déjà ajusté est ignoré lors d’une reprise.
+        assert optimize_profiles(workers=1, min_reviews=5, min_new_reviews=3, fit=fake_fit)["eligible"] == 0
+
+    review = client.post(
+        "/api/spaced-repetition/review-card",
+        headers=auth_headers,
+        json={"card_id": card_id, "rating": "good"},
+    )
+    assert review.status_code == 200
+    assert review.get_json()["personalized_parameters"] is True
+
+    withdrawn = client.put(
+        "/api/spaced-repetition/adaptive-profiles/language",
+        headers=auth_headers,
+        json={"desired_retention": 0.9, "personalized_parameters": False},
+    )
+    assert withdrawn.get_json()["profile"]["personalized_parameters_active"] is False
+    with app.app_context():
+        assert AdaptiveLearningProfile.query.one().fsrs_parameters is None
+
+
+def test_optimizer_requires_consent_and_enough_history(client, auth_headers):
+    _seed_language_reviews(client, auth_headers, 3)
+
+    with app.app_context():
+        assert optimize_profiles(workers=1, min_reviews=5, fit=fake_fit)["eligible"] == 0
+        profile = AdaptiveLearningProfile.query.one()
+        profile.personalized_parameters_enabled = False
+        db.session.commit()
+        assert optimize_profiles(workers=1, min_reviews=1, fit=fake_fit)["eligible"] == 0
@@ -0,0 +1,40 @@
+from tests.test_backend_flask import auth_headers, client, count_queries  # noqa: F401
+
+QUERY_BUDGET = 5
+
+
+def test_performance_analytics_uses_a_bounded_number_of_aggregate_queries(client, auth_headers, count_queries):
+    card_ids = []
+    for concept in ("Tenses", "Articles", "Prepositions"):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it"},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    reviews = [
+        {"card_id": card_ids[0], "rating": "again", "response_time": 12},
+        {"card_id": card_ids[0], "rating": "again", "response_time": 8},
+        {"card_id": card_ids[1], "rating": "good", "response_time": 4},
+        {"card_id": card_ids[1], "rating": "again", "response_time": 6},
+        {"card_id": card_ids[2], "rating": "easy", "response_time": 5},
+        {"card_id": card_ids[2], "rating": "good", "response_time": 5},
+    ]
+    assert client.post(
+        "/api/spaced-repetition/review-cards", headers=auth_headers, json={"reviews": reviews},
+    ).get_json()["applied_count"] == 6
+
+    with count_queries() as statements:
+        payload = client.get(
+            "/api/spaced-repetition/performance-analytics?period_days=365", headers=auth_headers,
+        ).get_json()
+
+    assert len(statements) <= QUERY_BUDGET
+    analytics = payload["analytics"]
+    assert analytics["total_cards"] == 3
+    assert analytics["total_reviews"] == 6
+    assert analytics["ratings"] == {"again": 3, "hard": 0, "good": 2, "easy": 1}
+    assert analytics["average_success_rate"] == 0.5
+    assert analytics["average_response_time"] == 6.7
+    # La carte la plus fragile vient en premier ; celle à 50 % la suit.
+    assert [card["id"] for card in analytics["fragile_cards"]] == card_ids[:2]
@@ -0,0 +1,47 @@
+import pytest
+
+from tests.test_backend_flask import app, auth_headers, client, count_queries  # noqa: F401
+from src.models.user import Card, Concept, Subject, User, db
+
+# Requêtes SQL admises par appel, tous chargements compris. Le budget ne
+# dépend pas du nombre de cartes ni de parcours : un N+1 le fait exploser.
+QUERY_BUDGETS = {
+    "/api/spaced-repetition/get-due-cards": 6,
+    "/api/spaced-repetition/cards": 1,
+    "/api/mastery/get-subjects": 3,
+    "/api/spaced-repetition/adaptive-overview": 3,
+}
+
+
+def _seed_collection(client, auth_headers, subject_count):
+    client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Seed", "content": "Explain it"},
+    )
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id)).scalar_one()
+        for index in range(subject_count):
+            subject = Subject(user_id=user_id, name=f"Path {index}", domain=("computing", "data")[index % 2])
+            db.session.add(subject)
+            db.session.flush()
+            for position in range(3):
+                db.session.add(Concept(subject_id=subject.id, name=f"Concept {index}.{position}"))
+                db.session.add(Card(
+                    user_id=user_id,
+                    subject_id=subject.id,
+                    concept_name=f"Concept {index}.{position}",
+                    front_content="Question",
+                ))
+        db.session.commit()
+
+
+@pytest.mark.parametrize("path", sorted(QUERY_BUDGETS))
+def test_listing_endpoints_stay_within_their_query_budget(client, auth_headers, count_queries, path):
+    _seed_collection(client, auth_headers, subject_count=8)
+
+    with count_queries() as statements:
+        response = client.get(path, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(statements) <= QUERY_BUDGETS[path], "\n".join(statements)
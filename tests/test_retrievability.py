@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fsrs import Card as FsrsCard
+from fsrs import Rating, Scheduler
+from fsrs.scheduler import DEFAULT_PARAMETERS
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import AdaptiveLearningProfile, Card, User, db
+from src.services.retrievability import (
+    compute_retrievability,
+    mean_retrievability,
+    memory_arrays_from_columns,
+    memory_arrays_from_states,
+    retention_gap,
+    retrievability_expression,
+)
+
+
+def _reviewed_states(now: datetime) -> list[FsrsCard]:
+    scheduler = Scheduler(enable_fuzzing=False)
+    cards = []
+    for index, (rating, days_ago) in enumerate([
+        (Rating.Good, 1), (Rating.Easy, 12), (Rating.Again, 40), (Rating.Hard, 0),
+    ]):
+        card, _ = scheduler.review_card(
+            FsrsCard(card_id=index + 1), rating, review_datetime=now - timedelta(days=days_ago, hours=3),
+        )
+        cards.append(card)
+    return cards
+
+
+def test_vectorized_retrievability_matches_py_fsrs():
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    fsrs_cards = _reviewed_states(now)
+    stability, last_review = memory_arrays_from_states(
+        [card.to_json() for card in fsrs_cards] + ["", "not json"]
+    )
+
+    retrievability = compute_retrievability(stability, last_review, now.replace(tzinfo=None))
+
+    scheduler = Scheduler(enable_fuzzing=False)
+    expected = [scheduler.get_card_retrievability(card, current_datetime=now) for card in fsrs_cards]
+    assert retrievability[:4] == pytest.approx(expected, rel=1e-12)
+    assert np.isnan(retrievability[4:]).all()
+    assert mean_retrievability(retrievability) == round(float(np.mean(expected)), 3)
+    assert retention_gap(retrievability[:1], 0.9)[0] == pytest.approx(0.9 - expected[0])
+
+
+def test_mean_retrievability_ignores_cards_without_memory_state():
+    assert mean_retrievability(np.array([np.nan, np.nan])) is None
+    assert mean_retrievability(np.array([])) is None
+
+
+def test_sql_retrievability_matches_the_vectorized_curve(client, auth_headers):
+    client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Seed", "content": "Explain it"},
+    )
+    now = datetime(2026, 3, 1, 12, 0)
+    memory = [(2.5, 1.2), (30.0, 12.9), (0.4, 40.0), (8.0, 0.1), (5.0, -2.0), (None, None)]
+    with app.app_context():
+        user_id = Card.query.one().user_id
+        for stability, days_ago in memory:
+            db.session.add(Card(
+                user_id=user_id,
+                concept_name="Memory",
+                front_content="Memory",
+                fsrs_stability=stability,
+                fsrs_last_review=None if days_ago is None else now - timedelta(days=days_ago),
+            ))
+        db.session.commit()
+        rows = db.session.execute(
+            db.select(Card.fsrs_stability, Card.fsrs_last_review, retrievability_expression(now, "sqlite"))
+            .where(Card.concept_name == "Memory")
+            .order_by(Card.id)
+        ).all()
+
+    stability, last_review = memory_arrays_from_columns([row[0] for row in rows], [row[1] for row in rows])
+    expected = compute_retrievability(stability, last_review, now)
+    assert [row[2] for row in rows[:-1]] == pytest.approx(expected[:-1].tolist(), rel=1e-12)
+    assert rows[-1][2] is None
+
+
+def test_due_cards_and_overview_use_each_domains_personal_forgetting_curve(client, auth_headers):
+    weights = list(DEFAULT_PARAMETERS)
+    weights[20] = 0.5
+    reviewed_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=10, hours=1)
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id)).scalar_one()
+        db.session.add(AdaptiveLearningProfile(
+            user_id=user_id, domain="language", desired_retention=0.9,
+            personalized_parameters_enabled=True, fsrs_parameters=json.dumps(weights),
+        ))
+        for domain in ("language", "computing"):
+            db.session.add(Card(
+                user_id=user_id,
+                learning_domain=domain,
+                concept_name=domain,
+                front_content=domain,
+                fsrs_state=2,
+                fsrs_stability=4.0,
+                fsrs_last_review=reviewed_at,
+                next_review=reviewed_at + timedelta(days=4),
+            ))
+        db.session.commit()
+
+    fsrs_card = FsrsCard(state=2, stability=4.0, difficulty=5.0, last_review=reviewed_at.replace(tzinfo=timezone.utc))
+    expected = {
+        "language": Scheduler(parameters=weights).get_card_retrievability(fsrs_card),
+        "computing": Scheduler().get_card_retrievability(fsrs_card),
+    }
+    assert abs(expected["language"] - expected["computing"]) > 0.01
+
+    due_cards = client.get("/api/spaced-repetition/get-due-cards", headers=auth_headers).get_json()["due_cards"]
+    assert {card["learning_domain"]: card["retrievability"] for card in due_cards} == {
+        domain: round(value, 4) for domain, value in expected.items()
+    }
+    overview = client.get("/api/spaced-repetition/adaptive-overview", headers=auth_headers).get_json()["domains"]
+    assert {domain["domain"]: domain["average_retrievability"] for domain in overview} == {
+        domain: round(value, 3) for domain, value in expected.items()
+    }
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import ReviewLog, ReviewLogArchive, db
+from src.services.review_archive import archive_review_logs, restore_review_logs
+
+
+def test_old_audit_states_move_to_the_compressed_archive_and_stay_readable(client, auth_headers):
+    response = client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Tenses", "content": "Explain it"},
+    )
+    card_id = response.get_json()["card"]["id"]
+    client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [
+            {"card_id": card_id, "rating": "good", "reviewed_at": "2026-01-05T09:00:00Z"},
+            {"card_id": card_id, "rating": "hard", "reviewed_at": "2026-01-09T09:00:00Z"},
+        ]},
+    )
+    client.post("/api/spaced-repetition/review-card", headers=auth_headers, json={"card_id": card_id, "rating": "good"})
+
+    with app.app_context():
+        expected = {log.id: log.audit_states for log in ReviewLog.query.order_by(ReviewLog.id)}
+        summary = archive_review_logs(older_than_days=30, batch_size=1, now=datetime(2026, 3, 1))
+        assert summary["archived"] == 2
+        assert summary["compressed_bytes"] < summary["raw_bytes"]
+        # Relancé, le traitement ne retrouve aucune ligne à archiver.
+        assert archive_review_logs(older_than_days=30, now=datetime(2026, 3, 1))["archived"] == 0
+        db.session.expire_all()
+
+        logs = ReviewLog.query.order_by(ReviewLog.id).all()
+        assert [log.next_state is None for log in logs] == [True, True, False]
+        assert {log.id: log.audit_states for log in logs} == expected
+        assert logs[1].audit_states["previous_state"] == logs[0].audit_states["next_state"]
+
+        assert restore_review_logs() == 2
+        db.session.expire_all()
+        assert ReviewLogArchive.query.count() == 0
+        assert {log.id: log.audit_states for log in ReviewLog.query} == expected
+        assert all(log.next_state is not None for log in ReviewLog.query)
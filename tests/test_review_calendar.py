@@ -0,0 +1,98 @@
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import event
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import Card, db
+from src.services import review_calendar as review_calendar_module
+from src.services.review_queue import invalidate_review_queue
+
+
+def _schedule(client, auth_headers, days_ahead=60):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(f"/api/spaced-repetition/get-schedule?days_ahead={days_ahead}", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return response.get_json(), [statement for statement in statements if "GROUP BY" in statement]
+
+
+def test_schedule_is_one_grouped_query_cached_until_the_next_review(client, auth_headers):
+    card_ids = []
+    for concept, difficulty in (("Tenses", "easy"), ("Articles", "hard"), ("Phrasal verbs", "hard")):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it", "difficulty": difficulty},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    today = datetime.now(timezone.utc).date()
+    with app.app_context():
+        for card_id, offset in zip(card_ids, (0, 3, 3)):
+            db.session.get(Card, card_id).next_review = datetime.combine(today + timedelta(days=offset), time(23, 30))
+        db.session.commit()
+
+    payload, grouped = _schedule(client, auth_headers)
+    assert len(grouped) == 1
+    schedule = payload["schedule"]
+    assert len(schedule) == 60
+    day_three = schedule[(today + timedelta(days=3)).isoformat()]
+    assert day_three["cards_due"] == 2
+    assert day_three["difficulty_distribution"] == {"easy": 0, "medium": 0, "hard": 2}
+    assert payload["summary"]["total_cards"] == 3
+
+    payload, grouped = _schedule(client, auth_headers)
+    assert grouped == []
+    assert payload["summary"]["total_cards"] == 3
+
+    client.post("/api/spaced-repetition/review-card", headers=auth_headers, json={"card_id": card_ids[0], "rating": "easy"})
+    payload, grouped = _schedule(client, auth_headers)
+    assert len(grouped) == 1
+    assert payload["schedule"][today.isoformat()]["cards_due"] == 0
+
+
+def test_calendar_cache_keeps_only_the_most_recent_learners(client, monkeypatch):
+    monkeypatch.setattr(review_calendar_module, "CALENDAR_CACHE_MAX_USERS", 2)
+    today = datetime.now(timezone.utc).date()
+    with app.app_context():
+        for user_id in (1, 2, 1, 3):
+            review_calendar_module.review_calendar(user_id, today, 7)
+    assert list(review_calendar_module._calendars) == [1, 3]
+
+
+def test_calendar_entries_are_checked_against_the_learners_card_version(client, auth_headers):
+    response = client.post(
+        "/api/spaced-repetition/create-card",
+        headers=auth_headers,
+        json={"concept_name": "Tenses", "content": "Explain it"},
+    )
+    card_id = response.get_json()["card"]["id"]
+    today = datetime.now(timezone.utc).date()
+    payload, _ = _schedule(client, auth_headers)
+    assert payload["schedule"][(today + timedelta(days=2)).isoformat()]["cards_due"] == 0
+
+    # Écriture traitée par un autre worker : le cache de ce processus n’est pas vidé.
+    with app.app_context():
+        db.session.get(Card, card_id).next_review = datetime.combine(today + timedelta(days=2), time(12))
+        db.session.commit()
+    payload, grouped = _schedule(client, auth_headers)
+    assert len(grouped) == 1
+    assert payload["schedule"][(today + timedelta(days=2)).isoformat()]["cards_due"] == 1
+
+    # Écriture en bloc hors ORM, puis cache d’un autre worker resté intact.
+    other_worker = dict(review_calendar_module._calendars)
+    with app.app_context():
+        db.session.execute(db.update(Card).values(next_review=datetime.combine(today + timedelta(days=5), time(12))))
+        invalidate_review_queue(Card.query.one().user_id)
+        db.session.commit()
+    review_calendar_module._calendars.update(other_worker)
+    payload, grouped = _schedule(client, auth_headers)
+    assert len(grouped) == 1
+    assert payload["schedule"][(today + timedelta(days=5)).isoformat()]["cards_due"] == 1
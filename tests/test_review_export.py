@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import ReviewLog
+from src.services.review_archive import archive_review_logs
+
+
+def _review_history(client, auth_headers):
+    card_ids = [
+        client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": name, "content": "Explain it"},
+        ).get_json()["card"]["id"]
+        for name in ("Tenses", "Loops")
+    ]
+    client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [
+            {"card_id": card_ids[0], "rating": "good", "reviewed_at": "2026-01-05T09:00:00Z", "response_time": 4.2},
+            {"card_id": card_ids[1], "rating": "again", "reviewed_at": "2026-01-06T09:00:00Z", "response_time": 9},
+            {"card_id": card_ids[0], "rating": "hard", "reviewed_at": "2026-01-09T09:00:00Z"},
+        ]},
+    )
+    client.post("/api/spaced-repetition/review-card", headers=auth_headers, json={"card_id": card_ids[0], "rating": "good"})
+    return card_ids
+
+
+def test_ndjson_export_streams_every_review_with_resolved_audit_states(client, auth_headers):
+    _review_history(client, auth_headers)
+    with app.app_context():
+        archive_review_logs(older_than_days=30, now=datetime(2026, 3, 1))
+        expected = {log.id: log.audit_states for log in ReviewLog.query}
+
+    response = client.get(
+        "/api/spaced-repetition/review-history/export?include_states=true",
+        headers=auth_headers,
+        buffered=False,
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [record["rating"] for record in records] == ["good", "again", "hard", "good"]
+    assert records[0]["reviewed_at"] == "2026-01-05T09:00:00+00:00"
+    assert {record["learning_domain"] for record in records} == {"general"}
+    # Archivés ou chaînés, les états exportés sont ceux de `audit_states`.
+    assert {
+        record["id"]: {key: record[key] for key in ("previous_state", "review_log", "next_state")}
+        for record in records
+    } == expected
+
+
+def test_csv_export_uses_the_fsrs_optimizer_revlog_format(client, auth_headers):
+    card_ids = _review_history(client, auth_headers)
+    response = client.get("/api/spaced-repetition/review-history/export?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 4
+    assert rows[0] == {
+        "card_id": str(card_ids[0]),
+        "review_time": str(int(datetime(2026, 1, 5, 9, tzinfo=timezone.utc).timestamp() * 1000)),
+        "review_rating": "3",
+        "review_duration": "4200",
+    }
+    assert rows[1]["review_rating"] == "1"
+    assert rows[2]["review_duration"] == ""
+
+
+def test_export_rejects_unknown_formats_and_domains(client, auth_headers):
+    assert client.get("/api/spaced-repetition/review-history/export?format=xml", headers=auth_headers).status_code == 400
+    assert client.get("/api/spaced-repetition/review-history/export?domain=cooking", headers=auth_headers).status_code == 400
@@ -0,0 +1,210 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import event
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import Card, DailyReviewQueue, Subject, User, db
+from src.services.adaptive_learning import ADAPTIVE_DOMAINS, resolve_domain
+from src.services.review_queue import ALL_DOMAINS, _unpack, build_review_queue, record_reviews
+
+
+def _create_cards(client, auth_headers, count):
+    card_ids = []
+    for index in range(count):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": f"Concept {index}", "content": "Explain it", "learning_domain": "language"},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    return card_ids
+
+
+def _queue_ids():
+    queue = DailyReviewQueue.query.filter_by(domain=ALL_DOMAINS).one()
+    return _unpack(queue.card_ids).tolist()
+
+
+def test_due_cards_are_paged_from_one_materialized_queue(client, auth_headers):
+    card_ids = _create_cards(client, auth_headers, 3)
+
+    first = client.get("/api/spaced-repetition/get-due-cards?limit=2", headers=auth_headers).get_json()
+    assert [card["id"] for card in first["due_cards"]] == card_ids[:2]
+    assert first["queue_size"] == 3
+    with app.app_context():
+        built_at = DailyReviewQueue.query.one().built_at
+
+    cursor = first["next_cursor"]
+    second = client.get(f"/api/spaced-repetition/get-due-cards?limit=2&cursor={cursor}", headers=auth_headers).get_json()
+    assert [card["id"] for card in second["due_cards"]] == card_ids[2:]
+    assert second["next_cursor"] is None
+    with app.app_context():
+        assert DailyReviewQueue.query.one().built_at == built_at
+
+    # Une carte revue et planifiée à plusieurs jours quitte la file sans reconstruction.
+    client.post(
+        "/api/spaced-repetition/review-card",
+        headers=auth_headers,
+        json={"card_id": card_ids[0], "rating": "easy"},
+    )
+    third = client.get("/api/spaced-repetition/get-due-cards", headers=auth_headers).get_json()
+    assert [card["id"] for card in third["due_cards"]] == card_ids[1:]
+    # Le curseur désigne une clé, pas une position : la revue ne décale rien.
+    resumed = client.get(f"/api/spaced-repetition/get-due-cards?limit=2&cursor={cursor}", headers=auth_headers)
+    assert [card["id"] for card in resumed.get_json()["due_cards"]] == card_ids[2:]
+    assert client.get("/api/spaced-repetition/get-due-cards?cursor=not-a-cursor", headers=auth_headers).status_code == 400
+    with app.app_context():
+        assert DailyReviewQueue.query.one().built_at == built_at
+
+    language = client.get("/api/spaced-repetition/get-due-cards?domain=language", headers=auth_headers).get_json()
+    assert language["queue_size"] == 2
+    assert client.get(
+        "/api/spaced-repetition/get-due-cards?domain=security", headers=auth_headers,
+    ).get_json()["queue_size"] == 0
+
+
+def test_concurrent_first_requests_of_the_day_share_one_queue(client, auth_headers):
+    card_ids = _create_cards(client, auth_headers, 2)
+    with app.app_context():
+        user_id = Card.query.first().user_id
+        engine = db.engine
+    raced = []
+
+    def concurrent_build(conn, cursor, statement, parameters, context, executemany):
+        # Une autre première requête écrit sa file entre la lecture et l’écriture de celle-ci.
+        if statement.startswith("INSERT INTO daily_review_queue") and not raced:
+            raced.append(statement)
+            conn.exec_driver_sql(
+                "INSERT INTO daily_review_queue (user_id, domain, queue_date, card_ids, size) "
+                "VALUES (?, '', ?, x'', 0)",
+                (user_id, datetime.utcnow().date().isoformat()),
+            )
+
+    event.listen(engine, "before_cursor_execute", concurrent_build)
+    try:
+        response = client.get("/api/spaced-repetition/get-due-cards", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", concurrent_build)
+    assert raced
+    assert response.status_code == 200
+    assert [card["id"] for card in response.get_json()["due_cards"]] == card_ids
+    with app.app_context():
+        assert _queue_ids() == card_ids
+
+
+def test_card_creation_and_retention_changes_invalidate_the_queue(client, auth_headers):
+    _create_cards(client, auth_headers, 1)
+    client.get("/api/spaced-repetition/get-due-cards", headers=auth_headers)
+
+    card_id = _create_cards(client, auth_headers, 1)[0]
+    with app.app_context():
+        assert DailyReviewQueue.query.count() == 0
+    response = client.get("/api/spaced-repetition/get-due-cards", headers=auth_headers).get_json()
+    assert card_id in [card["id"] for card in response["due_cards"]]
+
+    client.put("/api/spaced-repetition/settings", headers=auth_headers, json={"desired_retention": 0.85})
+    with app.app_context():
+        assert DailyReviewQueue.query.count() == 0
+
+
+def test_subject_domain_changes_invalidate_the_queue(client, auth_headers):
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id)).scalar_one()
+        subject = Subject(user_id=user_id, name="Python", domain="computing")
+        db.session.add(subject)
+        db.session.flush()
+        db.session.add(Card(user_id=user_id, subject_id=subject.id, concept_name="Loops", front_content="Loops"))
+        db.session.commit()
+        subject_id = subject.id
+
+    # File par domaine : la carte en sort quand son domaine hérité change.
+    computing = client.get("/api/spaced-repetition/get-due-cards?domain=computing", headers=auth_headers).get_json()
+    assert computing["queue_size"] == 1
+    with app.app_context():
+        db.session.get(Subject, subject_id).domain = "data"
+        db.session.commit()
+        assert DailyReviewQueue.query.count() == 0
+    computing = client.get("/api/spaced-repetition/get-due-cards?domain=computing", headers=auth_headers).get_json()
+    assert computing["queue_size"] == 0
+
+
+def test_reviews_due_again_today_go_to_the_back_of_the_queue(client, auth_headers):
+    card_ids = _create_cards(client, auth_headers, 3)
+
+    with app.app_context():
+        card = db.session.get(Card, card_ids[0])
+        now = datetime.combine(card.next_review.date() + timedelta(days=1), time(9, 0))
+        build_review_queue(card.user_id, ALL_DOMAINS, now)
+        record_reviews(card.user_id, {
+            card_ids[0]: ("language", now + timedelta(minutes=10)),
+            card_ids[1]: ("language", now + timedelta(days=3)),
+        }, now)
+        db.session.commit()
+        assert _queue_ids() == [card_ids[2], card_ids[0]]
+
+
+def test_cards_persist_their_resolved_domain_and_follow_their_subject(client, auth_headers):
+    _create_cards(client, auth_headers, 1)
+    with app.app_context():
+        user_id = Card.query.first().user_id
+        subjects = [None]
+        for domain in ("computing", "legacy-domain"):
+            subject = Subject(user_id=user_id, name=domain, domain=domain)
+            db.session.add(subject)
+            subjects.append(subject)
+        db.session.flush()
+        for learning_domain in (None, "", "security", "unknown"):
+            for subject in subjects:
+                db.session.add(Card(
+                    user_id=user_id,
+                    subject_id=subject.id if subject else None,
+                    learning_domain=learning_domain,
+                    concept_name="Mixed",
+                    front_content="Mixed",
+                ))
+        db.session.commit()
+
+        cards = Card.query.filter_by(concept_name="Mixed").order_by(Card.id).all()
+        expected = [
+            resolve_domain(learning_domain, subject.domain if subject else None)
+            for learning_domain in (None, "", "security", "unknown")
+            for subject in subjects
+        ]
+        assert [card.learning_domain for card in cards] == expected
+        assert all(card.learning_domain in ADAPTIVE_DOMAINS for card in cards)
+
+        # Domaine explicite identique à celui du parcours : il ne doit pas le suivre.
+        explicit = Card(
+            user_id=user_id,
+            subject_id=subjects[1].id,
+            learning_domain="computing",
+            concept_name="Explicit",
+            front_content="Explicit",
+        )
+        db.session.add(explicit)
+        db.session.commit()
+        assert not explicit.domain_inherited
+
+        subjects[1].domain = "data"
+        db.session.commit()
+        followed = {card.learning_domain for card in Card.query.filter_by(subject_id=subjects[1].id)}
+        assert followed == {"data", "security", "computing"}
+        assert db.session.get(Card, explicit.id).learning_domain == "computing"
+
+
+def test_card_browsing_walks_the_collection_with_keyset_cursors(client, auth_headers):
+    card_ids = _create_cards(client, auth_headers, 5)
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/spaced-repetition/cards?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        payload = client.get(url, headers=auth_headers).get_json()
+        seen.extend(card["id"] for card in payload["cards"])
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == card_ids
+
+    due_cursor = client.get("/api/spaced-repetition/get-due-cards?limit=1", headers=auth_headers).get_json()["next_cursor"]
+    response = client.get(f"/api/spaced-repetition/cards?cursor={due_cursor}", headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import Card, JobCheckpoint, User, db
+from src.services.job_checkpoints import open_checkpoint
+from src.services.review_replay import REPLAY_JOB_NAME, replay_card_states, replay_signature
+from src.services.sm2_migration import migrate_sm2_cards
+
+MEMORY_COLUMNS = ("fsrs_state", "fsrs_stability", "fsrs_difficulty", "fsrs_last_review", "next_review")
+
+
+def _reviewed_cards(client, auth_headers):
+    card_ids = []
+    for concept in ("Modal verbs", "Relative clauses"):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it"},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    response = client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [
+            {"card_id": card_ids[0], "rating": "good", "reviewed_at": "2026-01-05T09:00:00Z"},
+            {"card_id": card_ids[1], "rating": "again", "reviewed_at": "2026-01-05T09:01:00Z"},
+            {"card_id": card_ids[0], "rating": "hard", "reviewed_at": "2026-01-09T10:00:00Z"},
+            {"card_id": card_ids[1], "rating": "easy", "reviewed_at": "2026-01-09T10:02:00Z"},
+        ]},
+    )
+    assert response.get_json()["applied_count"] == 4
+    return card_ids
+
+
+def _memory(card_id):
+    card = db.session.get(Card, card_id)
+    db.session.refresh(card)
+    return tuple(getattr(card, column) for column in MEMORY_COLUMNS)
+
+
+def _corrupt(card_ids):
+    for card_id in card_ids:
+        card = db.session.get(Card, card_id)
+        card.fsrs_stability = 999.0
+        card.fsrs_difficulty = 1.0
+    db.session.commit()
+
+
+def test_replay_rebuilds_states_and_resumes_from_its_checkpoint(client, auth_headers):
+    card_ids = _reviewed_cards(client, auth_headers)
+
+    with app.app_context():
+        expected = {card_id: _memory(card_id) for card_id in card_ids}
+        _corrupt(card_ids)
+
+        # Arrêt simulé après le premier lot : seule la seconde carte est rejouée.
+        checkpoint = open_checkpoint(REPLAY_JOB_NAME, replay_signature())
+        checkpoint.cursor = card_ids[0]
+        db.session.commit()
+        summary = replay_card_states(batch_size=1)
+        assert summary["cards_this_run"] == 1
+        assert summary["logs_this_run"] == 2
+        assert summary["completed_at"] is not None
+        assert _memory(card_ids[1]) == expected[card_ids[1]]
+        assert db.session.get(Card, card_ids[0]).fsrs_stability == 999.0
+
+        # Un traitement terminé n’est pas relancé, sauf demande explicite.
+        assert replay_card_states()["cards_this_run"] == 0
+        summary = replay_card_states(batch_size=1, restart=True)
+        assert summary["cards_this_run"] == 2
+        assert db.session.get(JobCheckpoint, REPLAY_JOB_NAME).cursor == card_ids[1]
+        assert {card_id: _memory(card_id) for card_id in card_ids} == expected
+        assert db.session.get(Card, card_ids[0]).review_count == 2
+
+        # Une rétention personnelle modifiée change la signature : le rejeu repart.
+        User.query.one().desired_retention = 0.95
+        db.session.commit()
+        assert replay_card_states()["cards_this_run"] == 2
+
+
+def test_replay_starts_converted_cards_from_their_sm2_seed(client, auth_headers):
+    with app.app_context():
+        last_reviewed = datetime(2025, 12, 1, 8, 0)
+        card = Card(user_id=User.query.one().id, concept_name="Legacy", interval=60, easiness_factor=2.5,
+                    review_count=12, last_reviewed=last_reviewed, next_review=last_reviewed + timedelta(days=60))
+        db.session.add(card)
+        db.session.commit()
+        card_id = card.id
+        migrate_sm2_cards()
+        seeded_stability = db.session.get(Card, card_id).fsrs_stability
+
+    response = client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [{"card_id": card_id, "rating": "good", "reviewed_at": "2026-01-30T09:00:00Z"}]},
+    )
+    assert response.get_json()["applied_count"] == 1
+
+    with app.app_context():
+        expected = _memory(card_id)
+        # Deux mois d’historique SM-2 : bien plus stable qu’une carte neuve.
+        assert expected[1] > seeded_stability > 30
+        _corrupt([card_id])
+        replay_card_states(user_id=User.query.one().id)
+        assert _memory(card_id) == expected
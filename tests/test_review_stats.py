@@ -0,0 +1,60 @@
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import DailyReviewStats, db
+from src.services.review_stats import COUNTER_COLUMNS, backfill_review_stats
+
+
+def _snapshot():
+    return {
+        (row.user_id, row.domain, row.day): tuple(getattr(row, column) for column in COUNTER_COLUMNS)
+        for row in DailyReviewStats.query.all()
+    }
+
+
+def test_reviews_maintain_rollups_that_the_backfill_rebuilds_identically(client, auth_headers):
+    card_ids = []
+    for concept, domain in (("Tenses", "language"), ("Loops", "computing")):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it", "learning_domain": domain},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    client.post(
+        "/api/spaced-repetition/review-cards",
+        headers=auth_headers,
+        json={"reviews": [
+            {"card_id": card_ids[0], "rating": "again", "response_time": 10, "reviewed_at": "2026-01-05T09:00:00Z"},
+            {"card_id": card_ids[0], "rating": "good", "response_time": 4, "reviewed_at": "2026-01-05T09:10:00Z"},
+            {"card_id": card_ids[1], "rating": "easy", "response_time": 3, "reviewed_at": "2026-01-06T08:00:00Z"},
+        ]},
+    )
+    client.post(
+        "/api/spaced-repetition/review-card",
+        headers=auth_headers,
+        json={"card_id": card_ids[0], "rating": "hard", "response_time": 6},
+    )
+
+    with app.app_context():
+        live = _snapshot()
+        language_day = next(counters for key, counters in live.items() if key[1] == "language" and str(key[2]) == "2026-01-05")
+        assert dict(zip(COUNTER_COLUMNS, language_day)) == {
+            "again_count": 1, "hard_count": 0, "good_count": 1, "easy_count": 0,
+            "response_time_sum": 14.0, "new_card_count": 1,
+        }
+        assert len(live) == 3
+
+        db.session.query(DailyReviewStats).delete()
+        db.session.commit()
+        summary = backfill_review_stats(batch_size=1)
+        assert summary["users_this_run"] == 1
+        assert _snapshot() == live
+        # Relancé explicitement, le traitement remplace les lignes sans les doubler.
+        backfill_review_stats(restart=True)
+        assert _snapshot() == live
+
+    overview = client.get("/api/spaced-repetition/adaptive-overview", headers=auth_headers).get_json()
+    domains = {domain["domain"]: domain for domain in overview["domains"]}
+    # Seule la revue du jour entre dans la fenêtre de 30 jours.
+    assert domains["language"]["reviews_last_30_days"] == 1
+    assert domains["language"]["recall_rate"] == 1.0
+    assert domains["computing"]["reviews_last_30_days"] == 0
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.engine import CursorResult
+
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+from src.models.user import Card, User, db
+from src.services.fsrs_scheduler import FSRS_VERSION, fsrs_card_for, memory_state_from_sm2
+from src.services import sm2_migration
+from src.services.sm2_migration import _GUARDED_UPDATE, _converted_row, migrate_sm2_cards
+
+
+def test_sm2_seed_keeps_the_interval_and_maps_ease_to_difficulty():
+    stability, difficulty = memory_state_from_sm2(12, 2.5)
+    assert stability == pytest.approx(12)
+    assert memory_state_from_sm2(12, 3.0)[1] < difficulty < memory_state_from_sm2(12, 1.5)[1]
+    assert 1 <= memory_state_from_sm2(1, 1.3)[1] <= 10
+
+
+def test_bulk_migration_converts_legacy_cards_without_overwriting_reviews(client, auth_headers):
+    last_reviewed = datetime(2026, 3, 1, 8, 0)
+    with app.app_context():
+        user_id = User.query.one().id
+        db.session.add_all([
+            Card(user_id=user_id, concept_name=f"Legacy {index}", interval=interval, easiness_factor=2.3,
+                 review_count=reviews, last_reviewed=last_reviewed if reviews else None,
+                 next_review=last_reviewed + timedelta(days=interval))
+            for index, (interval, reviews) in enumerate([(6, 3), (1, 0), (20, 5)])
+        ])
+        db.session.commit()
+        cards = Card.query.order_by(Card.id).all()
+        card_ids = [card.id for card in cards]
+        lazy_seed = fsrs_card_for(cards[0])
+
+        # Une revue concurrente convertit la troisième carte entre la lecture
+        # du lot et son UPDATE : la garde `scheduler_type = 'sm2'` la préserve.
+        stale_row = db.session.execute(db.select(
+            Card.id, Card.interval, Card.easiness_factor, Card.review_count, Card.last_reviewed, Card.next_review,
+        ).where(Card.id == card_ids[2])).one()
+    review = client.post(
+        "/api/spaced-repetition/review-card", headers=auth_headers, json={"card_id": card_ids[2], "rating": "good"},
+    )
+    assert review.status_code == 200
+
+    with app.app_context():
+        reviewed_state = db.session.get(Card, card_ids[2]).scheduler_state
+        assert db.session.execute(_GUARDED_UPDATE, [_converted_row(stale_row)]).rowcount == 0
+        db.session.rollback()
+
+        summary = migrate_sm2_cards(batch_size=1)
+        assert summary["converted"] == 2
+        assert Card.query.filter_by(scheduler_type="sm2").count() == 0
+
+        seeded = db.session.get(Card, card_ids[0])
+        assert seeded.scheduler_version == FSRS_VERSION
+        assert seeded.fsrs_stability == pytest.approx(6)
+        assert seeded.fsrs_stability == lazy_seed.stability
+        assert seeded.fsrs_last_review == last_reviewed
+        assert seeded.next_review == last_reviewed + timedelta(days=6)
+
+        never_reviewed = db.session.get(Card, card_ids[1])
+        assert never_reviewed.scheduler_type == "fsrs"
+        assert never_reviewed.fsrs_state is None
+        assert db.session.get(Card, card_ids[2]).scheduler_state == reviewed_state
+
+        # Nouvelle carte SM-2 créée après coup : une seconde exécution la reprend.
+        db.session.add(Card(user_id=user_id, concept_name="Late legacy card"))
+        db.session.commit()
+        assert migrate_sm2_cards()["converted"] == 1
+
+
+def test_migration_counts_are_exact_when_the_driver_batches_executemany(client, auth_headers, monkeypatch):
+    last_reviewed = datetime(2026, 3, 1, 8, 0)
+    with app.app_context():
+        user_id = User.query.one().id
+        db.session.add_all([
+            Card(user_id=user_id, concept_name=f"Legacy {index}", interval=4, easiness_factor=2.5,
+                 review_count=2, last_reviewed=last_reviewed, next_review=last_reviewed + timedelta(days=4))
+            for index in range(3)
+        ])
+        db.session.commit()
+        reviewed_id = Card.query.order_by(Card.id).all()[1].id
+
+    converted_row = sm2_migration._converted_row
+
+    def review_meanwhile(row):
+        # La deuxième carte est revue (donc convertie) entre la lecture du lot et son UPDATE.
+        if row.id == reviewed_id:
+            db.session.execute(
+                db.update(Card)
+                .where(Card.id == reviewed_id)
+                .values(scheduler_type="fsrs", scheduler_state='{"reviewed": true}')
+            )
+        return converted_row(row)
+
+    # Comme psycopg2 : le rowcount d’un executemany ne compte que la dernière instruction.
+    monkeypatch.setattr(CursorResult, "supports_sane_multi_rowcount", lambda self: False)
+    monkeypatch.setattr(CursorResult, "rowcount", property(lambda self: 1))
+    monkeypatch.setattr(sm2_migration, "_converted_row", review_meanwhile)
+    with app.app_context():
+        summary = migrate_sm2_cards(batch_size=10)
+        assert (summary["scanned"], summary["converted"], summary["skipped"]) == (3, 2, 1)
+        assert db.session.get(Card, reviewed_id).scheduler_state == '{"reviewed": true}'
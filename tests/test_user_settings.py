@@ -0,0 +1,128 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from tests.test_backend_flask import app, auth_headers, client, count_queries  # noqa: F401
+from src.models.user import User, db
+from src.routes import spaced_repetition as routes
+from src.services.user_settings import load_user_settings
+
+
+def _settings_statements(statements):
+    return [statement for statement in statements if "adaptive_learning_profile" in statement]
+
+
+def test_reviews_reuse_cached_settings_until_a_retention_changes(client, auth_headers, count_queries):
+    card_ids = []
+    for concept in ("Tenses", "Articles"):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it", "learning_domain": "language"},
+        )
+        card_ids.append(response.get_json()["card"]["id"])
+    client.put(
+        "/api/spaced-repetition/adaptive-profiles/language",
+        headers=auth_headers,
+        json={"desired_retention": 0.85},
+    )
+
+    with count_queries() as statements:
+        first = client.post(
+            "/api/spaced-repetition/review-card",
+            headers=auth_headers,
+            json={"card_id": card_ids[0], "rating": "good"},
+        ).get_json()
+    assert first["retention_target"] == 0.85
+    assert len(_settings_statements(statements)) == 1
+
+    with count_queries() as statements:
+        client.post(
+            "/api/spaced-repetition/review-card",
+            headers=auth_headers,
+            json={"card_id": card_ids[1], "rating": "good"},
+        )
+        client.get("/api/spaced-repetition/adaptive-overview", headers=auth_headers)
+    assert _settings_statements(statements) == []
+
+    client.put(
+        "/api/spaced-repetition/adaptive-profiles/language",
+        headers=auth_headers,
+        json={"desired_retention": 0.93},
+    )
+    updated = client.post(
+        "/api/spaced-repetition/review-card",
+        headers=auth_headers,
+        json={"card_id": card_ids[0], "rating": "good"},
+    ).get_json()
+    assert updated["retention_target"] == 0.93
+
+
+def test_settings_snapshot_loads_global_retention_and_profiles_in_one_query(client, auth_headers, count_queries):
+    client.put("/api/spaced-repetition/settings", headers=auth_headers, json={"desired_retention": 0.87})
+    client.put(
+        "/api/spaced-repetition/adaptive-profiles/computing",
+        headers=auth_headers,
+        json={"desired_retention": 0.95, "personalized_parameters": True},
+    )
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id)).scalar_one()
+        with count_queries() as statements:
+            settings = load_user_settings(user_id)
+            assert load_user_settings(user_id) is settings
+        assert load_user_settings(user_id + 1) is None
+
+    assert len(statements) == 1
+    assert settings.desired_retention == 0.87
+    assert set(settings.profiles) == {"computing"}
+    assert settings.profiles["computing"].personalized_parameters_enabled
+
+
+
+def test_settings_caches_are_invalidated_after_the_commit(client, auth_headers, monkeypatch):
+    commits, invalidated_after = [], []
+    invalidate = routes.invalidate_user_settings
+
+    def record(user_id):
+        # A request reading between the invalidation and the commit would cache the old row.
+        invalidated_after.append(len(commits))
+        invalidate(user_id)
+
+    def count_commit(session):
+        commits.append(session)
+
+    monkeypatch.setattr(routes, "invalidate_user_settings", record)
+    event.listen(Session, "after_commit", count_commit)
+    try:
+        for url, payload in (
+            ("/api/spaced-repetition/settings", {"desired_retention": 0.87}),
+            ("/api/spaced-repetition/adaptive-profiles/language", {"desired_retention": 0.95}),
+        ):
+            commits.clear()
+            assert client.put(url, headers=auth_headers, json=payload).status_code == 200
+    finally:
+        event.remove(Session, "after_commit", count_commit)
+    assert invalidated_after == [1, 1]
+
+
+def test_cached_settings_follow_writes_committed_by_another_worker(client, auth_headers, count_queries):
+    client.put("/api/spaced-repetition/settings", headers=auth_headers, json={"desired_retention": 0.87})
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id)).scalar_one()
+        assert load_user_settings(user_id).desired_retention == 0.87
+
+    with app.app_context():
+        with count_queries() as statements:
+            assert load_user_settings(user_id).desired_retention == 0.87
+        # Warm cache: one primary-key read of the version, no settings query.
+        assert len(statements) == 1 and _settings_statements(statements) == []
+
+        # Another worker commits a change: its cache invalidation never reaches this process.
+        db.session.execute(
+            db.update(User)
+            .where(User.id == user_id)
+            .values(desired_retention=0.93, settings_version=User.settings_version + 1)
+        )
+        db.session.commit()
+
+    with app.app_context():
+        assert load_user_settings(user_id).desired_retention == 0.93
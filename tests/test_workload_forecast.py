@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+from fsrs.scheduler import DEFAULT_PARAMETERS
+
+from src.models.user import AdaptiveLearningProfile, User, db
+from src.services import workload_forecast
+from src.services.user_settings import invalidate_user_settings
+from src.services.workload_forecast import DEFAULT_REVIEW_SECONDS, simulate_workload
+from tests.test_backend_flask import app, auth_headers, client  # noqa: F401
+
+
+def _simulate(stability, due_day, last_review_day, days=30, simulations=20, seed=0):
+    count = len(stability)
+    return simulate_workload(
+        stability=np.array(stability, dtype=np.float64),
+        difficulty=np.full(count, 5.0),
+        due_day=np.array(due_day),
+        last_review_day=np.array(last_review_day),
+        desired_retention=np.full(count, 0.9),
+        review_seconds=np.full(count, DEFAULT_REVIEW_SECONDS),
+        days=days,
+        simulations=simulations,
+        seed=seed,
+    )
+
+
+def test_simulation_is_deterministic_for_a_seed():
+    args = ([np.nan, 3.0, 40.0, 0.5], [0, -4, 10, 2], [0, -7, -30, 0])
+    first_reviews, first_minutes = _simulate(*args, seed=7)
+    again_reviews, again_minutes = _simulate(*args, seed=7)
+    other_reviews, _ = _simulate(*args, seed=8)
+
+    assert first_reviews.shape == (20, 30)
+    assert np.array_equal(first_reviews, again_reviews)
+    assert np.array_equal(first_minutes, again_minutes)
+    assert not np.array_equal(first_reviews, other_reviews)
+
+
+def test_overdue_and_new_cards_are_reviewed_on_the_first_day():
+    reviews, minutes = _simulate([np.nan, 5.0], [0, -12], [0, -20], simulations=50)
+
+    # Une carte nouvelle génère au moins une revue, une carte en retard aussi.
+    assert (reviews[:, 0] >= 2).all()
+    assert np.allclose(minutes, reviews * DEFAULT_REVIEW_SECONDS / 60)
+
+
+def test_stable_card_is_not_reviewed_before_its_due_date():
+    reviews, _ = _simulate([400.0], [20], [-380], days=30, simulations=30)
+
+    assert reviews[:, :20].sum() == 0
+    assert (reviews[:, 20] == 1).sum() + (reviews[:, 20] == 2).sum() == 30
+    # Un rappel réussi repousse la carte au-delà de l’horizon.
+    assert reviews[:, 21:].sum() <= 2 * reviews[:, 20].sum()
+
+
+def test_forecast_endpoint_returns_percentile_bands(client, auth_headers):
+    for concept in ("Passive voice", "Phrasal verbs"):
+        response = client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it"},
+        )
+        assert response.status_code == 200
+    client.post(
+        "/api/spaced-repetition/review-card",
+        headers=auth_headers,
+        json={"card_id": response.get_json()["card"]["id"], "rating": "good"},
+    )
+
+    response = client.get(
+        "/api/spaced-repetition/forecast?days_ahead=14&simulations=40&seed=3", headers=auth_headers,
+    )
+    assert response.status_code == 200
+    forecast = response.get_json()["forecast"]
+    assert forecast["total_cards"] == 2
+    assert forecast["simulations"] == 40
+    assert len(forecast["days"]) == 14
+    first_day = forecast["days"][0]
+    assert first_day["expected_reviews"] >= 1
+    assert first_day["reviews"]["p10"] <= first_day["reviews"]["p50"] <= first_day["reviews"]["p90"]
+    assert forecast == client.get(
+        "/api/spaced-repetition/forecast?days_ahead=14&simulations=40&seed=3", headers=auth_headers,
+    ).get_json()["forecast"]
+
+    invalid = client.get("/api/spaced-repetition/forecast?seed=abc", headers=auth_headers)
+    assert invalid.status_code == 400
+
+
+def test_forecast_reports_reduced_simulations_and_uses_personal_weights(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(workload_forecast, "MAX_SIMULATED_CELLS", 30)
+    calls = []
+    real_simulate = workload_forecast.simulate_workload
+
+    def recording_simulate(**kwargs):
+        calls.append((kwargs["parameters"], len(kwargs["stability"])))
+        return real_simulate(**kwargs)
+
+    monkeypatch.setattr(workload_forecast, "simulate_workload", recording_simulate)
+    for concept, domain in (("Passive voice", "language"), ("Loops", "computing")):
+        client.post(
+            "/api/spaced-repetition/create-card",
+            headers=auth_headers,
+            json={"concept_name": concept, "content": "Explain it", "learning_domain": domain},
+        )
+    weights = [round(weight * 1.01, 4) for weight in DEFAULT_PARAMETERS]
+    with app.app_context():
+        db.session.add(AdaptiveLearningProfile(
+            user_id=User.query.one().id, domain="language",
+            personalized_parameters_enabled=True, fsrs_parameters=json.dumps(weights),
+        ))
+        db.session.commit()
+        invalidate_user_settings()
+
+    response = client.get("/api/spaced-repetition/forecast?simulations=40", headers=auth_headers)
+    payload = response.get_json()
+    forecast = payload["forecast"]
+    assert (forecast["simulations"], forecast["requested_simulations"]) == (15, 40)
+    assert forecast["simulations_reduced"] and forecast["personalized_parameters"]
+    assert "15 simulations au lieu de 40" in payload["explanation"]
+    assert calls == [(None, 1), (tuple(weights), 1)]